@@ -1,9 +1,30 @@
+import json
+import os
+import subprocess
+from typing import List
 from airflow import DAG
+from airflow.decorators import task
 from airflow.operators.bash import BashOperator
 from datetime import datetime, timedelta
 
 PROJECT_DIR = "/opt/airflow/scripts"
 
+# When set, the DAG only triggers the long-running ingestion service
+# (scripts/ingestion_service.py) instead of starting the scripts itself
+INGESTION_SERVICE_URL = os.getenv("RSS_INGESTION_SERVICE_URL", "")
+
+# "sharded" maps one extract+load task over each shard of the feed registry
+# (feeds grouped by host, at most RSS_SHARD_SIZE per shard), then normalizes once;
+# "batch" runs extract and load as two tasks with an S3 round trip between them;
+# "combined" fetches and loads in one process and archives to S3 in the background
+PIPELINE_MODE = os.getenv("RSS_PIPELINE_MODE", "sharded")
+
+# Shard tasks of one DAG run allowed to run at the same time
+SHARD_CONCURRENCY = int(os.getenv("RSS_SHARD_CONCURRENCY", 8))
+
+# BashOperator exports the dag run id (AIRFLOW_CTX_DAG_RUN_ID); the batch scripts
+# checkpoint feeds and files under it in etl_run_ledger, so a retry redoes only
+# what the failed attempt did not finish
 default_args = {
     "owner": "hodaya",
     "retries": 1,
@@ -20,21 +41,72 @@ with DAG(
     tags=["rss", "etl", "naya_project"],
 ) as dag:
 
-    extract_rss_to_s3 = BashOperator(
-        task_id="extract_rss_to_s3",
-        bash_command=f"""
-        cd {PROJECT_DIR} &&
-        python3 get_xml_upload_s3.py
-        """,
-    )
+    if INGESTION_SERVICE_URL:
+        trigger_ingestion_service = BashOperator(
+            task_id="trigger_ingestion_service",
+            bash_command=f"""
+            curl --fail --silent --show-error --max-time 900 \\
+                -X POST "{INGESTION_SERVICE_URL.rstrip('/')}/trigger?wait=1"
+            """,
+        )
+    elif PIPELINE_MODE == "sharded":
+        @task
+        def list_shards() -> List[str]:
+            """Shard names of the feed registry, resolved when the run starts."""
+            output = subprocess.run(
+                ["python3", "rss_feeds.py"],
+                cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+            ).stdout
+            return json.loads(output.strip().splitlines()[-1])
+
+        # A slow or failing host only holds up its own shard
+        extract_and_load_shard = BashOperator.partial(
+            task_id="extract_and_load_shard",
+            bash_command=f"""
+            cd {PROJECT_DIR} &&
+            python3 get_xml_upload_s3.py --shard "$RSS_SHARD" &&
+            python3 process_raw_data_s3.py --shard "$RSS_SHARD" --no-normalize
+            """,
+            append_env=True,
+            map_index_template="{{ task.env['RSS_SHARD'] }}",
+            max_active_tis_per_dagrun=SHARD_CONCURRENCY,
+        ).expand(env=list_shards().map(lambda shard: {"RSS_SHARD": shard}))
+
+        # Runs once every shard finished, also when some failed, so the
+        # loaded shards are published
+        normalize_and_publish = BashOperator(
+            task_id="normalize_and_publish",
+            bash_command=f"""
+            cd {PROJECT_DIR} &&
+            python3 process_raw_data_s3.py --normalize-only
+            """,
+            trigger_rule="all_done",
+        )
 
-    process_and_load_to_mysql = BashOperator(
-        task_id="process_and_load_to_mysql",
-        bash_command=f"""
-        cd {PROJECT_DIR} &&
-        python3 process_raw_data_s3.py
-        """,
-    )
+        extract_and_load_shard >> normalize_and_publish
+    elif PIPELINE_MODE == "combined":
+        extract_and_load = BashOperator(
+            task_id="extract_and_load",
+            bash_command=f"""
+            cd {PROJECT_DIR} &&
+            python3 rss_pipeline.py
+            """,
+        )
+    else:
+        extract_rss_to_s3 = BashOperator(
+            task_id="extract_rss_to_s3",
+            bash_command=f"""
+            cd {PROJECT_DIR} &&
+            python3 get_xml_upload_s3.py
+            """,
+        )
 
-    extract_rss_to_s3 >> process_and_load_to_mysql
+        process_and_load_to_mysql = BashOperator(
+            task_id="process_and_load_to_mysql",
+            bash_command=f"""
+            cd {PROJECT_DIR} &&
+            python3 process_raw_data_s3.py
+            """,
+        )
 
+        extract_rss_to_s3 >> process_and_load_to_mysql
@@ -0,0 +1,34 @@
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from datetime import datetime, timedelta
+
+PROJECT_DIR = "/opt/airflow/scripts"
+
+# Weekday (Monday is 0) of the run that also rebuilds the hot tables with
+# OPTIMIZE TABLE, returning the space freed by archiving to the filesystem
+OPTIMIZE_WEEKDAY = 6
+
+default_args = {
+    "owner": "hodaya",
+    "retries": 1,
+    "retry_delay": timedelta(minutes=10),
+}
+
+with DAG(
+    dag_id="rss_raw_retention",
+    default_args=default_args,
+    description="Archive normalized raw RSS rows past the retention window",
+    schedule_interval="30 3 * * *",
+    start_date=datetime(2024, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    tags=["rss", "retention", "naya_project"],
+) as dag:
+
+    archive_raw_items = BashOperator(
+        task_id="archive_raw_items",
+        bash_command=f"""
+        cd {PROJECT_DIR} &&
+        python3 retention.py {{{{ '--optimize' if logical_date.weekday() == {OPTIMIZE_WEEKDAY} else '' }}}}
+        """,
+    )
@@ -0,0 +1,96 @@
+"""
+Archive compression benchmark: bytes moved and time per run for each codec.
+
+A synthetic corpus is uploaded with upload_to_s3 and read back with
+get_raw_data against moto (or an S3-compatible endpoint such as MinIO),
+once per codec. With moto the timings mostly reflect compression CPU cost;
+use a real endpoint to include network transfer.
+
+Usage:
+    python benchmarks/bench_archive_compression.py --feeds 80 --items 50
+    python benchmarks/bench_archive_compression.py --s3-endpoint http://localhost:9000
+"""
+from typing import Any, Dict, List
+from pathlib import Path
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic_feeds import generate_corpus  # noqa: E402
+from run_benchmark import empty_bucket, local_s3  # noqa: E402
+from run_metrics import start_run  # noqa: E402
+from get_xml_upload_s3 import upload_to_s3  # noqa: E402
+from process_raw_data_s3 import get_raw_data  # noqa: E402
+
+BUCKET = "rss-archive-benchmark"
+
+
+def bench_codec(s3: Any, corpus: List[Any], codec: str, repeat: int) -> Dict[str, float]:
+    """
+    Upload and read back the corpus with one codec.
+
+    Returns:
+        Bytes stored and median upload/read seconds per run
+    """
+    upload_times, read_times = [], []
+    stored_bytes = 0
+    for _ in range(repeat):
+        empty_bucket(s3, BUCKET)
+        run = start_run(f"archive_{codec}")
+
+        started = time.perf_counter()
+        for feed in corpus:
+            upload_to_s3(s3, BUCKET, f"{feed.source}_{feed.category}.xml", feed.xml, compression=codec)
+        upload_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        get_raw_data(s3, BUCKET)
+        read_times.append(time.perf_counter() - started)
+
+        stored_bytes = run.to_dict()["stages"]["upload_to_s3"]["counters"]["bytes"]
+
+    return {
+        "stored_bytes": stored_bytes,
+        "upload_seconds": sorted(upload_times)[len(upload_times) // 2],
+        "read_seconds": sorted(read_times)[len(read_times) // 2],
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Archive compression benchmark")
+    arg_parser.add_argument("--feeds", type=int, default=80)
+    arg_parser.add_argument("--items", type=int, default=50, help="Items per feed")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--s3-endpoint", default=os.getenv("BENCH_S3_ENDPOINT"))
+    args = arg_parser.parse_args()
+
+    corpus = generate_corpus(args.feeds, args.items)
+    raw_bytes = sum(len(feed.xml) for feed in corpus)
+    codecs = ["none", "gzip"]
+    if importlib.util.find_spec("zstandard"):
+        codecs.append("zstd")
+
+    # The pipeline logs one line per object; keep the benchmark output readable
+    logging.disable(logging.INFO)
+
+    print(f"{len(corpus)} feeds, {raw_bytes / 1e6:.2f} MB uncompressed")
+    print(f"{'codec':<6} {'stored MB':>10} {'ratio':>7} {'upload s':>9} {'read s':>8}")
+    with local_s3(args.s3_endpoint) as s3:
+        for codec in codecs:
+            result = bench_codec(s3, corpus, codec, args.repeat)
+            print(
+                f"{codec:<6} {result['stored_bytes'] / 1e6:10.2f} "
+                f"{raw_bytes / result['stored_bytes']:6.1f}x "
+                f"{result['upload_seconds']:9.3f} {result['read_seconds']:8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
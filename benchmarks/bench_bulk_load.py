@@ -0,0 +1,343 @@
+"""
+Bulk load benchmark: batched executemany upserts against LOAD DATA LOCAL
+INFILE into a staging table followed by one INSERT ... SELECT.
+
+Records are real parse_raw_items/clean_records output of a synthetic corpus,
+repeated with fresh guids until --rows is reached. Each path loads them twice
+into a scratch copy of rss_raw_items (created with LIKE, dropped afterwards):
+once as new rows, once as updates of existing rows. A sweep over --sizes then
+times both paths on growing batches of new rows, to find the batch size from
+which the bulk path wins (what BULK_LOAD_THRESHOLD should be).
+
+MySQL is the database configured through the usual DB_* variables, with the
+db_init schema loaded and local_infile=ON on the server.
+
+The client-side work of each path is always measured, without a server: the
+multi-row INSERT statements pymysql builds for the batched upserts (bind
+processing and escaping of every value), against the TSV file written for
+LOAD DATA. Throughput is compared against a stored baseline, as in
+run_benchmark.py.
+
+--plan runs without a database: it batches a synthetic run of --feeds files
+with parse_record_batches and reports how many records each path would load.
+
+Usage:
+    python benchmarks/bench_bulk_load.py --rows 50000
+    python benchmarks/bench_bulk_load.py --no-mysql            # client side only
+    python benchmarks/bench_bulk_load.py --save-baseline
+    python benchmarks/bench_bulk_load.py --plan --feeds 400
+"""
+from typing import Any, Callable, Dict, List
+from pathlib import Path
+from unittest import mock
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic_feeds import generate_corpus  # noqa: E402
+from run_metrics import start_run  # noqa: E402
+import process_raw_data_s3 as processing  # noqa: E402
+
+SCRATCH_TABLE = "rss_raw_items_bulk_bench"
+
+BASELINE_PATH = BENCH_DIR / "baselines" / "bulk_load.json"
+
+# Allowed throughput drop against the baseline before the run fails
+DEFAULT_TOLERANCE = 0.2
+
+# Batch sizes of the threshold sweep
+DEFAULT_SIZES = "500,1000,2000,5000,10000,20000"
+
+
+def make_records(rows: int, seed: int) -> List[Dict[str, Any]]:
+    """Parse a synthetic corpus and repeat its records up to `rows`."""
+    corpus = generate_corpus(80, 50, seed=seed)
+    xml_files = [(f"{feed.source}_{feed.category}.xml", feed.xml) for feed in corpus]
+    parsed = processing.clean_records(processing.parse_raw_items(xml_files))
+    records = []
+    for number in range(rows):
+        record = dict(parsed[number % len(parsed)])
+        record["id"] = f"{record['id']}#{number // len(parsed)}"
+        records.append(record)
+    return records
+
+
+# ============================================================================
+# Client Side (no server)
+# ============================================================================
+def raw_items_table() -> Any:
+    """rss_raw_items as declared in db_init/01_create_tables.sql."""
+    from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, Text
+
+    return Table(
+        processing.TABLE_NAME, MetaData(),
+        Column("id", String(512), primary_key=True),
+        Column("source", String(50)),
+        Column("category", String(255)),
+        Column("title", String(512)),
+        Column("link", String(2048)),
+        Column("published_date", DateTime),
+        Column("description", Text),
+        Column("tags", JSON),
+    )
+
+
+def row_wise_client(records: List[Dict[str, Any]]) -> int:
+    """
+    Build the statements of the batched upsert as they would be sent, one
+    multi-row INSERT per UPSERT_BATCH_SIZE records.
+
+    Returns:
+        Bytes of SQL built
+    """
+    import pymysql
+    from sqlalchemy.dialects import mysql
+
+    dialect = mysql.pymysql.dialect(json_serializer=json.dumps)
+    stmt = mysql.insert(raw_items_table())
+    stmt = stmt.on_duplicate_key_update(
+        title=stmt.inserted.title,
+        description=stmt.inserted.description,
+        published_date=stmt.inserted.published_date,
+        tags=stmt.inserted.tags
+    )
+    compiled = stmt.compile(dialect=dialect)
+    processors = compiled._bind_processors
+    names = compiled.positiontup
+
+    class CapturingCursor(pymysql.cursors.Cursor):
+        sent = 0
+
+        def _query(self, query: str) -> int:
+            self.sent += len(query)
+            return 0
+
+    connection = pymysql.connect(defer_connect=True, charset="utf8mb4")
+    # Set by the handshake; a server with the default sql_mode escapes with backslashes
+    connection.server_status = 0
+    cursor = connection.cursor(CapturingCursor)
+    for start in range(0, len(records), processing.UPSERT_BATCH_SIZE):
+        batch = []
+        for record in records[start:start + processing.UPSERT_BATCH_SIZE]:
+            params = compiled.construct_params(record)
+            batch.append(tuple(
+                processors[name](params[name]) if name in processors else params[name]
+                for name in names
+            ))
+        cursor.executemany(compiled.string, batch)
+    return cursor.sent
+
+
+def bulk_client(records: List[Dict[str, Any]]) -> int:
+    """
+    Write the LOAD DATA file of the bulk path, as bulk_load_records does.
+
+    Returns:
+        Bytes written
+    """
+    by_id = {record["id"]: record for record in records}
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", suffix=".tsv", delete=False) as tsv_file:
+        processing._write_bulk_load_rows(tsv_file, by_id.values())
+    size = os.path.getsize(tsv_file.name)
+    os.unlink(tsv_file.name)
+    return size
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Fastest of `repeat` timed calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+# ============================================================================
+# MySQL
+# ============================================================================
+def row_wise(records: List[Dict[str, Any]], engine: Any) -> None:
+    with mock.patch.object(processing, "BULK_LOAD_THRESHOLD", 0):
+        processing.upsert_records(records, SCRATCH_TABLE, engine=engine)
+
+
+def bulk(records: List[Dict[str, Any]], engine: Any) -> None:
+    if not processing.bulk_load_records(records, SCRATCH_TABLE, engine=engine):
+        raise RuntimeError("Bulk load fell back; is local_infile enabled on the server?")
+
+
+def timed(func: Callable[[List[Dict[str, Any]], Any], None], records: List[Dict[str, Any]], engine: Any) -> float:
+    start_run("bench")
+    started = time.perf_counter()
+    func(records, engine)
+    return time.perf_counter() - started
+
+
+def reset_scratch_table(engine: Any) -> None:
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {SCRATCH_TABLE} LIKE {processing.TABLE_NAME}"))
+
+
+def run_mysql(records: List[Dict[str, Any]], sizes: List[int]) -> Dict[str, Any]:
+    """
+    Time both paths against MySQL: inserts and updates of every record, then
+    new rows in batches of each of `sizes`.
+
+    Returns:
+        Dictionary with per-path timings and the sweep
+    """
+    from sqlalchemy import text
+
+    # Second pass: same guids, changed titles, so every row is an update
+    updates = [dict(record, title=f"{record['title']} (updated)") for record in records]
+
+    engine = processing.init_mysql_engine(echo=False)
+    timings: Dict[str, Dict[str, float]] = {}
+    sweep: Dict[str, Dict[str, float]] = {}
+    try:
+        for name, func in (("row_wise", row_wise), ("bulk", bulk)):
+            reset_scratch_table(engine)
+            timings[name] = {
+                "insert": timed(func, records, engine),
+                "update": timed(func, updates, engine),
+            }
+        for size in sizes:
+            sweep[str(size)] = {}
+            for name, func in (("row_wise", row_wise), ("bulk", bulk)):
+                reset_scratch_table(engine)
+                sweep[str(size)][name] = round(timed(func, records[:size], engine), 4)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+        engine.dispose()
+    return {"timings": timings, "sweep": sweep}
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Measure the client side of both paths, and both paths against MySQL
+    unless --no-mysql.
+
+    Returns:
+        Dictionary with the parameters, throughput and the threshold sweep
+    """
+    records = make_records(args.rows, args.seed)
+    rows = len(records)
+
+    throughput: Dict[str, float] = {
+        "row_wise_client_rows_per_s": round(rows / best_of(args.repeat, lambda: row_wise_client(records)), 2),
+        "bulk_client_rows_per_s": round(rows / best_of(args.repeat, lambda: bulk_client(records)), 2),
+    }
+    result: Dict[str, Any] = {
+        "params": {"rows": rows, "seed": args.seed, "upsert_batch_size": processing.UPSERT_BATCH_SIZE},
+        "bulk_load_threshold": processing.BULK_LOAD_THRESHOLD,
+        "throughput": throughput,
+    }
+
+    if not args.no_mysql:
+        sizes = [int(size) for size in args.sizes.split(",") if size and int(size) <= rows]
+        measured = run_mysql(records, sizes)
+        for name, phases in measured["timings"].items():
+            for phase, seconds in phases.items():
+                throughput[f"{name}_{phase}_rows_per_s"] = round(rows / seconds, 2)
+        result["sweep"] = measured["sweep"]
+        result["crossover_rows"] = next(
+            (int(size) for size, times in measured["sweep"].items() if times["bulk"] < times["row_wise"]),
+            None
+        )
+    return result
+
+
+def compare_to_baseline(result: Dict[str, Any], tolerance: float) -> bool:
+    """
+    Print throughput next to the stored baseline, and the threshold sweep.
+
+    Returns:
+        False when any metric dropped by more than the tolerance
+    """
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else None
+    if baseline and baseline["params"] != result["params"]:
+        print(f"Baseline was recorded with {baseline['params']}; not comparing")
+        baseline = None
+
+    ok = True
+    params = result["params"]
+    print(f"{params['rows']} records, upsert batch {params['upsert_batch_size']}, "
+          f"bulk threshold {result['bulk_load_threshold']}")
+    for key, value in result["throughput"].items():
+        line = f"{key:<30} {value:12.2f}"
+        base_value = (baseline or {}).get("throughput", {}).get(key)
+        if base_value:
+            change = (value - base_value) / base_value
+            line += f"  (baseline {base_value:.2f}, {change:+.0%})"
+            if change < -tolerance:
+                line += "  REGRESSION"
+                ok = False
+        print(line)
+
+    for size, times in result.get("sweep", {}).items():
+        print(f"{size:>8} rows  row-wise {times['row_wise']:7.3f}s  bulk {times['bulk']:7.3f}s  "
+              f"speedup {times['row_wise'] / times['bulk']:5.2f}x")
+    if "crossover_rows" in result:
+        print(f"bulk faster from {result['crossover_rows']} rows (threshold {result['bulk_load_threshold']})")
+    return ok
+
+
+def plan(feeds: int, items: int, seed: int) -> None:
+    """Print how a run of `feeds` files is split between the batched and bulk paths."""
+    corpus = generate_corpus(feeds, items, seed=seed)
+    xml_files = [(f"{number}_{feed.source}_{feed.category}.xml", feed.xml) for number, feed in enumerate(corpus)]
+    start_run("bench")
+    sizes = [len(batch.records) for batch in processing.parse_record_batches(xml_files)]
+    threshold = processing.BULK_LOAD_THRESHOLD
+    bulk_rows = sum(size for size in sizes if 0 < threshold <= size)
+    print(f"{feeds} files x {items} items, upsert batch {processing.UPSERT_BATCH_SIZE}, bulk threshold {threshold}")
+    print(f"{len(sizes)} batches, {sum(sizes)} records: {bulk_rows} bulk loaded, {sum(sizes) - bulk_rows} batched")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Batched upsert vs LOAD DATA bulk load benchmark")
+    arg_parser.add_argument("--rows", type=int, default=50000)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Client-side timings keep the best of this many")
+    arg_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Batch sizes of the threshold sweep")
+    arg_parser.add_argument("--no-mysql", action="store_true", help="Only measure the client side")
+    arg_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    arg_parser.add_argument("--output", help="Also write the result JSON to this path")
+    arg_parser.add_argument("--plan", action="store_true", help="Only show the batch routing (no database)")
+    arg_parser.add_argument("--feeds", type=int, default=80, help="Files in the --plan run")
+    arg_parser.add_argument("--items", type=int, default=50, help="Items per file in the --plan run")
+    args = arg_parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if args.plan:
+        plan(args.feeds, args.items, args.seed)
+        return
+
+    result = run_benchmark(args)
+    ok = compare_to_baseline(result, args.tolerance)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
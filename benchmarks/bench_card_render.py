@@ -0,0 +1,127 @@
+"""
+News card rendering micro-benchmark: the old per-row path against the
+precomputed columns + single template path used by the dashboard.
+
+The old path is reproduced as it was: clean_html recompiles its regex per
+call, every filtered row is rendered through iterrows() with strftime and a
+large f-string. The new path runs prepare_cards once at load time and then
+renders one page (--page-size cards) per rerun. The dashboard itself shows
+all cards on one page unless RSS_DASHBOARD_CARDS_PER_PAGE is set, which is
+what "render all rows" measures. Only HTML building is timed; Streamlit's
+own cost per st.markdown element comes on top of the old path once per card.
+
+Usage:
+    python benchmarks/bench_card_render.py --items 5000
+"""
+from typing import Callable, Dict
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import random
+import re
+import sys
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+from news_cards import CARDS_PER_PAGE, prepare_cards, render_cards  # noqa: E402
+
+WORDS = ["ממשלה", "כנסת", "ביטחון", "כלכלה", "ספורט", "בריאות", "תרבות", "מזג", "אוויר", "בחירות"]
+
+
+def make_items(count: int, seed: int) -> pd.DataFrame:
+    """Synthetic items shaped like the dashboard's items query."""
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    return pd.DataFrame({
+        "id": range(1, count + 1),
+        "source": [rng.choice(["ynet", "walla", "maariv", "mako", "haaretz"]) for _ in range(count)],
+        "category": [rng.choice(["news", "sport", "economy", "health"]) for _ in range(count)],
+        "title": [sentence(8) for _ in range(count)],
+        "link": [f"https://example.com/item/{i}" for i in range(count)],
+        "published_date": [started + timedelta(minutes=i) for i in range(count)],
+        "description": [f"<p>{sentence(60)}</p><img src='x.jpg'/>" for _ in range(count)],
+    })
+
+
+def legacy_clean_html(raw_html):
+    if not raw_html: return ""
+    cleanr = re.compile('<.*?>')
+    cleantext = re.sub(cleanr, '', raw_html)
+    return " ".join(cleantext.split())
+
+
+def legacy_render(df: pd.DataFrame, icon_for_source: Callable[[str], str]) -> str:
+    """The per-row card loop as the dashboard had it (one f-string per card)."""
+    cards = []
+    for i, (idx, row) in enumerate(df.iterrows()):
+        clean_description = legacy_clean_html(row['description'])
+        icon_html = icon_for_source(row['source'])
+        cards.append(f"""
+            <div class="news-card">
+                <div class="news-meta">
+                    <span class="source-tag">{icon_html} {row['source']}</span>
+                    <span>{row['category']} • {row['published_date'].strftime('%Y-%m-%d %H:%M:%S') if pd.notnull(row['published_date']) else ''}</span>
+                </div>
+                <div class="news-title">{row['title']}</div>
+                <div class="news-desc">{clean_description[:200]}...</div>
+                <a href="{row['link']}" target="_blank" class="read-more-link">קרא עוד ב-{row['source']} ←</a>
+            </div>
+        """)
+    return "".join(cards)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Fastest wall time of `repeat` calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="News card rendering micro-benchmark")
+    arg_parser.add_argument("--items", type=int, default=5000, help="Rows matching the filters")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--page-size", type=int, default=CARDS_PER_PAGE or 30, help="Cards per page")
+    args = arg_parser.parse_args()
+
+    df = make_items(args.items, args.seed)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    icon_for_source = lambda source: f'<span class="src-icon src-icon-{source}"></span>'  # noqa: E731
+
+    results: Dict[str, float] = {
+        "legacy: render all rows": best_of(args.repeat, lambda: legacy_render(df, icon_for_source)),
+        "legacy: render one page": best_of(
+            args.repeat, lambda: legacy_render(df.head(args.page_size), icon_for_source)
+        ),
+        "new: prepare_cards (load time)": best_of(args.repeat, lambda: prepare_cards(table)),
+    }
+    prepared = prepare_cards(table)
+    results["new: render one page"] = best_of(
+        args.repeat, lambda: render_cards(prepared.slice(0, args.page_size), icon_for_source)
+    )
+    results["new: render all rows"] = best_of(args.repeat, lambda: render_cards(prepared, icon_for_source))
+
+    print(f"{args.items} rows, {args.page_size} cards per page, best of {args.repeat}")
+    for name, seconds in results.items():
+        print(f"{name:<34} {seconds * 1000:10.2f} ms")
+    per_rerun_old = results["legacy: render all rows"]
+    per_rerun_new = results["new: render one page"]
+    print(f"{'per rerun speedup':<34} {per_rerun_old / per_rerun_new:10.1f}x")
+    print(f"{'same rows speedup (all rows)':<34} "
+          f"{per_rerun_old / results['new: render all rows']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
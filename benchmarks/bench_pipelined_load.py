@@ -0,0 +1,111 @@
+"""
+Overlapped load benchmark: sequential download → parse → upsert against the
+stage-queue pipeline used by run_processing.
+
+Objects come from moto with an added per-object latency (standing in for
+S3 round trips), and the upsert is replaced by a sleep per batch (standing
+in for MySQL latency), so the benchmark runs without a database. Parsing is
+the real parse_raw_items/clean_records. Normalization and the post-load
+steps are skipped. The pipelined wall time should approach the slowest
+stage, the sequential one the sum of all three.
+
+Usage:
+    python benchmarks/bench_pipelined_load.py --feeds 80 --items 50
+    python benchmarks/bench_pipelined_load.py --s3-latency-ms 40 --db-latency-ms 120
+"""
+from typing import Any, Callable, Dict
+from pathlib import Path
+from unittest import mock
+import argparse
+import logging
+import sys
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic_feeds import generate_corpus  # noqa: E402
+from run_benchmark import empty_bucket, local_s3  # noqa: E402
+from run_metrics import start_run  # noqa: E402
+from get_xml_upload_s3 import upload_to_s3  # noqa: E402
+import process_raw_data_s3 as processing  # noqa: E402
+
+BUCKET = processing.RAW_DATA_BUCKET
+
+
+def run_sequential(s3: Any) -> int:
+    """The previous run_processing: download everything, parse everything, then upsert."""
+    xml_files = processing.get_raw_data(s3, BUCKET)
+    with processing.current_run().stage("process_raw_data"):
+        records = processing.clean_records(processing.parse_raw_items(xml_files))
+    for start in range(0, len(records), processing.UPSERT_BATCH_SIZE):
+        processing.upsert_records(records[start:start + processing.UPSERT_BATCH_SIZE], engine=object())
+    return len(records)
+
+
+def run_pipelined(s3: Any) -> int:
+    return processing.run_processing(s3, engine=object())
+
+
+def timed(func: Callable[[Any], int], s3: Any) -> Dict[str, Any]:
+    run = start_run("bench")
+    started = time.perf_counter()
+    records = func(s3)
+    seconds = time.perf_counter() - started
+    stages = run.to_dict()["stages"]
+    return {
+        "seconds": seconds,
+        "records": records,
+        "stage_seconds": {name: stage["duration_seconds"] for name, stage in stages.items()},
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Sequential vs overlapped load benchmark")
+    arg_parser.add_argument("--feeds", type=int, default=80)
+    arg_parser.add_argument("--items", type=int, default=50)
+    arg_parser.add_argument("--s3-latency-ms", type=float, default=20, help="Added per downloaded object")
+    arg_parser.add_argument("--db-latency-ms", type=float, default=100, help="Per upsert batch")
+    arg_parser.add_argument("--s3-endpoint", default=None)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+    logging.disable(logging.INFO)
+
+    corpus = generate_corpus(args.feeds, args.items, seed=args.seed)
+
+    def slow_upsert(records, table_name=processing.TABLE_NAME, engine=None):
+        with processing.current_run().stage("upsert_to_mysql"):
+            time.sleep(args.db_latency_ms / 1000)
+        return []
+
+    with local_s3(args.s3_endpoint) as s3:
+        empty_bucket(s3, BUCKET)
+        for feed in corpus:
+            upload_to_s3(s3, BUCKET, f"{feed.source}_{feed.category}.xml", feed.xml)
+
+        real_get_object = s3.get_object
+
+        def slow_get_object(**kwargs):
+            time.sleep(args.s3_latency_ms / 1000)
+            return real_get_object(**kwargs)
+
+        with mock.patch.object(s3, "get_object", slow_get_object), \
+                mock.patch.object(processing, "upsert_records", slow_upsert), \
+                mock.patch.object(processing, "normalize_records", lambda records, engine: None), \
+                mock.patch.object(processing, "publish_load", lambda engine: None):
+            results = {"sequential": timed(run_sequential, s3), "pipelined": timed(run_pipelined, s3)}
+
+    print(f"{args.feeds} feeds x {args.items} items, batch {processing.UPSERT_BATCH_SIZE}, "
+          f"S3 +{args.s3_latency_ms:g} ms/object, DB {args.db_latency_ms:g} ms/batch")
+    for name, result in results.items():
+        stages = ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in result["stage_seconds"].items()
+            if stage in ("get_raw_data", "process_raw_data", "upsert_to_mysql")
+        )
+        print(f"{name:<11} {result['seconds']:7.2f}s  {result['records']} records  ({stages})")
+    print(f"{'speedup':<11} {results['sequential']['seconds'] / results['pipelined']['seconds']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Startup benchmark for the pipeline scripts, based on `python -X importtime`.
+
+Each module is imported in a fresh interpreter; the cumulative import time of
+the module and its heaviest direct dependencies are reported. With a stored baseline
+the run fails when a module got slower than the allowed tolerance, and it also
+fails when a module pulls in a package it must not load at import time.
+
+Usage:
+    python benchmarks/bench_startup.py                 # report + compare
+    python benchmarks/bench_startup.py --save-baseline # store current numbers
+"""
+from typing import Dict, List, Set, Tuple
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+# Modules started cold by the DAG / service
+MODULES = [
+    "get_xml_upload_s3",
+    "process_raw_data_s3",
+    "rss_pipeline",
+]
+
+# Packages that must stay out of module import (loaded lazily when used)
+FORBIDDEN_AT_IMPORT = ["pandas", "bs4", "lxml", "sqlalchemy", "dateutil", "pytz"]
+
+# Allowed slowdown against the baseline before the run fails
+DEFAULT_TOLERANCE = 0.25
+
+
+def measure_import(module: str) -> Tuple[int, Dict[str, int], Set[str]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module name importable from scripts/
+
+    Returns:
+        Tuple of (cumulative microseconds for the module,
+                  cumulative microseconds per direct dependency,
+                  top-level names of every package loaded)
+    """
+    python_path = os.pathsep.join(filter(None, [str(SCRIPTS_DIR), os.getenv("PYTHONPATH")]))
+    env = dict(os.environ, PYTHONPATH=python_path)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    module_total = 0
+    children: Dict[str, int] = {}
+    pending: Dict[str, int] = {}
+    loaded: Set[str] = set()
+    for line in completed.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        # Entries are printed after their own imports, indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        loaded.add(name.split(".")[0])
+        if depth == 1:
+            pending[name] = int(cumulative_us)
+        elif depth == 0:
+            if name == module:
+                module_total = int(cumulative_us)
+                children = pending
+            pending = {}
+    return module_total, children, loaded
+
+
+def run(repeat: int) -> Dict[str, Dict[str, object]]:
+    """
+    Measure every module, keeping the median of several runs.
+
+    Args:
+        repeat: Number of fresh interpreters per module
+
+    Returns:
+        Mapping of module -> {"median_us", "heaviest", "forbidden"}
+    """
+    results: Dict[str, Dict[str, object]] = {}
+    for module in MODULES:
+        totals: List[int] = []
+        children: Dict[str, int] = {}
+        loaded: Set[str] = set()
+        for _ in range(repeat):
+            total, children, loaded = measure_import(module)
+            totals.append(total)
+        heaviest = sorted(children.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        results[module] = {
+            "median_us": int(statistics.median(totals)),
+            "heaviest": heaviest,
+            "forbidden": [name for name in FORBIDDEN_AT_IMPORT if name in loaded],
+        }
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Pipeline startup benchmark")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    args = arg_parser.parse_args()
+
+    results = run(args.repeat)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+
+    failed = False
+    for module, result in results.items():
+        median_ms = result["median_us"] / 1000
+        line = f"{module:<24} {median_ms:8.1f} ms"
+        if module in baseline:
+            base_ms = baseline[module] / 1000
+            change = (median_ms - base_ms) / base_ms if base_ms else 0.0
+            line += f"  (baseline {base_ms:.1f} ms, {change:+.0%})"
+            if change > args.tolerance:
+                line += "  REGRESSION"
+                failed = True
+        if result["forbidden"]:
+            line += f"  eager imports: {', '.join(result['forbidden'])}"
+            failed = True
+        print(line)
+        for name, cumulative in result["heaviest"]:
+            print(f"    {name:<28} {cumulative / 1000:8.1f} ms")
+
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(
+            {module: result["median_us"] for module, result in results.items()}, indent=2
+        ) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Local HTTP server that serves synthetic feeds for offline benchmarks.
+"""
+from typing import Dict, Iterable, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from synthetic_feeds import SyntheticFeed
+
+
+def serve_feeds(corpus: Iterable[SyntheticFeed], port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve feeds from a background thread.
+
+    Args:
+        corpus: Feeds to serve, each at its own path
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        Tuple of (server, base URL); call server.shutdown() when done
+    """
+    documents: Dict[str, bytes] = {feed.path: feed.xml for feed in corpus}
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            body = documents.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="feed-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,237 @@
+"""
+End-to-end pipeline benchmark against local stand-ins.
+
+Synthetic feeds are served from a local HTTP server, S3 is replaced by moto
+(in-process) or any S3-compatible endpoint such as MinIO, and MySQL is the
+database configured through the usual DB_* variables. Fetch, S3 read, parse,
+upsert, normalize and tag linking are timed through run_metrics, and throughput is
+compared against a stored baseline.
+
+MySQL must have the db_init schema and procedures loaded (e.g. the mysql
+service from airflow/docker-compose.yaml). Point DB_NAME at a scratch
+database before using --reset-db: it empties the pipeline tables.
+
+Usage:
+    python benchmarks/run_benchmark.py --feeds 80 --items 50
+    python benchmarks/run_benchmark.py --no-mysql              # fetch + parse only
+    python benchmarks/run_benchmark.py --s3-endpoint http://localhost:9000
+    python benchmarks/run_benchmark.py --save-baseline
+"""
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+import argparse
+import json
+import os
+import sys
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+# All synthetic feeds share one local host: no per-host rate limit, and no
+# persisted host health state from (or for) real runs
+os.environ.setdefault("RSS_HOST_RATE_PER_SECOND", "0")
+os.environ.setdefault("RSS_HOST_HEALTH_TABLE", "")
+
+from synthetic_feeds import generate_corpus  # noqa: E402
+from feed_server import serve_feeds  # noqa: E402
+from rss_feeds import FEEDS, make_feed  # noqa: E402
+from run_metrics import start_run  # noqa: E402
+from get_xml_upload_s3 import RAW_DATA_BUCKET, get_rss_xml  # noqa: E402
+from process_raw_data_s3 import (  # noqa: E402
+    call_normalize_rss_data,
+    clean_records,
+    get_raw_data,
+    init_mysql_engine,
+    parse_raw_items,
+    upsert_records,
+)
+from tag_loader import link_item_tags  # noqa: E402
+from story_clusters import cluster_new_items  # noqa: E402
+from trending_tags import update_trending_tags  # noqa: E402
+
+BASELINE_PATH = BENCH_DIR / "baselines" / "pipeline.json"
+
+# Allowed throughput drop against the baseline before the run fails
+DEFAULT_TOLERANCE = 0.2
+
+# Tables emptied by --reset-db, children first
+PIPELINE_TABLES = [
+    "Trending_Tags", "Tag_Bucket_Counts", "Trending_State", "Story_LSH_Buckets", "Item_Clusters",
+    "Item_Tags", "RSS_Items", "RSS_Tags", "RSS_Sources", "processed_raw_items", "rss_raw_items",
+]
+
+
+@contextmanager
+def local_s3(endpoint_url: Optional[str]) -> Iterator[Any]:
+    """
+    Yield an S3 client backed by moto, or by an S3-compatible endpoint.
+
+    Args:
+        endpoint_url: Endpoint of e.g. MinIO; moto is used when omitted
+    """
+    import boto3
+
+    if endpoint_url:
+        yield boto3.client("s3", endpoint_url=endpoint_url, region_name="us-east-1")
+        return
+
+    from moto import mock_aws
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    with mock_aws():
+        yield boto3.client("s3", region_name="us-east-1")
+
+
+def empty_bucket(s3: Any, bucket: str) -> None:
+    """Create the bucket if needed and delete every object in it."""
+    try:
+        s3.create_bucket(Bucket=bucket)
+    except (s3.exceptions.BucketAlreadyOwnedByYou, s3.exceptions.BucketAlreadyExists):
+        pass
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket):
+        keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+        if keys:
+            s3.delete_objects(Bucket=bucket, Delete={"Objects": keys})
+
+
+def reset_database(engine: Any) -> None:
+    """Empty the pipeline tables so every run loads the same amount of new data."""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        for table in PIPELINE_TABLES:
+            conn.execute(text(f"TRUNCATE TABLE {table}"))
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run every pipeline stage once over a synthetic corpus.
+
+    Returns:
+        Dictionary with the parameters, the run report and per-stage throughput
+    """
+    corpus = generate_corpus(args.feeds, args.items, seed=args.seed)
+    server, base_url = serve_feeds(corpus)
+    feeds = {
+        f"{feed.source}.{feed.category}": make_feed(
+            f"{feed.source}.{feed.category}", feed.source, feed.category, f"{base_url}{feed.path}"
+        )
+        for feed in corpus
+    }
+
+    try:
+        with local_s3(args.s3_endpoint) as s3:
+            empty_bucket(s3, RAW_DATA_BUCKET)
+            run = start_run("benchmark")
+
+            with mock.patch.dict(FEEDS, feeds, clear=True):
+                get_rss_xml(s3)
+                xml_files = get_raw_data(s3, RAW_DATA_BUCKET)
+                with run.stage("process_raw_data"):
+                    records = clean_records(parse_raw_items(xml_files))
+
+            if not args.no_mysql:
+                engine = init_mysql_engine(echo=False)
+                try:
+                    if args.reset_db:
+                        reset_database(engine)
+                    upsert_records(records, engine=engine)
+                    call_normalize_rss_data(engine=engine)
+                    link_item_tags(records, engine)
+                    cluster_new_items(records, engine)
+                    update_trending_tags(engine)
+                finally:
+                    engine.dispose()
+
+            run.finish()
+            report = run.to_dict()
+    finally:
+        server.shutdown()
+
+    stages = report["stages"]
+    total_bytes = report["feeds"]["bytes"]
+
+    def per_second(amount: float, stage: str) -> Optional[float]:
+        seconds = stages.get(stage, {}).get("duration_seconds")
+        return round(amount / seconds, 2) if seconds else None
+
+    throughput = {
+        "fetch_feeds_per_s": per_second(len(corpus), "get_rss_xml"),
+        "fetch_mb_per_s": per_second(total_bytes / 1e6, "get_rss_xml"),
+        "s3_read_mb_per_s": per_second(total_bytes / 1e6, "get_raw_data"),
+        "parse_items_per_s": per_second(len(records), "process_raw_data"),
+        "upsert_rows_per_s": per_second(len(records), "upsert_to_mysql"),
+        "normalize_rows_per_s": per_second(len(records), "call_normalize_rss_data"),
+        "link_tags_rows_per_s": per_second(len(records), "link_item_tags"),
+    }
+    return {
+        "params": {"feeds": args.feeds, "items": args.items, "seed": args.seed},
+        "records": len(records),
+        "bytes": total_bytes,
+        "throughput": {key: value for key, value in throughput.items() if value is not None},
+        "stages": {name: stage["duration_seconds"] for name, stage in stages.items()},
+    }
+
+
+def compare_to_baseline(result: Dict[str, Any], tolerance: float) -> bool:
+    """
+    Print throughput next to the stored baseline.
+
+    Returns:
+        False when any metric dropped by more than the tolerance
+    """
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else None
+    if baseline and baseline["params"] != result["params"]:
+        print(f"Baseline was recorded with {baseline['params']}; not comparing")
+        baseline = None
+
+    ok = True
+    print(f"{result['records']} records, {result['bytes'] / 1e6:.1f} MB")
+    for key, value in result["throughput"].items():
+        line = f"{key:<24} {value:12.2f}"
+        base_value = (baseline or {}).get("throughput", {}).get(key)
+        if base_value:
+            change = (value - base_value) / base_value
+            line += f"  (baseline {base_value:.2f}, {change:+.0%})"
+            if change < -tolerance:
+                line += "  REGRESSION"
+                ok = False
+        print(line)
+    return ok
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    arg_parser.add_argument("--feeds", type=int, default=80)
+    arg_parser.add_argument("--items", type=int, default=50, help="Items per feed")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--s3-endpoint", default=os.getenv("BENCH_S3_ENDPOINT"))
+    arg_parser.add_argument("--no-mysql", action="store_true", help="Skip upsert and normalize")
+    arg_parser.add_argument("--reset-db", action="store_true", help="Empty pipeline tables first")
+    arg_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    arg_parser.add_argument("--output", help="Also write the result JSON to this path")
+    args = arg_parser.parse_args()
+
+    result = run_benchmark(args)
+    ok = compare_to_baseline(result, args.tolerance)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
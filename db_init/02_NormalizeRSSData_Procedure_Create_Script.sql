@@ -17,6 +17,8 @@ BEGIN
     -- Step 2: Insert Items
     -- ==========================================================
     -- Note: insert_date is filled automatically
+    -- Guids already in RSS_Items are skipped: after retention has purged a
+    -- raw row (and its processed marker) the same story may be fetched again
     INSERT INTO RSS_Items (raw_guid, source_id, title, link, published_date, description)
     SELECT 
         r.id,
@@ -29,40 +31,23 @@ BEGIN
     JOIN RSS_Sources s 
       ON r.source = s.source_name 
       AND r.category = s.feed_category
-    WHERE r.id NOT IN (SELECT raw_item_id FROM processed_raw_items);
+    LEFT JOIN RSS_Items existing ON existing.raw_guid = r.id
+    WHERE r.id NOT IN (SELECT raw_item_id FROM processed_raw_items)
+      AND existing.item_id IS NULL;
 
     -- ==========================================================
-    -- Step 3: Handle Tags (Robust Parsing)
+    -- Step 3: Queue Items for Tag Linking
     -- ==========================================================
-    -- A. Insert unique tags
-    INSERT IGNORE INTO RSS_Tags (tag_name)
-    SELECT DISTINCT JSON_UNQUOTE(j.tag_name)
-    FROM rss_raw_items r,
-    JSON_TABLE(
-        -- FIX: Unquote the input so MySQL sees an Array, not a String
-        JSON_UNQUOTE(r.tags), 
-        "$[*]" COLUMNS (tag_name VARCHAR(255) PATH "$")
-    ) j
-    WHERE r.tags IS NOT NULL 
-      AND JSON_LENGTH(JSON_UNQUOTE(r.tags)) > 0 -- Ensure we check the unquoted length
-      AND r.id NOT IN (SELECT raw_item_id FROM processed_raw_items);
-
-    -- B. Link Items to Tags
-    INSERT IGNORE INTO Item_Tags (item_id, tag_id)
-    SELECT DISTINCT
-        i.item_id,
-        t.tag_id
+    -- RSS_Tags and Item_Tags are filled by the Python loader
+    -- (scripts/tag_loader.py) after this procedure, so rss_raw_items.tags
+    -- is no longer expanded with JSON_TABLE here. The items are queued in
+    -- the same transaction that marks them processed; the loader removes
+    -- them only once their tags are linked, so a failed link is retried.
+    INSERT IGNORE INTO Item_Tag_Queue (item_id)
+    SELECT i.item_id
     FROM rss_raw_items r
-    JOIN RSS_Items i ON r.id = i.raw_guid
-    JOIN JSON_TABLE(
-        -- FIX: Unquote the input here too
-        JSON_UNQUOTE(r.tags), 
-        "$[*]" COLUMNS (tag_name VARCHAR(255) PATH "$")
-    ) j
-    JOIN RSS_Tags t ON JSON_UNQUOTE(j.tag_name) = t.tag_name
-    WHERE r.tags IS NOT NULL 
-      AND JSON_LENGTH(JSON_UNQUOTE(r.tags)) > 0
-      AND r.id NOT IN (SELECT raw_item_id FROM processed_raw_items);
+    JOIN RSS_Items i ON i.raw_guid = r.id
+    WHERE r.id NOT IN (SELECT raw_item_id FROM processed_raw_items);
 
     -- ==========================================================
     -- Step 4: Mark as Processed
@@ -9,6 +9,7 @@ BEGIN
     SELECT 
         s.source_name,
         s.feed_category,
+        i.item_id,
         i.title,
         i.link,
         i.published_date,
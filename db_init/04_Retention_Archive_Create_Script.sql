@@ -0,0 +1,46 @@
+USE rss_project;
+
+-- ==========================================================
+-- Retention support (used by scripts/retention.py)
+-- ==========================================================
+
+-- Lets retention find expired raw rows without a full table scan.
+-- MySQL has no ADD INDEX IF NOT EXISTS, so the index is only added when
+-- information_schema does not list it (the script can be re-applied).
+SET @has_inserted_at_index = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'rss_raw_items'
+      AND INDEX_NAME = 'idx_rss_raw_items_inserted_at'
+);
+SET @add_inserted_at_index = IF(
+    @has_inserted_at_index = 0,
+    'ALTER TABLE rss_raw_items ADD INDEX idx_rss_raw_items_inserted_at (inserted_at)',
+    'DO 0'
+);
+PREPARE add_inserted_at_index FROM @add_inserted_at_index;
+EXECUTE add_inserted_at_index;
+DEALLOCATE PREPARE add_inserted_at_index;
+
+-- Cold copy of normalized raw rows removed from rss_raw_items.
+-- Compressed row format; partitioned by archive month so old archive
+-- data is purged with a cheap DROP PARTITION. retention.py splits a
+-- monthly partition off pmax before archiving into a new month.
+-- (rss_raw_items itself cannot be range-partitioned by date: its primary
+-- key is the guid, which the loader's ON DUPLICATE KEY upsert relies on.)
+CREATE TABLE IF NOT EXISTS rss_raw_items_archive (
+    id VARCHAR(512) NOT NULL,
+    source VARCHAR(50),
+    category VARCHAR(255),
+    title VARCHAR(512),
+    link VARCHAR(2048),
+    published_date DATETIME,
+    description TEXT,
+    tags JSON,
+    inserted_at TIMESTAMP NULL,
+    archived_on DATE NOT NULL,
+    PRIMARY KEY (id, archived_on)
+) ROW_FORMAT=COMPRESSED
+PARTITION BY RANGE COLUMNS (archived_on) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
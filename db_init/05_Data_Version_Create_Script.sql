@@ -0,0 +1,16 @@
+USE rss_project;
+
+-- ==========================================================
+-- Data version published by the pipeline (scripts/data_version.py)
+-- ==========================================================
+-- Single row. `version` is bumped after each load that added RSS_Items,
+-- Item_Tags or Item_Clusters rows; `max_item_id` is the highest item_id
+-- visible at that point (the tag and cluster sequences are added by
+-- 10_Change_Sequences_Create_Script.sql). The dashboard polls this row and
+-- fetches only rows above its watermarks.
+CREATE TABLE IF NOT EXISTS RSS_Data_Version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    max_item_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,27 @@
+USE rss_project;
+
+-- ==========================================================
+-- Near-duplicate story clusters (scripts/story_clusters.py)
+-- ==========================================================
+-- One row per clustered item. cluster_id is the item_id of the first item
+-- of the story, so an item that starts a cluster points at itself.
+-- `signature` is the item's MinHash signature (64 x uint32, little-endian).
+CREATE TABLE IF NOT EXISTS Item_Clusters (
+    item_id INT PRIMARY KEY,
+    cluster_id INT NOT NULL,
+    signature VARBINARY(256),
+    insert_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_cluster_id (cluster_id),
+    FOREIGN KEY (item_id) REFERENCES RSS_Items(item_id)
+);
+
+-- LSH index: one row per (band bucket, item). Only items from the last
+-- STORY_CLUSTER_WINDOW_HOURS are kept, so lookups stay small.
+CREATE TABLE IF NOT EXISTS Story_LSH_Buckets (
+    bucket_key BIGINT NOT NULL,
+    item_id INT NOT NULL,
+    insert_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket_key, item_id),
+    KEY idx_insert_date (insert_date),
+    FOREIGN KEY (item_id) REFERENCES RSS_Items(item_id)
+);
@@ -0,0 +1,33 @@
+USE rss_project;
+
+-- ==========================================================
+-- Trending tags (scripts/trending_tags.py)
+-- ==========================================================
+-- Item counts per tag in fixed time buckets (by RSS_Items.insert_date).
+-- Only the buckets of the longest window are kept.
+CREATE TABLE IF NOT EXISTS Tag_Bucket_Counts (
+    bucket_start DATETIME NOT NULL,
+    tag_id INT NOT NULL,
+    item_count INT NOT NULL,
+    PRIMARY KEY (bucket_start, tag_id)
+);
+
+-- Highest Item_Tags.item_id already counted (superseded by max_link_id, the
+-- highest Item_Tags.link_id counted, added by 10_Change_Sequences_Create_Script.sql)
+CREATE TABLE IF NOT EXISTS Trending_State (
+    id TINYINT PRIMARY KEY,
+    max_item_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Top-k tags per window, rewritten after every update; readers take the
+-- first k rows of a window
+CREATE TABLE IF NOT EXISTS Trending_Tags (
+    window_hours SMALLINT NOT NULL,
+    tag_rank SMALLINT NOT NULL,
+    tag_id INT NOT NULL,
+    tag_name VARCHAR(255) NOT NULL,
+    item_count INT NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (window_hours, tag_rank)
+);
@@ -0,0 +1,22 @@
+USE rss_project;
+
+-- ==========================================================
+-- ETL run ledger (scripts/run_ledger.py)
+-- ==========================================================
+-- One row per unit of work (a feed, an S3 file, a rejected row) and run.
+-- A retried Airflow task gets the same run_id (AIRFLOW_CTX_DAG_RUN_ID)
+-- and skips the units already marked 'done'.
+-- Units (S3 keys can be up to 1024 bytes) are keyed by their SHA-256, so the
+-- primary key stays within InnoDB's 3072-byte limit in utf8mb4.
+CREATE TABLE IF NOT EXISTS etl_run_ledger (
+    run_id VARCHAR(250) NOT NULL,
+    stage VARCHAR(64) NOT NULL,
+    unit VARCHAR(1024) NOT NULL,
+    unit_hash BINARY(32) AS (UNHEX(SHA2(unit, 256))) STORED NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    attempts INT NOT NULL DEFAULT 1,
+    error VARCHAR(1024),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, stage, unit_hash),
+    KEY idx_updated_at (updated_at)
+);
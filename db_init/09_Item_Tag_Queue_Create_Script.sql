@@ -0,0 +1,11 @@
+USE rss_project;
+
+-- ==========================================================
+-- Items waiting for tag linking (scripts/tag_loader.py)
+-- ==========================================================
+-- Filled by NormalizeRSSData for every item it processes; a row is
+-- deleted in the transaction that links the item's tags.
+CREATE TABLE IF NOT EXISTS Item_Tag_Queue (
+    item_id INT PRIMARY KEY,
+    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
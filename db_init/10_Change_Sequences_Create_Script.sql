@@ -0,0 +1,69 @@
+USE rss_project;
+
+-- ==========================================================
+-- Insert sequences of Item_Tags and Item_Clusters
+-- ==========================================================
+-- Tags and clusters can be written after their item was first read (a
+-- queued tag link retried by a later run, a cluster assigned after the
+-- dashboard fetched the item), so readers cannot watermark them on
+-- item_id. Each row gets its own insert sequence instead:
+-- - Item_Tags.link_id and Item_Clusters.assign_id (AUTO_INCREMENT)
+-- - RSS_Data_Version.max_link_id / max_assign_id: the highest values the
+--   last published data version covers (scripts/data_version.py)
+-- - Trending_State.max_link_id: the highest link_id counted into the
+--   trending buckets (scripts/trending_tags.py)
+-- The columns are added only when missing, so the script can be re-applied.
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS AddColumnIfMissing$$
+
+CREATE PROCEDURE AddColumnIfMissing(
+    IN target_table VARCHAR(64),
+    IN target_column VARCHAR(64),
+    IN alter_spec TEXT
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = target_table
+          AND COLUMN_NAME = target_column
+    ) THEN
+        SET @alter_statement = CONCAT('ALTER TABLE ', target_table, ' ', alter_spec);
+        PREPARE alter_statement FROM @alter_statement;
+        EXECUTE alter_statement;
+        DEALLOCATE PREPARE alter_statement;
+    END IF;
+END$$
+
+DELIMITER ;
+
+CALL AddColumnIfMissing(
+    'Item_Tags', 'link_id',
+    'ADD COLUMN link_id BIGINT NOT NULL AUTO_INCREMENT, ADD UNIQUE KEY uq_item_tags_link_id (link_id)'
+);
+CALL AddColumnIfMissing(
+    'Item_Clusters', 'assign_id',
+    'ADD COLUMN assign_id BIGINT NOT NULL AUTO_INCREMENT, ADD UNIQUE KEY uq_item_clusters_assign_id (assign_id)'
+);
+CALL AddColumnIfMissing(
+    'RSS_Data_Version', 'max_link_id',
+    'ADD COLUMN max_link_id BIGINT NOT NULL DEFAULT 0'
+);
+CALL AddColumnIfMissing(
+    'RSS_Data_Version', 'max_assign_id',
+    'ADD COLUMN max_assign_id BIGINT NOT NULL DEFAULT 0'
+);
+
+CALL AddColumnIfMissing(
+    'Trending_State', 'max_link_id',
+    'ADD COLUMN max_link_id BIGINT NOT NULL DEFAULT 0'
+);
+
+-- Carry the old item_id watermark over, so the tags it already counted
+-- are not counted again
+UPDATE Trending_State ts
+SET ts.max_link_id = (SELECT COALESCE(MAX(it.link_id), 0) FROM Item_Tags it WHERE it.item_id <= ts.max_item_id)
+WHERE ts.max_link_id = 0 AND ts.max_item_id > 0;
+
+DROP PROCEDURE AddColumnIfMissing;
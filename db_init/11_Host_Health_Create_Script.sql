@@ -0,0 +1,18 @@
+USE rss_project;
+
+-- ==========================================================
+-- Feed host health (scripts/host_health.py)
+-- ==========================================================
+-- Circuit breaker and token bucket state per feed host, shared by every
+-- worker that fetches feeds. A process reads the table once and writes back
+-- the hosts it fetched from.
+CREATE TABLE IF NOT EXISTS Host_Health (
+    host VARCHAR(255) PRIMARY KEY,
+    state VARCHAR(16) NOT NULL,
+    failures INT NOT NULL DEFAULT 0,
+    opened_at DOUBLE NOT NULL DEFAULT 0,
+    open_seconds DOUBLE NOT NULL,
+    tokens DOUBLE NOT NULL,
+    refilled_at DOUBLE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
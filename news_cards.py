@@ -0,0 +1,100 @@
+"""
+רינדור כרטיסי החדשות של הדאשבורד.
+
+כל העבודה שלא תלויה בעמוד (ניקוי HTML, קיצור התיאור, פורמט התאריך,
+escaping) נעשית פעם אחת, על עמודות Arrow שלמות, כשהשורות נטענות.
+רינדור עמוד הוא רק מילוי תבנית אחת מוכנה מראש לכל כרטיס.
+(מודול נפרד כדי ש-benchmarks/bench_card_render.py יוכל לייבא אותו בלי Streamlit)
+"""
+import os
+import re
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# כמה תווים מהתיאור מוצגים בכרטיס
+DESCRIPTION_PREVIEW_CHARS = 200
+
+# כמה כרטיסים בכל עמוד (RSS_DASHBOARD_CARDS_PER_PAGE). ברירת המחדל 0 - כל הכרטיסים
+# בעמוד אחד, כמו שהדאשבורד הציג תמיד; ערך חיובי מוסיף בורר עמודים
+CARDS_PER_PAGE = int(os.getenv("RSS_DASHBOARD_CARDS_PER_PAGE", 0))
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# מקומפל פעם אחת (ולא בכל קריאה)
+HTML_TAG_RE = re.compile('<.*?>')
+
+# תבנית כרטיס בשורה אחת: בלי הזחות ובלי שורות ריקות, כדי שכל העמוד
+# יהיה בלוק HTML אחד ב-markdown
+CARD_TEMPLATE = (
+    '<div class="news-card">'
+    '<div class="news-meta">'
+    '<span class="source-tag">{icon} {source}</span>'
+    '<span>{category} • {date}</span>'
+    '</div>'
+    '<div class="news-title">{title}</div>'
+    '<div class="news-desc">{description}...</div>'
+    '<a href="{link}" target="_blank" class="read-more-link">קרא עוד ב-{source} ←</a>'
+    '</div>'
+).format
+
+# עמודות שמחושבות בטעינה: עמודת מקור -> עמודת תצוגה
+ESCAPED_COLUMNS = {
+    "source": "card_source",
+    "category": "card_category",
+    "title": "card_title",
+    "link": "card_link",
+}
+
+
+def clean_html(raw_html):
+    """מסיר תגיות HTML ומצמצם רווחים (לערך בודד)."""
+    if not raw_html: return ""
+    return " ".join(HTML_TAG_RE.sub('', raw_html).split())
+
+
+def escape_html(column):
+    """html.escape על עמודה שלמה (null הופך למחרוזת ריקה)."""
+    column = pc.fill_null(column, "")
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        column = pc.replace_substring(column, char, entity)
+    return column
+
+
+def prepare_cards(items: pa.Table) -> pa.Table:
+    """
+    מוסיף לטבלת הכתבות את עמודות התצוגה של הכרטיס (card_*).
+    נקרא פעם אחת על כל קבוצת שורות חדשה, לא בכל רינדור.
+    """
+    # ניקוי HTML + צמצום רווחים (כולל רווחי Unicode, כמו str.split) + קיצור
+    description = pc.replace_substring_regex(pc.fill_null(items["description"], ""), "<.*?>", "")
+    description = pc.utf8_trim_whitespace(pc.replace_substring_regex(description, r"[\s\pZ]+", " "))
+    description = pc.utf8_slice_codeunits(description, 0, DESCRIPTION_PREVIEW_CHARS)
+
+    # חיתוך לשניות, אחרת %S מודפס עם חלקי שנייה
+    seconds = pc.cast(items["published_date"], options=pc.CastOptions(pa.timestamp("s"), allow_time_truncate=True))
+    date_text = pc.fill_null(pc.strftime(seconds, format=DATE_FORMAT), "")
+
+    for column, card_column in ESCAPED_COLUMNS.items():
+        items = items.append_column(card_column, escape_html(items[column]))
+    items = items.append_column("card_description", escape_html(description))
+    return items.append_column("card_date", date_text)
+
+
+def render_cards(page: pa.Table, icon_for_source) -> str:
+    """
+    מרנדר עמוד כרטיסים ל-HTML אחד.
+
+    Args:
+        page: שורות העמוד (אחרי prepare_cards)
+        icon_for_source: פונקציה שמחזירה את ה-HTML של האייקון לפי שם המקור
+    """
+    columns = [
+        page[name].to_pylist()
+        for name in ("source", "card_source", "card_category", "card_date",
+                     "card_title", "card_description", "card_link")
+    ]
+    return "\n".join(
+        CARD_TEMPLATE(icon=icon_for_source(source), source=source_html, category=category,
+                      date=date, title=title, description=description, link=link)
+        for source, source_html, category, date, title, description, link in zip(*columns)
+    )
@@ -0,0 +1,78 @@
+"""
+Compression for raw feed archive objects in S3.
+
+Objects keep their .xml keys; the codec is recorded in the object's
+Content-Encoding so readers can decompress transparently. zstd needs the
+optional `zstandard` package.
+"""
+from typing import BinaryIO, Optional
+import gzip
+import os
+
+# Codec for new archive objects: "none", "gzip" or "zstd"
+ARCHIVE_COMPRESSION = os.getenv("RSS_ARCHIVE_COMPRESSION", "none").lower()
+
+SUPPORTED_ENCODINGS = ("none", "gzip", "zstd")
+
+# gzip level 6 is the usual size/speed balance; zstd 3 is its default
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _zstandard():
+    """Import zstandard, with a clear error when it is not installed."""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd archive compression requires the 'zstandard' package") from e
+    return zstandard
+
+
+def compress(data: bytes, encoding: str = ARCHIVE_COMPRESSION) -> bytes:
+    """
+    Compress an archive object body.
+
+    Args:
+        data: Raw XML bytes
+        encoding: "none", "gzip" or "zstd"
+
+    Returns:
+        Compressed bytes (the input itself for "none")
+    """
+    if encoding == "none":
+        return data
+    if encoding == "gzip":
+        # mtime=0 keeps identical feeds byte-identical across uploads
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported archive compression: {encoding}")
+
+
+def content_encoding_header(encoding: str = ARCHIVE_COMPRESSION) -> Optional[str]:
+    """Return the Content-Encoding value to store, or None for uncompressed objects."""
+    return None if encoding == "none" else encoding
+
+
+def open_decompressed(stream: BinaryIO, content_encoding: Optional[str]) -> BinaryIO:
+    """
+    Wrap a byte stream so reads return decompressed data.
+
+    Decompression happens chunk by chunk while reading, so the compressed
+    body is never held in memory as a whole.
+
+    Args:
+        stream: Readable binary stream (e.g. a boto3 StreamingBody)
+        content_encoding: The object's Content-Encoding (None for plain objects)
+
+    Returns:
+        Readable binary stream of decompressed bytes
+    """
+    encoding = (content_encoding or "none").lower()
+    if encoding in ("none", "identity"):
+        return stream
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if encoding == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(stream)
+    raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
@@ -0,0 +1,272 @@
+"""
+Materialized read snapshot for the Streamlit dashboard.
+
+After each normalize run the pipeline exports the dashboard's queries
+(items with source/category, item tags, story cluster assignments and the
+trending tags top-k) to uncompressed Arrow IPC files under RSS_SNAPSHOT_DIR.
+The dashboard never queries the MySQL instance the ETL writes to, and
+memory-maps the files instead of copying them into each server process.
+
+The export is incremental. A snapshot is a list of segments; each refresh
+reads only the rows above the previous snapshot's watermarks (item_id,
+Item_Tags.link_id, Item_Clusters.assign_id) and adds them as a new segment,
+so the cost of a refresh follows the new rows, not the archive. The files of
+earlier segments are hard-linked into the new version directory. Once there
+are more than SNAPSHOT_MAX_SEGMENTS segments they are merged locally into one
+(no database reads).
+
+Each export goes to a new version directory, described by its manifest.json;
+the CURRENT file is then swapped with os.replace, so readers always see a
+complete set of files.
+"""
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import shutil
+from utils import get_logger
+from run_metrics import current_run
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_Snapshot")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Snapshot root shared with the dashboard (which defaults to the same
+# directory); set RSS_SNAPSHOT_DIR="" to turn snapshots off
+SNAPSHOT_DIR = os.getenv("RSS_SNAPSHOT_DIR", str(Path(__file__).resolve().parent.parent / "snapshots"))
+
+# Version directories kept, so a reader that just resolved CURRENT can finish
+SNAPSHOT_KEEP = int(os.getenv("RSS_SNAPSHOT_KEEP", 3))
+
+# Segments kept before they are merged into one
+SNAPSHOT_MAX_SEGMENTS = int(os.getenv("RSS_SNAPSHOT_MAX_SEGMENTS", 32))
+
+POINTER_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+TRENDING_FILE = "trending.arrow"
+
+# Segment files are "<table>-<segment>.arrow"
+SEGMENT_TABLES = ("items", "tags", "clusters")
+
+ITEMS_QUERY = """
+    SELECT
+        ri.item_id AS id,
+        rs.source_name AS source,
+        rs.feed_category AS category,
+        ri.title,
+        ri.link,
+        ri.published_date,
+        ri.description,
+        COALESCE(ic.cluster_id, ri.item_id) AS cluster_id
+    FROM RSS_Items ri
+    JOIN RSS_Sources rs ON ri.source_id = rs.source_id
+    LEFT JOIN Item_Clusters ic ON ic.item_id = ri.item_id
+    WHERE ri.item_id > :max_item_id
+    ORDER BY ri.published_date DESC
+"""
+
+TAGS_QUERY = """
+    SELECT
+        it.item_id,
+        rt.tag_name,
+        it.link_id
+    FROM Item_Tags it
+    JOIN RSS_Tags rt ON it.tag_id = rt.tag_id
+    WHERE it.link_id > :max_link_id
+"""
+
+CLUSTERS_QUERY = """
+    SELECT
+        item_id,
+        cluster_id,
+        assign_id
+    FROM Item_Clusters
+    WHERE assign_id > :max_assign_id
+"""
+
+TRENDING_QUERY = """
+    SELECT
+        window_hours,
+        tag_rank,
+        tag_name,
+        item_count
+    FROM Trending_Tags
+    ORDER BY window_hours, tag_rank
+"""
+
+# Manifest watermark -> (segment table, column)
+WATERMARKS = {
+    "max_item_id": ("items", "id"),
+    "max_link_id": ("tags", "link_id"),
+    "max_assign_id": ("clusters", "assign_id"),
+}
+
+
+def _schemas() -> Dict[str, "pa.Schema"]:
+    import pyarrow as pa
+
+    return {
+        "items": pa.schema([
+            ("id", pa.int64()),
+            ("source", pa.string()),
+            ("category", pa.string()),
+            ("title", pa.string()),
+            ("link", pa.string()),
+            ("published_date", pa.timestamp("us")),
+            ("description", pa.string()),
+            ("cluster_id", pa.int64()),
+        ]),
+        "tags": pa.schema([("item_id", pa.int64()), ("tag_name", pa.string()), ("link_id", pa.int64())]),
+        "clusters": pa.schema([("item_id", pa.int64()), ("cluster_id", pa.int64()), ("assign_id", pa.int64())]),
+        "trending": pa.schema([
+            ("window_hours", pa.int64()),
+            ("tag_rank", pa.int64()),
+            ("tag_name", pa.string()),
+            ("item_count", pa.int64()),
+        ]),
+    }
+
+
+def _version_dirs(root: Path) -> List[Path]:
+    """Return completed version directories, oldest first."""
+    return sorted(path for path in root.iterdir() if path.is_dir() and path.name[0].isdigit())
+
+
+def _segment_file(table: str, segment: str) -> str:
+    return f"{table}-{segment}.arrow"
+
+
+def current_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[Path]:
+    """Return the directory CURRENT points to, or None if there is no snapshot."""
+    if not snapshot_dir:
+        return None
+    pointer = Path(snapshot_dir) / POINTER_FILE
+    if not pointer.exists():
+        return None
+    return Path(snapshot_dir) / pointer.read_text().strip()
+
+
+def read_manifest(snapshot: Optional[Path]) -> Optional[Dict[str, Any]]:
+    """Return a snapshot's manifest, or None (no snapshot, or an older full-export layout)."""
+    if snapshot is None or not (snapshot / MANIFEST_FILE).exists():
+        return None
+    return json.loads((snapshot / MANIFEST_FILE).read_text())
+
+
+def _read_table(path: Path) -> "pa.Table":
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def _write_table(table: "pa.Table", path: Path) -> None:
+    import pyarrow as pa
+
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def refresh_snapshot(engine: "Engine", snapshot_dir: str = SNAPSHOT_DIR) -> Optional[Path]:
+    """
+    Export the rows added since the current snapshot as a new segment and
+    make the result current.
+
+    The first export (or one after an older full-export snapshot) reads
+    everything.
+
+    Args:
+        engine: SQLAlchemy engine of the primary database
+        snapshot_dir: Snapshot root (no-op when empty)
+
+    Returns:
+        Path of the new snapshot directory, or None when snapshots are off
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from sqlalchemy import text
+
+    if not snapshot_dir:
+        return None
+
+    schemas = _schemas()
+    root = Path(snapshot_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = current_snapshot(snapshot_dir)
+    manifest = read_manifest(previous) or {"segments": [], **{mark: 0 for mark in WATERMARKS}}
+    version = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    staging = root / f".tmp-{version}"
+
+    with current_run().stage("refresh_snapshot"):
+        # The reads run in one REPEATABLE READ transaction, so tags match items
+        params = {mark: manifest[mark] for mark in WATERMARKS}
+        new: Dict[str, "pa.Table"] = {}
+        with engine.begin() as conn:
+            for table, query in (("items", ITEMS_QUERY), ("tags", TAGS_QUERY), ("clusters", CLUSTERS_QUERY)):
+                new[table] = pa.Table.from_pylist(
+                    [dict(row) for row in conn.execute(text(query), params).mappings()], schema=schemas[table]
+                )
+            trending = pa.Table.from_pylist(
+                [dict(row) for row in conn.execute(text(TRENDING_QUERY)).mappings()], schema=schemas["trending"]
+            )
+
+        for mark, (table, column) in WATERMARKS.items():
+            if new[table].num_rows:
+                manifest[mark] = max(manifest[mark], pc.max(new[table][column]).as_py())
+
+        segments = list(manifest["segments"])
+        next_segment = f"{int(segments[-1]) + 1 if segments else 1:06d}"
+        staging.mkdir()
+        if len(segments) >= SNAPSHOT_MAX_SEGMENTS:
+            # Merge every segment and the new rows into one, from the local files
+            for table in SEGMENT_TABLES:
+                parts = [_read_table(previous / _segment_file(table, segment)) for segment in segments]
+                _write_table(
+                    pa.concat_tables(parts + [new[table]]).combine_chunks(),
+                    staging / _segment_file(table, next_segment)
+                )
+            logger.info(f"Merged {len(segments)} snapshot segments into segment {next_segment}")
+            segments = [next_segment]
+        else:
+            for segment in segments:
+                for table in SEGMENT_TABLES:
+                    _link_or_copy(previous / _segment_file(table, segment), staging / _segment_file(table, segment))
+            if any(new[table].num_rows for table in SEGMENT_TABLES):
+                for table in SEGMENT_TABLES:
+                    _write_table(new[table], staging / _segment_file(table, next_segment))
+                segments.append(next_segment)
+        _write_table(trending, staging / TRENDING_FILE)
+
+        manifest["segments"] = segments
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        staging.rename(root / version)
+
+        pointer_tmp = root / f".{POINTER_FILE}.tmp"
+        pointer_tmp.write_text(version)
+        os.replace(pointer_tmp, root / POINTER_FILE)
+
+        for old in _version_dirs(root)[:-SNAPSHOT_KEEP]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    current_run().add(
+        "refresh_snapshot", items=new["items"].num_rows, tags=new["tags"].num_rows, segments=len(segments)
+    )
+    logger.info(
+        f"Dashboard snapshot {version}: {new['items'].num_rows} new items, "
+        f"{new['tags'].num_rows} new tags, {len(segments)} segments"
+    )
+    return root / version
@@ -0,0 +1,62 @@
+"""
+Monotonic data version of the normalized tables.
+
+The pipeline bumps RSS_Data_Version after NormalizeRSSData, tag linking and
+clustering have committed, whenever one of them added rows. Readers (the
+dashboard, the news API) poll the single row and fetch only rows above the
+watermarks they already hold: items by item_id, tag links by Item_Tags.link_id
+and cluster assignments by Item_Clusters.assign_id.
+"""
+from typing import TYPE_CHECKING
+from utils import get_logger
+from run_metrics import current_run
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_Data_Version")
+
+VERSION_TABLE = "RSS_Data_Version"
+
+
+def publish_data_version(engine: "Engine") -> int:
+    """
+    Bump the data version if RSS_Items, Item_Tags or Item_Clusters grew
+    since the last publish.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        The current data version
+    """
+    from sqlalchemy import text
+
+    with current_run().stage("publish_data_version"), engine.begin() as conn:
+        marks = conn.execute(
+            text(
+                "SELECT "
+                "(SELECT COALESCE(MAX(item_id), 0) FROM RSS_Items) AS max_item_id, "
+                "(SELECT COALESCE(MAX(link_id), 0) FROM Item_Tags) AS max_link_id, "
+                "(SELECT COALESCE(MAX(assign_id), 0) FROM Item_Clusters) AS max_assign_id"
+            )
+        ).mappings().one()
+        # `version` is assigned before the marks, so the IF sees the previous values
+        conn.execute(
+            text(
+                f"INSERT INTO {VERSION_TABLE} (id, version, max_item_id, max_link_id, max_assign_id) "
+                f"VALUES (1, 1, :max_item_id, :max_link_id, :max_assign_id) "
+                f"ON DUPLICATE KEY UPDATE "
+                f"version = IF(max_item_id = :max_item_id AND max_link_id = :max_link_id "
+                f"AND max_assign_id = :max_assign_id, version, version + 1), "
+                f"max_item_id = :max_item_id, max_link_id = :max_link_id, max_assign_id = :max_assign_id"
+            ),
+            dict(marks)
+        )
+        version = conn.execute(text(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")).scalar()
+
+    logger.info(
+        f"Data version {version} (max item_id {marks['max_item_id']}, "
+        f"link_id {marks['max_link_id']}, assign_id {marks['max_assign_id']})"
+    )
+    return int(version)
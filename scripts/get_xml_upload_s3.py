@@ -1,16 +1,27 @@
 """
 Fetch RSS feeds and upload XML data to S3 buckets.
+
+Feeds are downloaded in chunks and fed to an incremental XML parser as they
+arrive, with caps on document size and item count. lxml and requests are
+imported where they are used, so importing this module (e.g. from the
+combined pipeline or the ingestion service) stays cheap.
 """
-from typing import Tuple, Optional
-from bs4 import BeautifulSoup
-from datetime import datetime
-from urllib.parse import urlparse
-import boto3
-import requests
-from utils import setup_logging, get_logger, init_s3_client, clean_for_filename
-from rss_feeds import RSS_FEEDS
-
-setup_logging()
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Optional, TYPE_CHECKING
+import argparse
+import os
+import time
+from utils import setup_logging, get_logger, init_s3_client
+from rss_feeds import FEEDS, Feed, shard_feeds, shard_hosts
+from run_metrics import current_run, start_run, finish_run
+from log_queue import attach_log_shipping, finish_logging, start_queued_logging
+from profiling import PROFILE_MODE, PROFILE_MODES, finish_profiling, start_profiling
+from archive_codec import ARCHIVE_COMPRESSION, compress, content_encoding_header
+from host_health import host_health, host_of
+from run_ledger import DONE, FAILED, RunLedger, open_ledger
+
+if TYPE_CHECKING:
+    import boto3
+
 logger = get_logger("RSS_Extractor")
 
 
@@ -22,6 +33,24 @@ RAW_DATA_BUCKET = "rss-raw-data-test"
 # Request configuration
 REQUEST_TIMEOUT = 30  # seconds
 
+# Streaming download: bytes read per chunk, and the caps at which a feed is
+# cut short (the items completed so far are kept)
+FEED_CHUNK_SIZE = 64 * 1024
+MAX_FEED_BYTES = int(os.getenv("RSS_MAX_FEED_BYTES", 10 * 1024 * 1024))
+MAX_FEED_ITEMS = int(os.getenv("RSS_MAX_FEED_ITEMS", 500))
+
+# A failed feed is retried in-process this many times, waiting
+# FEED_RETRY_DELAY * 2**n seconds before retry n, unless its host circuit opens
+FEED_RETRIES = int(os.getenv("RSS_FEED_RETRIES", 2))
+FEED_RETRY_DELAY = float(os.getenv("RSS_FEED_RETRY_DELAY", 2.0))
+
+
+class FeedDocument(NamedTuple):
+    """A fetched feed, parsed while it was downloaded."""
+    xml: bytes          # Serialized document, at most MAX_FEED_ITEMS items
+    items: int          # Items kept
+    truncated: bool     # Whether a cap cut the feed short
+
 
 # ============================================================================
 # S3 Client Initialization
@@ -33,11 +62,13 @@ REQUEST_TIMEOUT = 30  # seconds
 # S3 Upload Operations
 # ============================================================================
 def upload_to_s3(
-    s3: boto3.client,
+    s3: "boto3.client",
     bucket_name: str,
     filename: str,
     xml_data: bytes,
-    content_type: str = "application/xml"
+    content_type: str = "application/xml",
+    compression: str = ARCHIVE_COMPRESSION,
+    metadata: Optional[Dict[str, str]] = None
 ) -> None:
     """
     Upload XML data to S3 bucket.
@@ -48,6 +79,9 @@ def upload_to_s3(
         filename: Object key (filename) in S3
         xml_data: XML data as bytes
         content_type: Content type for the object
+        compression: Archive codec ("none", "gzip" or "zstd"); recorded as
+            the object's Content-Encoding
+        metadata: S3 user metadata (ASCII values only), e.g. the feed id
     """
     if not xml_data:
         logger.warning(f"No data to upload for file: {filename}")
@@ -69,180 +103,302 @@ def upload_to_s3(
         filename = filename.replace("/", "-").replace("\\", "-")
     
     try:
+        body = compress(xml_data, compression)
+        extra_args = {}
+        content_encoding = content_encoding_header(compression)
+        if content_encoding:
+            extra_args["ContentEncoding"] = content_encoding
+        if metadata:
+            extra_args["Metadata"] = metadata
         s3.put_object(
             Bucket=bucket_name,
             Key=filename,
-            Body=xml_data,
-            ContentType=content_type
+            Body=body,
+            ContentType=content_type,
+            **extra_args
         )
+        current_run().add("upload_to_s3", objects=1, bytes=len(body), raw_bytes=len(xml_data))
         logger.info(f"Uploaded {filename} to {bucket_name}/{filename}")
     except Exception as e:
+        current_run().add("upload_to_s3", errors=1)
         logger.error(f"Error uploading {filename}: {e}")
         raise
 
 
 # ============================================================================
-# Text Processing
+# RSS Parsing
 # ============================================================================
-# Using shared clean_for_filename from utils
+def _local_name(tag: Any) -> str:
+    """Element name without its namespace ("" for comments and PIs)."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
 
 
-# ============================================================================
-# RSS Parsing
-# ============================================================================
-def extract_source_and_category(soup: BeautifulSoup, category: str) -> Tuple[str, str]:
+def _feed_items(root: Any) -> List[Any]:
     """
-    Extract source and category from RSS feed.
+    Return the feed's <item> elements: children of <channel> (RSS 2.0) or of
+    the root (RSS 1.0/RDF, where items are siblings of the channel).
+    """
+    items = [child for child in root if _local_name(child.tag) == "item"]
+    for child in root:
+        if _local_name(child.tag) == "channel":
+            items.extend(item for item in child if _local_name(item.tag) == "item")
+            break
+    return items
+
+
+def read_feed_stream(chunks: Iterable[bytes], url: str = "") -> Optional[FeedDocument]:
+    """
+    Incrementally parse a feed from byte chunks as they arrive.
+    
+    Stops reading once more than MAX_FEED_BYTES bytes or MAX_FEED_ITEMS
+    <item> elements have been received; the element being parsed at that
+    point is dropped, so the kept document is well-formed. Items are counted
+    under <channel> (RSS 2.0) and under the root (RSS 1.0/RDF).
     
     Args:
-        soup: BeautifulSoup object of the RSS feed
+        chunks: Body chunks in download order
+        url: Feed URL (for log messages)
         
     Returns:
-        Tuple of (source, category) as cleaned filenames
+        FeedDocument, or None if nothing usable was received
     """
-
-    feed_url = None
-    channel = soup.find("channel")
-    if not channel:
-        return "unknown", "unknown"
-    
-    atom_link = channel.find("atom:link", {"rel": "self"})
-    if atom_link and atom_link.get("href"):
-        feed_url = atom_link["href"]
-
-    # Fallback: regular <link>
-    if not feed_url:
-        link_elem = channel.find("link")
-        if link_elem and link_elem.text:
-            feed_url = link_elem.text.strip()
-
-    parsed = urlparse(feed_url or "")
-    netloc = parsed.netloc.lower().replace("www.", "")
-
-    # ----------------------
-    # 2. Detect source
-    # ----------------------
-    domain_map = {
-        "ynet.co.il": "ynet",
-        "maariv.co.il": "maariv",
-        "walla.co.il": "walla",
-        "mako.co.il": "mako",
-        "haaretz.co.il": "haaretz",
-    }
-
-    source = next(
-        (v for k, v in domain_map.items() if k in netloc),
-        None
+    from lxml import etree
+
+    # Items are counted from the parser's end events as they arrive. After
+    # repairing a malformed document libxml2 stops reporting events until
+    # close(), so for such feeds only the byte cap applies while reading and
+    # the item cap afterwards.
+    parser = etree.XMLPullParser(
+        events=("start", "end"), recover=True, resolve_entities=False, no_network=True
     )
+    # Elements started but not ended yet, outermost first
+    open_elements: List[Any] = []
+    received = 0
+    item_count = 0
+    truncated = False
+
+    for chunk in chunks:
+        received += len(chunk)
+        if received > MAX_FEED_BYTES:
+            logger.warning(f"Feed {url} exceeds {MAX_FEED_BYTES} bytes, keeping the items received so far")
+            truncated = True
+            break
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                open_elements.append(elem)
+                continue
+            open_elements.pop()
+            # An item directly under the root (RDF) or under the root's channel
+            if _local_name(elem.tag) == "item" and (
+                len(open_elements) == 1
+                or (len(open_elements) == 2 and _local_name(open_elements[1].tag) == "channel")
+            ):
+                item_count += 1
+        if MAX_FEED_ITEMS and item_count > MAX_FEED_ITEMS:
+            truncated = True
+            break
+
+    # The element being parsed when reading stopped may be incomplete: the
+    # open child of the item container (the channel, or the root for RDF)
+    partial = None
+    if truncated and len(open_elements) > 1:
+        depth = 2 if _local_name(open_elements[1].tag) == "channel" else 1
+        if len(open_elements) > depth:
+            partial = open_elements[depth]
+
+    # In recover mode close() also ends the elements left open by an early stop
+    try:
+        root = parser.close()
+    except etree.XMLSyntaxError as e:
+        logger.error(f"Error parsing RSS feed from {url}: {e}")
+        return None
 
-    if not source and netloc:
-        source = netloc.split(".")[0]
-    if not source:
-        source = "unknown"
+    items = 0
+    if root is not None:
+        if partial is not None and partial.getparent() is not None:
+            partial.getparent().remove(partial)
+        item_elements = _feed_items(root)
+        if MAX_FEED_ITEMS and len(item_elements) > MAX_FEED_ITEMS:
+            truncated = True
+            for extra in item_elements[MAX_FEED_ITEMS:]:
+                extra.getparent().remove(extra)
+        items = min(len(item_elements), MAX_FEED_ITEMS or len(item_elements))
+    if truncated and not items:
+        logger.error(f"No complete items received from {url} before the cap")
+        return None
 
-    # ----------------------
-    # 3. Resolve category
-    # ----------------------
-    title_elem = channel.find("title")
-    title = (title_elem.text or "").strip() if title_elem else ""
+    if root is None:
+        logger.error(f"Empty RSS feed from {url}")
+        return None
 
-    if category:
-        category_value = category
-    elif title:
-        lowered = title.lower()
+    xml_data = etree.tostring(root, xml_declaration=True, encoding="utf-8")
+    return FeedDocument(xml_data, items, truncated)
 
-        # remove source prefix if exists
-        if lowered.startswith(source):
-            title = title[len(source):].lstrip(" -|:")
 
-        category_value = title
-    else:
-        category_value = "unknown"
+class FeedFetchError(Exception):
+    """A feed could not be fetched or parsed."""
 
-    source_clean = clean_for_filename(source)
-    category_clean = clean_for_filename(category_value)
-    
-    # Log warning if cleaning resulted in "unknown" to help debug
-    if source_clean == "unknown" and source != "unknown":
-        logger.warning(f"Source '{source}' was cleaned to 'unknown'")
-    if category_clean == "unknown" and category_value != "unknown":
-        logger.warning(f"Category '{category_value}' was cleaned to 'unknown'")
-    
-    return (source_clean, category_clean)
+    def __init__(self, message: str, host_failure: bool, retryable: bool):
+        super().__init__(message)
+        # Whether the host itself failed (connection error, timeout, 5xx);
+        # only those count towards its circuit breaker
+        self.host_failure = host_failure
+        # Whether another attempt may succeed (not for 4xx or a broken document)
+        self.retryable = retryable
 
 
-def parse_rss_feed(url: str) -> Optional[BeautifulSoup]:
+def parse_rss_feed(url: str) -> FeedDocument:
     """
-    Fetch and parse RSS feed from URL.
+    Fetch and parse RSS feed from URL, streaming the body into the parser.
     
     Args:
         url: RSS feed URL
         
     Returns:
-        BeautifulSoup object of the parsed XML or None if failed
+        FeedDocument
+        
+    Raises:
+        FeedFetchError: The feed could not be fetched or parsed
     """
-    try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        if not response.encoding:
-            response.encoding = response.apparent_encoding or "utf-8"
-
-        # Use raw bytes so BeautifulSoup can honor XML-declared encoding
-        xml_bytes = response.content
-        soup = BeautifulSoup(xml_bytes, "xml")
+    import requests
 
-        return soup
+    try:
+        with requests.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            # The parser honors the XML-declared encoding of the raw bytes
+            document = read_feed_stream(response.iter_content(FEED_CHUNK_SIZE), url)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError) as e:
+        logger.error(f"Failed to fetch RSS feed from {url}: {e}")
+        raise FeedFetchError(str(e), host_failure=True, retryable=True) from e
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"Failed to fetch RSS feed from {url}: {e}")
+        status = e.response.status_code if e.response is not None else 0
+        raise FeedFetchError(
+            str(e), host_failure=status >= 500, retryable=status >= 500 or status in (408, 429)
+        ) from e
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch RSS feed from {url}: {e}")
-        return None
+        raise FeedFetchError(str(e), host_failure=False, retryable=False) from e
     except Exception as e:
         logger.error(f"Error parsing RSS feed from {url}: {e}")
+        raise FeedFetchError(str(e), host_failure=False, retryable=False) from e
+    if document is None:
+        raise FeedFetchError("no usable document", host_failure=False, retryable=False)
+    return document
+
+
+def fetch_rss_feed(feed: Feed) -> Optional[Tuple[str, bytes]]:
+    """
+    Fetch a single registered RSS feed.
+    
+    The outcome is not recorded in the host's health; fetch_with_retry does
+    that once per feed.
+    
+    Args:
+        feed: Registry entry of the feed
+        
+    Returns:
+        Tuple of (filename, xml_data), or None if the host's circuit is open
+        
+    Raises:
+        FeedFetchError: The feed could not be fetched or parsed
+    """
+    host = host_of(feed.url)
+    tracker = host_health()
+    if not tracker.allow(host):
+        logger.warning(f"Skipping {feed.feed_id}: circuit for {host} is open")
+        current_run().observe_feed(feed.feed_id, feed.url, 0.0, ok=False, error="circuit_open")
+        current_run().add("get_rss_xml", feeds_skipped=1)
         return None
+    
+    throttled = tracker.acquire(host)
+    if throttled:
+        current_run().add("get_rss_xml", throttled_ms=int(throttled * 1000))
+    
+    logger.info(f"Fetching {feed.feed_id} from {feed.url}")
+    
+    started = time.monotonic()
+    try:
+        document = parse_rss_feed(feed.url)
+    except FeedFetchError as e:
+        current_run().observe_feed(feed.feed_id, feed.url, time.monotonic() - started, ok=False, error=str(e))
+        raise
+    if document.truncated:
+        current_run().add("get_rss_xml", feeds_truncated=1)
+    
+    xml_data = document.xml
+    current_run().observe_feed(feed.feed_id, feed.url, time.monotonic() - started, num_bytes=len(xml_data))
+    return feed.file_name, xml_data
+
+
+def fetch_with_retry(feed: Feed, retries: int = FEED_RETRIES) -> Optional[Tuple[str, bytes]]:
+    """
+    Fetch a feed, retrying failures with exponential backoff.
+
+    Only this feed is retried, not the whole run. Retries stop as soon as
+    the host's circuit is no longer closed, and failures that another
+    attempt will not fix (4xx, a broken document) are not retried.
 
+    The host's health gets one outcome per feed, not one per attempt: a
+    failure only when the last attempt failed because of the host
+    (connection error, timeout, 5xx). One broken feed therefore never opens
+    the circuit of the publisher's other feeds.
 
-def process_rss_feed(
-    s3: boto3.client,
-    category: str,
-    url: str
-) -> bool:
+    Args:
+        feed: Registry entry of the feed
+        retries: Retries after the first attempt
+
+    Returns:
+        Tuple of (filename, xml_data) or None if every attempt failed
+    """
+    host = host_of(feed.url)
+    error: Optional[FeedFetchError] = None
+    for attempt in range(retries + 1):
+        if attempt:
+            if host in host_health().unhealthy_hosts():
+                break
+            time.sleep(FEED_RETRY_DELAY * 2 ** (attempt - 1))
+            current_run().add("get_rss_xml", retries=1)
+            logger.info(f"Retrying {feed.feed_id} (attempt {attempt + 1}/{retries + 1})")
+        try:
+            fetched = fetch_rss_feed(feed)
+        except FeedFetchError as e:
+            error = e
+            if not e.retryable:
+                break
+            continue
+        if fetched:
+            host_health().record(host, ok=True)
+            return fetched
+        # Skipped, the circuit is open
+        break
+    if error is not None:
+        # A 4xx or a broken document still shows the host is answering
+        host_health().record(host, ok=not error.host_failure)
+    return None
+
+
+def process_rss_feed(s3: "boto3.client", feed: Feed) -> bool:
     """
     Process a single RSS feed: fetch, parse, and upload to S3.
     
     Args:
         s3: Boto3 S3 client
-        category: Feed category name
-        url: RSS feed URL
+        feed: Registry entry of the feed
         
     Returns:
         True if processing was successful, False otherwise
     """
     try:
-        logger.info(f"Fetching {category} from {url}")
-        
-        soup = parse_rss_feed(url)
-        if not soup:
+        fetched = fetch_with_retry(feed)
+        if not fetched:
             return False
         
-        source, category_clean = extract_source_and_category(soup, category)
-        
-        # Validate that source and category_clean are not empty (shouldn't happen, but safety check)
-        if not source or source == "":
-            source = "unknown"
-        if not category_clean or category_clean == "":
-            category_clean = "unknown"
-        
-        # Ensure filename doesn't contain path separators (would create folders in S3)
-        filename = f"{source}_{category_clean}.xml"
-        filename = filename.replace("/", "-").replace("\\", "-")  # Extra safety: remove any remaining path separators
-        
-        # Final validation: ensure filename is valid
-        if not filename or filename == ".xml" or filename.startswith("/") or filename.startswith("\\"):
-            logger.warning(f"Invalid filename generated: '{filename}', using fallback")
-            filename = f"unknown_{category}.xml".replace("/", "-")
-        
-        # Upload full feed XML
-        xml_data = str(soup).encode("utf-8")
-        upload_to_s3(s3, RAW_DATA_BUCKET, filename, xml_data)
+        # Upload full feed XML, tagged with the feed it came from
+        filename, xml_data = fetched
+        upload_to_s3(s3, RAW_DATA_BUCKET, filename, xml_data, metadata={"feed-id": feed.feed_id})
         
         # Process and upload individual items
         # items_count = process_feed_items(s3, soup, source, category_clean)
@@ -251,28 +407,91 @@ def process_rss_feed(
         return True
         
     except Exception as e:
-        logger.error(f"Error processing {category}: {e}")
+        logger.error(f"Error processing {feed.feed_id}: {e}")
         return False
 
 
+def last_fetch_times(s3: "boto3.client", bucket_name: str = RAW_DATA_BUCKET) -> Dict[str, float]:
+    """
+    Return when every archived feed was last fetched, from one bucket listing.
+    
+    Every successful fetch overwrites the feed's archive object, so its
+    LastModified is the last fetch time, shared by every shard and process.
+    
+    Args:
+        s3: Boto3 S3 client
+        bucket_name: Raw data bucket
+        
+    Returns:
+        Dictionary of archive filename -> epoch seconds (empty if the
+        listing failed, every feed is then due)
+    """
+    fetched: Dict[str, float] = {}
+    try:
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket_name):
+            for obj in page.get("Contents", []):
+                fetched[obj["Key"]] = obj["LastModified"].timestamp()
+    except Exception as e:
+        logger.warning(f"Could not list {bucket_name}, treating every feed as due: {e}")
+        return {}
+    return fetched
+
+
 # ============================================================================
 # Main Processing
 # ============================================================================
-def get_rss_xml(s3: boto3.client) -> None:
+def get_rss_xml(
+    s3: "boto3.client",
+    ledger: Optional[RunLedger] = None,
+    feeds: Optional[Iterable[Feed]] = None
+) -> None:
     """
-    Fetch and process all RSS feeds from RSS_FEEDS.
+    Fetch and process every feed that is due in this run.
+    
+    With a ledger, feeds already uploaded by an earlier attempt of the same
+    run are skipped, feeds an earlier attempt failed are fetched whether or
+    not they look due now, and every feed is recorded as done or failed.
     
     Args:
         s3: Boto3 S3 client
+        ledger: Run ledger of the "fetch_feed" stage (optional)
+        feeds: Feeds to consider (defaults to the whole registry)
     """
     total_feeds = 0
     successful_feeds = 0
+    done = ledger.completed() if ledger else set()
+    retry = ledger.failed() if ledger else set()
+    fetched_ids = []
+    failed_ids = []
     
-    for category, url in RSS_FEEDS.items():
-        total_feeds += 1
-        if process_rss_feed(s3, category, url):
-            successful_feeds += 1
+    try:
+        with current_run().stage("get_rss_xml"):
+            now = time.time()
+            last_fetched = last_fetch_times(s3)
+            for feed in FEEDS.values() if feeds is None else feeds:
+                if feed.feed_id in done:
+                    continue
+                if feed.feed_id not in retry and not feed.is_due(now, last_fetched.get(feed.file_name)):
+                    continue
+                total_feeds += 1
+                if process_rss_feed(s3, feed):
+                    successful_feeds += 1
+                    fetched_ids.append(feed.feed_id)
+                else:
+                    failed_ids.append(feed.feed_id)
+    finally:
+        host_health().save()
+        if ledger:
+            ledger.mark(fetched_ids, DONE)
+            ledger.mark(failed_ids, FAILED)
     
+    current_run().add(
+        "get_rss_xml",
+        errors=total_feeds - successful_feeds,
+        feeds=total_feeds,
+        feeds_ok=successful_feeds,
+        feeds_resumed=len(done)
+    )
     logger.info(f"Completed! Processed {successful_feeds}/{total_feeds} feeds successfully")
 
 
@@ -281,12 +500,42 @@ def get_rss_xml(s3: boto3.client) -> None:
 # ============================================================================
 def main() -> None:
     """Main execution function."""
+    arg_parser = argparse.ArgumentParser(description="Fetch RSS feeds and upload them to S3")
+    arg_parser.add_argument("--shard", help="Fetch only this shard of the registry (see rss_feeds.feed_shards)")
+    arg_parser.add_argument(
+        "--profile", choices=PROFILE_MODES, default=PROFILE_MODE or None,
+        help="Profile the run and ship the profile next to the run report (default: RSS_PROFILE)"
+    )
+    args = arg_parser.parse_args()
+
+    setup_logging()
+    start_queued_logging()
+    feeds = shard_feeds(args.shard) if args.shard else None
+    start_run(f"extract_{args.shard}" if args.shard else "extract")
+    start_profiling(args.profile)
+    s3 = None
+    ledger = open_ledger("fetch_feed")
+    # Shares the ledger's engine when there is one
+    tracker = host_health(ledger.engine)
+    if args.shard:
+        # The other shards of a split host fetch from it at the same time
+        for host, shards in shard_hosts(args.shard).items():
+            tracker.split_rate(host, shards)
     try:
         s3 = init_s3_client(ensure_bucket=RAW_DATA_BUCKET)
-        get_rss_xml(s3)
+        attach_log_shipping(s3)
+        get_rss_xml(s3, ledger, feeds)
+        finish_profiling(s3)
+        finish_run(s3)
     except Exception as e:
         logger.error(f"Fatal error: {e}")
+        finish_profiling(s3)
+        finish_run(s3, status="error")
         raise
+    finally:
+        if ledger.engine is not None:
+            ledger.engine.dispose()
+        finish_logging(s3)
 
 
 if __name__ == "__main__":
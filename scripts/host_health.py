@@ -0,0 +1,258 @@
+"""
+Per-host circuit breaker and rate limit for feed fetching.
+
+Many feeds share a publisher host (rss.walla.co.il serves about 25), so
+health is tracked per host:
+
+- circuit breaker: after FAILURE_THRESHOLD consecutive failures the host is
+  "open" and its feeds are skipped without a request. A failure is a feed
+  whose fetch failed because of the host (connection error, timeout, 5xx),
+  recorded once per feed however often it was retried; a 404 or a broken
+  document is the feed's problem, not the host's. Once the cool-down has
+  passed the host becomes "half_open" and a single probe is let through; a
+  success closes it, a failure re-opens it with a doubled cool-down.
+- token bucket: at most RATE_PER_SECOND requests per host (bursts of
+  RATE_BURST), so we never hammer a publisher.
+
+State is kept in the Host_Health table, shared by every worker and node, so
+a DAG retry or the next run starts from what the previous run learned instead
+of timing out on the same host again. A process reads the table once, when
+it first needs a host, and writes back only the hosts it saw. When a host is
+split across shards of the pipeline DAG, each shard fetches with its share of
+the host's rate (split_rate) and the last shard to finish saves its state.
+"""
+from typing import Any, Dict, Optional, TYPE_CHECKING
+from urllib.parse import urlparse
+import os
+import threading
+import time
+from utils import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_Host_Health")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Table of the persisted state (db_init/11_Host_Health_Create_Script.sql);
+# set RSS_HOST_HEALTH_TABLE="" to keep the state in memory only
+HOST_HEALTH_TABLE = os.getenv("RSS_HOST_HEALTH_TABLE", "Host_Health")
+
+# Persisted fields of a host's entry (the in-flight probe flag is not)
+PERSISTED_FIELDS = ("state", "failures", "opened_at", "open_seconds", "tokens", "refilled_at")
+
+# Consecutive failures that open a host's circuit
+FAILURE_THRESHOLD = int(os.getenv("RSS_HOST_FAILURE_THRESHOLD", 3))
+
+# Cool-down before the first half-open probe; doubles on every failed probe
+OPEN_SECONDS = float(os.getenv("RSS_HOST_OPEN_SECONDS", 300))
+MAX_OPEN_SECONDS = float(os.getenv("RSS_HOST_MAX_OPEN_SECONDS", 3600))
+
+# Requests per second per host (0 disables the limit) and bucket size
+RATE_PER_SECOND = float(os.getenv("RSS_HOST_RATE_PER_SECOND", 2.0))
+RATE_BURST = float(os.getenv("RSS_HOST_RATE_BURST", 5))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def host_of(url: str) -> str:
+    """Return the lower-cased host name of a feed URL."""
+    return (urlparse(url).hostname or "").lower()
+
+
+# ============================================================================
+# Host Health Tracker
+# ============================================================================
+class HostHealth:
+    """Circuit breaker and token bucket per host. Thread-safe."""
+
+    def __init__(self, engine: Optional["Engine"] = None, table: str = HOST_HEALTH_TABLE):
+        # State is kept in memory only without an engine or a table
+        self.engine = engine if table else None
+        self.table = table
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._persisted: Optional[Dict[str, Dict[str, Any]]] = None
+        # Share of a host's rate limit this process may use
+        self._rate_shares: Dict[str, float] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the persisted state of every host, once. Caller holds the lock."""
+        if self._persisted is None:
+            self._persisted = {}
+            if self.engine is not None:
+                from sqlalchemy import text
+
+                try:
+                    with self.engine.connect() as conn:
+                        rows = conn.execute(
+                            text(f"SELECT host, {', '.join(PERSISTED_FIELDS)} FROM {self.table}")
+                        ).mappings().all()
+                except Exception as e:
+                    logger.warning(f"Host health state unavailable, keeping it in memory: {e}")
+                    self.engine = None
+                    return self._persisted
+                for row in rows:
+                    entry = {field: row[field] for field in PERSISTED_FIELDS}
+                    # A probe that was in flight when the previous process stopped is over
+                    entry["probing"] = False
+                    self._persisted[row["host"]] = entry
+        return self._persisted
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        """Return the mutable entry of a host, loading or creating it if needed."""
+        if host not in self._hosts:
+            self._hosts[host] = self._load().get(host) or {
+                "state": CLOSED,
+                "failures": 0,
+                "opened_at": 0.0,
+                "open_seconds": OPEN_SECONDS,
+                "probing": False,
+                "tokens": RATE_BURST,
+                "refilled_at": time.time(),
+            }
+        return self._hosts[host]
+
+    def allow(self, host: str) -> bool:
+        """
+        Whether a request to the host may be made now.
+
+        An open host whose cool-down has passed turns half-open and lets
+        exactly one probe through until record() is called for it.
+        """
+        with self._lock:
+            entry = self._host(host)
+            if entry["state"] == OPEN:
+                if time.time() - entry["opened_at"] < entry["open_seconds"]:
+                    return False
+                entry["state"] = HALF_OPEN
+                entry["probing"] = False
+                logger.info(f"{host}: circuit half-open, probing")
+            if entry["state"] == HALF_OPEN:
+                if entry["probing"]:
+                    return False
+                entry["probing"] = True
+            return True
+
+    def split_rate(self, host: str, processes: int) -> None:
+        """
+        Limit this process to an equal share of the host's rate, when
+        `processes` processes (shards of the pipeline DAG) fetch from the
+        host at the same time.
+        """
+        with self._lock:
+            self._rate_shares[host] = 1 / max(1, processes)
+
+    def acquire(self, host: str) -> float:
+        """
+        Take a token from the host's bucket, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if RATE_PER_SECOND <= 0:
+            return 0.0
+        with self._lock:
+            entry = self._host(host)
+            share = self._rate_shares.get(host, 1.0)
+            rate = RATE_PER_SECOND * share
+            now = time.time()
+            tokens = min(max(1.0, RATE_BURST * share), entry["tokens"] + (now - entry["refilled_at"]) * rate)
+            # Reserve the token now; a negative balance is the wait we owe
+            entry["tokens"] = tokens - 1
+            entry["refilled_at"] = now
+            wait = max(0.0, (1 - tokens) / rate)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def record(self, host: str, ok: bool) -> None:
+        """
+        Record the outcome of a feed of the host.
+
+        Args:
+            host: Host name
+            ok: False when the host failed (connection error, timeout, 5xx);
+                a feed that failed on its own (4xx, broken document) is ok
+        """
+        with self._lock:
+            entry = self._host(host)
+            was_probe = entry["state"] == HALF_OPEN
+            entry["probing"] = False
+            if ok:
+                if entry["state"] != CLOSED:
+                    logger.info(f"{host}: recovered, circuit closed")
+                entry.update(state=CLOSED, failures=0, open_seconds=OPEN_SECONDS)
+                return
+
+            entry["failures"] += 1
+            if was_probe:
+                entry["open_seconds"] = min(entry["open_seconds"] * 2, MAX_OPEN_SECONDS)
+            if was_probe or entry["failures"] >= FAILURE_THRESHOLD:
+                entry.update(state=OPEN, opened_at=time.time())
+                logger.warning(
+                    f"{host}: circuit open after {entry['failures']} failures, "
+                    f"skipping for {entry['open_seconds']:.0f}s"
+                )
+
+    def unhealthy_hosts(self) -> Dict[str, str]:
+        """Return the circuit state of every host seen by this process that is not closed."""
+        with self._lock:
+            return {host: entry["state"] for host, entry in self._hosts.items() if entry["state"] != CLOSED}
+
+    def save(self) -> None:
+        """Persist the hosts this process saw. Errors are logged, not raised."""
+        if self.engine is None:
+            return
+        from sqlalchemy import text
+
+        with self._lock:
+            rows = [
+                {"host": host, **{field: entry[field] for field in PERSISTED_FIELDS}}
+                for host, entry in self._hosts.items()
+            ]
+        if not rows:
+            return
+        columns = ("host",) + PERSISTED_FIELDS
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"INSERT INTO {self.table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join(':' + column for column in columns)}) "
+                        f"ON DUPLICATE KEY UPDATE "
+                        + ", ".join(f"{field} = VALUES({field})" for field in PERSISTED_FIELDS)
+                    ),
+                    rows
+                )
+        except Exception as e:
+            logger.error(f"Could not save host health state: {e}")
+
+
+_host_health: Optional[HostHealth] = None
+
+
+def host_health(engine: Optional["Engine"] = None) -> HostHealth:
+    """
+    Return the process-wide tracker.
+
+    Args:
+        engine: Engine of the database holding the persisted state, used when
+            the tracker is created; one is created when none is given
+    """
+    global _host_health
+    if _host_health is None:
+        if engine is None and HOST_HEALTH_TABLE:
+            from process_raw_data_s3 import init_mysql_engine
+
+            try:
+                engine = init_mysql_engine(echo=False)
+            except Exception as e:
+                logger.warning(f"Host health state kept in memory, no database: {e}")
+        _host_health = HostHealth(engine)
+    return _host_health
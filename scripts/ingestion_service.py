@@ -0,0 +1,298 @@
+"""
+Long-running ingestion service: fetch RSS feeds and load them to MySQL on an
+internal schedule, keeping the S3 client and MySQL connection pool warm
+between cycles.
+
+The log goes through the queued logger of log_queue: with RSS_LOG_BUCKET set,
+it is shipped in chunks under each cycle's run report as the cycle goes on;
+otherwise it is uploaded whole once, when the service stops.
+
+Endpoints:
+    GET  /health          Service status and the result of the last cycle
+    POST /trigger         Run a cycle now; add ?wait=1 to block until it ends
+"""
+from typing import Any, Dict, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from utils import setup_logging, get_logger, init_s3_client, upload_log_to_s3
+from get_xml_upload_s3 import RAW_DATA_BUCKET, get_rss_xml
+from process_raw_data_s3 import init_mysql_engine, run_processing
+from rss_pipeline import ARCHIVE_UPLOAD_WORKERS, run_combined_cycle
+from run_metrics import start_run, finish_run
+from host_health import host_health
+from log_queue import attach_log_shipping, finish_logging, ship_log, start_queued_logging
+
+logger = get_logger("RSS_Ingestion_Service")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+SERVICE_HOST = os.getenv("INGESTION_SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("INGESTION_SERVICE_PORT", 8095))
+
+# Seconds between scheduled cycles (0 disables the internal scheduler)
+CYCLE_INTERVAL_SECONDS = int(os.getenv("INGESTION_INTERVAL_SECONDS", 300))
+
+# "combined" loads fetched feeds in-process and archives to S3 in the background;
+# "batch" uploads to S3 first and then reads the bucket back, like the DAG scripts
+PIPELINE_MODES = ("combined", "batch")
+PIPELINE_MODE = os.getenv("INGESTION_MODE", "combined")
+
+# Longest time a blocking /trigger request waits for its cycle
+TRIGGER_WAIT_TIMEOUT = int(os.getenv("INGESTION_TRIGGER_TIMEOUT", 900))
+
+# Pool settings for the long-lived MySQL engine
+MYSQL_POOL_OPTIONS = {
+    "pool_size": 2,
+    "max_overflow": 2,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+
+
+# ============================================================================
+# Service
+# ============================================================================
+class IngestionService:
+    """Runs fetch → process cycles with clients created once at startup."""
+
+    def __init__(
+        self,
+        interval_seconds: int = CYCLE_INTERVAL_SECONDS,
+        mode: str = PIPELINE_MODE
+    ):
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}")
+        self.interval_seconds = interval_seconds
+        self.mode = mode
+        self.s3 = init_s3_client(ensure_bucket=RAW_DATA_BUCKET)
+        self.engine = init_mysql_engine(echo=False, **MYSQL_POOL_OPTIONS)
+        # Host health state is read from and saved to the same database
+        host_health(self.engine)
+        self.archive_executor = ThreadPoolExecutor(
+            max_workers=ARCHIVE_UPLOAD_WORKERS, thread_name_prefix="s3-archive"
+        )
+        self.started_at = datetime.now(timezone.utc)
+
+        self._cycle_lock = threading.Lock()
+        self._state_changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._completed_cycles = 0
+        self._last_result: Optional[Dict[str, Any]] = None
+        self._scheduler: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Cycle execution
+    # ------------------------------------------------------------------
+    def run_cycle(self) -> Dict[str, Any]:
+        """
+        Run one fetch → process cycle. Concurrent callers are serialized.
+
+        Returns:
+            Dictionary describing the cycle outcome
+        """
+        with self._cycle_lock:
+            started = time.monotonic()
+            start_run(f"service_{self.mode}")
+            result: Dict[str, Any] = {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                if self.mode == "combined":
+                    records, _ = run_combined_cycle(
+                        self.s3, self.archive_executor, engine=self.engine
+                    )
+                else:
+                    get_rss_xml(self.s3)
+                    records = run_processing(self.s3, engine=self.engine)
+                result["records"] = records
+                result["status"] = "ok"
+            except Exception as e:
+                logger.error(f"Ingestion cycle failed: {e}")
+                result["status"] = "error"
+                result["error"] = str(e)
+            finally:
+                result["duration_seconds"] = round(time.monotonic() - started, 3)
+                report = finish_run(self.s3, status=result["status"])
+                result["stages"] = {
+                    name: stage["duration_seconds"] for name, stage in report["stages"].items()
+                }
+                logger.info(
+                    f"Cycle finished with status {result['status']} "
+                    f"in {result['duration_seconds']}s"
+                )
+                # The cycle's remaining log goes under its run before the next one starts
+                ship_log()
+
+            with self._state_changed:
+                self._completed_cycles += 1
+                self._last_result = result
+                self._state_changed.notify_all()
+            return result
+
+    def trigger(self, wait: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Request a cycle outside the regular schedule.
+
+        Args:
+            wait: Block until a cycle started after this request finishes
+
+        Returns:
+            The cycle result when waiting, otherwise None
+        """
+        with self._state_changed:
+            # A cycle already in progress may have missed this request's data,
+            # so wait for the one after it
+            target = self._completed_cycles + (2 if self._cycle_lock.locked() else 1)
+        self._wake.set()
+        if not wait:
+            return None
+
+        with self._state_changed:
+            finished = self._state_changed.wait_for(
+                lambda: self._completed_cycles >= target,
+                timeout=TRIGGER_WAIT_TIMEOUT
+            )
+            return self._last_result if finished else None
+
+    def health(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of the service state."""
+        with self._state_changed:
+            return {
+                "status": "running" if not self._stop.is_set() else "stopping",
+                "started_at": self.started_at.isoformat(),
+                "mode": self.mode,
+                "interval_seconds": self.interval_seconds,
+                "cycle_in_progress": self._cycle_lock.locked(),
+                "completed_cycles": self._completed_cycles,
+                "last_cycle": self._last_result,
+                "unhealthy_hosts": host_health().unhealthy_hosts(),
+            }
+
+    # ------------------------------------------------------------------
+    # Scheduler
+    # ------------------------------------------------------------------
+    def _scheduler_loop(self) -> None:
+        """Run a cycle on every interval tick or trigger until stopped."""
+        # Without an interval the service is trigger-driven only
+        timeout = self.interval_seconds if self.interval_seconds > 0 else None
+        run_now = timeout is not None
+        while not self._stop.is_set():
+            if run_now:
+                self.run_cycle()
+            self._wake.wait(timeout)
+            self._wake.clear()
+            run_now = not self._stop.is_set()
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        self._scheduler = threading.Thread(
+            target=self._scheduler_loop, name="ingestion-scheduler", daemon=True
+        )
+        self._scheduler.start()
+
+    def stop(self) -> None:
+        """Stop scheduling new cycles, flush archive uploads and release the MySQL pool."""
+        self._stop.set()
+        self._wake.set()
+        if self._scheduler:
+            self._scheduler.join(timeout=TRIGGER_WAIT_TIMEOUT)
+        self.archive_executor.shutdown(wait=True)
+        self.engine.dispose()
+
+
+# ============================================================================
+# HTTP Interface
+# ============================================================================
+def make_handler(service: IngestionService) -> type:
+    """
+    Build a request handler class bound to the given service.
+
+    Args:
+        service: Running ingestion service
+
+    Returns:
+        BaseHTTPRequestHandler subclass
+    """
+
+    class ServiceRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if urlparse(self.path).path == "/health":
+                self._send_json(200, service.health())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            parsed = urlparse(self.path)
+            if parsed.path != "/trigger":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            wait = parse_qs(parsed.query).get("wait", ["0"])[0] in ("1", "true")
+            result = service.trigger(wait=wait)
+            if not wait:
+                self._send_json(202, {"status": "triggered"})
+            elif result is None:
+                self._send_json(504, {"status": "timeout"})
+            else:
+                self._send_json(200 if result["status"] == "ok" else 500, result)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"{self.address_string()} - {format % args}")
+
+    return ServiceRequestHandler
+
+
+# ============================================================================
+# Main Execution
+# ============================================================================
+def main() -> None:
+    """Start the service and serve HTTP requests until interrupted."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument(
+        "--interval", type=int, default=CYCLE_INTERVAL_SECONDS,
+        help="Seconds between scheduled cycles; 0 runs only on /trigger"
+    )
+    arg_parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    arg_parser.add_argument("--mode", choices=PIPELINE_MODES, default=PIPELINE_MODE)
+    args = arg_parser.parse_args()
+
+    setup_logging()
+    start_queued_logging()
+    service = IngestionService(interval_seconds=args.interval, mode=args.mode)
+    attach_log_shipping(service.s3)
+    server = ThreadingHTTPServer((SERVICE_HOST, args.port), make_handler(service))
+    service.start()
+    logger.info(f"Ingestion service listening on {SERVICE_HOST}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down ingestion service")
+    finally:
+        server.server_close()
+        service.stop()
+        # Shipped in chunks when RSS_LOG_BUCKET is set, otherwise uploaded whole
+        if not finish_logging(service.s3):
+            upload_log_to_s3(service.s3)
+
+
+if __name__ == "__main__":
+    main()
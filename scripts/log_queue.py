@@ -0,0 +1,293 @@
+"""
+Non-blocking logging with rate limiting and incremental log shipping.
+
+start_queued_logging() moves the handlers utils.setup_logging installed on
+the root logger behind a QueueListener. Log calls only put the record on a
+bounded queue; the handlers (file, console) run on the listener thread, so
+the fetch and parse loops never wait on log I/O. When the queue is full,
+records are dropped and counted instead of blocking.
+
+A call site (file and line) that logs more than LOG_RATE_LIMIT records in
+LOG_RATE_WINDOW seconds is muted for the rest of the window; the number of
+muted records is logged once the window ends.
+
+With RSS_LOG_BUCKET set, the log is also shipped while the run goes on: the
+listener gzips every LOG_CHUNK_BYTES (or every LOG_SHIP_SECONDS) of log and
+uploads the chunk next to the run report, as
+run_reports/<run>/<started_at>.log.<n>.gz. Concatenated, the chunks are one
+gzip stream of the whole log (zcat run_reports/<run>/<started_at>.log.*.gz).
+A long-running process calls ship_log() when a run ends, so the next run's
+chunks start under its own prefix.
+"""
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from run_metrics import LOG_BUCKET, current_run, ensure_log_bucket
+
+if TYPE_CHECKING:
+    import boto3
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Records buffered between the logging threads and the listener
+LOG_QUEUE_SIZE = int(os.getenv("RSS_LOG_QUEUE_SIZE", 10000))
+
+# Records allowed per call site per window; 0 disables rate limiting
+LOG_RATE_LIMIT = int(os.getenv("RSS_LOG_RATE_LIMIT", 100))
+LOG_RATE_WINDOW = float(os.getenv("RSS_LOG_RATE_WINDOW", 60))
+
+# A chunk is shipped once this much log is buffered, or this long after the
+# previous chunk
+LOG_CHUNK_BYTES = int(os.getenv("RSS_LOG_CHUNK_BYTES", 256 * 1024))
+LOG_SHIP_SECONDS = float(os.getenv("RSS_LOG_SHIP_SECONDS", 30))
+
+# Unshipped log kept while S3 is unavailable; older chunks are dropped beyond it
+LOG_MAX_PENDING_BYTES = 16 * 1024 * 1024
+
+
+class RateLimitFilter(logging.Filter):
+    """Mutes call sites that log more than `limit` records per window."""
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        # (pathname, lineno) -> [window start, records seen, logger name]
+        self._sites: Dict[Tuple[str, int], List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0:
+            return True
+        site = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            entry = self._sites.get(site)
+            muted = 0
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None:
+                    muted = entry[1] - self.limit
+                entry = self._sites[site] = [now, 0, record.name]
+            entry[1] += 1
+            allowed = entry[1] <= self.limit
+        if muted > 0:
+            self._report(site, muted, record.name)
+        return allowed
+
+    def flush(self) -> None:
+        """Report the records muted in the current windows."""
+        with self._lock:
+            muted = [(site, entry[1] - self.limit, entry[2]) for site, entry in self._sites.items()]
+            self._sites.clear()
+        for site, count, name in muted:
+            if count > 0:
+                self._report(site, count, name)
+
+    def _report(self, site: Tuple[str, int], count: int, name: str) -> None:
+        logging.getLogger(name).warning(
+            f"Muted {count} log records from {os.path.basename(site[0])}:{site[1]} "
+            f"(more than {self.limit} per {self.window:g}s)"
+        )
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogShipper(logging.Handler):
+    """
+    Buffers formatted records and uploads them to S3 in gzip chunks.
+
+    Runs on the listener thread. Until an S3 client is attached (or while
+    uploads fail) chunks are kept and shipped with the next upload.
+    """
+
+    def __init__(
+        self,
+        bucket: str = LOG_BUCKET,
+        chunk_bytes: int = LOG_CHUNK_BYTES,
+        ship_seconds: float = LOG_SHIP_SECONDS
+    ):
+        super().__init__()
+        self.bucket = bucket
+        self.chunk_bytes = chunk_bytes
+        self.ship_seconds = ship_seconds
+        self.s3: Optional["boto3.client"] = None
+        self.chunks_shipped = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._pending: List[bytes] = []
+        self._last_ship = time.monotonic()
+        self._sequence: Dict[str, int] = {}
+
+    @property
+    def pending_chunks(self) -> int:
+        """Chunks not uploaded yet."""
+        return len(self._pending)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+        except Exception:
+            self.handleError(record)
+            return
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.chunk_bytes or time.monotonic() - self._last_ship >= self.ship_seconds:
+            self.ship()
+
+    def ship(self) -> None:
+        """Compress the buffered log into a chunk and upload every pending chunk."""
+        if self._buffer:
+            self._pending.append(gzip.compress(b"".join(self._buffer)))
+            self._buffer, self._buffered = [], 0
+        self._last_ship = time.monotonic()
+        if self.s3 is None or not self._pending:
+            self._trim_pending()
+            return
+
+        run = current_run()
+        prefix = f"run_reports/{run.run_name}/{run.started_at.strftime('%Y%m%dT%H%M%SZ')}.log"
+        while self._pending:
+            sequence = self._sequence.get(prefix, 0)
+            try:
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=f"{prefix}.{sequence:05d}.gz",
+                    Body=self._pending[0],
+                    ContentType="text/plain; charset=utf-8",
+                    ContentEncoding="gzip"
+                )
+            except Exception as e:
+                # Logging from here would feed back into this handler
+                sys.stderr.write(f"Log shipping failed, keeping {len(self._pending)} chunks: {e}\n")
+                self._trim_pending()
+                return
+            self._pending.pop(0)
+            self._sequence[prefix] = sequence + 1
+            self.chunks_shipped += 1
+
+    def _trim_pending(self) -> None:
+        while len(self._pending) > 1 and sum(map(len, self._pending)) > LOG_MAX_PENDING_BYTES:
+            self._pending.pop(0)
+
+
+# ============================================================================
+# Setup
+# ============================================================================
+_state: Dict[str, object] = {}
+
+
+def start_queued_logging() -> None:
+    """
+    Put the root logger's handlers behind a queue listener.
+
+    Call after utils.setup_logging(). Adds a LogShipper when RSS_LOG_BUCKET
+    is set. Calling it again while active does nothing.
+    """
+    if _state:
+        return
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    shipper = None
+    if LOG_BUCKET:
+        shipper = LogShipper(LOG_BUCKET)
+        if handlers and handlers[0].formatter:
+            shipper.setFormatter(handlers[0].formatter)
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, *([shipper] if shipper else []), respect_handler_level=True
+    )
+    queue_handler = DroppingQueueHandler(log_queue)
+    rate_limit = RateLimitFilter()
+    queue_handler.addFilter(rate_limit)
+
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    listener.start()
+    _state.update(
+        handlers=handlers, listener=listener, queue_handler=queue_handler,
+        rate_limit=rate_limit, shipper=shipper
+    )
+
+
+def attach_log_shipping(s3: Optional["boto3.client"]) -> None:
+    """Give the log shipper its S3 client; chunks logged so far go with the next upload."""
+    shipper = _state.get("shipper")
+    if shipper is not None and shipper.s3 is None and ensure_log_bucket(s3):
+        shipper.s3 = s3
+
+
+def ship_log() -> bool:
+    """
+    Ship the log buffered so far without stopping the listener, e.g. at the
+    end of a service cycle, so its chunks are stored under that cycle's run.
+
+    Returns:
+        True if nothing is left to upload, False otherwise (also when no
+        shipper is active)
+    """
+    shipper = _state.get("shipper")
+    if shipper is None:
+        return False
+    # Let the listener take what was queued before this call
+    log_queue = _state["listener"].queue
+    deadline = time.monotonic() + 1
+    while not log_queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The shipper runs on the listener thread; its handler lock serializes us
+    with shipper.lock:
+        shipper.ship()
+    return shipper.s3 is not None and not shipper.pending_chunks
+
+
+def finish_logging(s3: Optional["boto3.client"] = None) -> bool:
+    """
+    Drain the queue, ship the rest of the log and restore the root handlers.
+
+    Args:
+        s3: Boto3 S3 client (optional, when not attached yet)
+
+    Returns:
+        True if the log was shipped in chunks (callers that used to upload
+        the whole log with upload_log_to_s3 can skip that), False otherwise
+    """
+    if not _state:
+        return False
+    attach_log_shipping(s3)
+    _state["rate_limit"].flush()
+    queue_handler = _state["queue_handler"]
+    if queue_handler.dropped:
+        logging.getLogger(__name__).warning(f"Dropped {queue_handler.dropped} log records, the log queue was full")
+    _state["listener"].stop()
+
+    root = logging.getLogger()
+    root.removeHandler(queue_handler)
+    for handler in _state["handlers"]:
+        root.addHandler(handler)
+
+    shipper = _state["shipper"]
+    _state.clear()
+    if shipper is None:
+        return False
+    shipper.ship()
+    return shipper.s3 is not None and not shipper.pending_chunks
@@ -0,0 +1,437 @@
+"""
+Read-only HTTP API over the normalized news tables, with a response cache.
+
+Endpoints (GET, all take ?limit=N):
+    /latest                       Latest items (the GetLatestNews procedure)
+    /feeds/<source>               Latest items of a source
+    /feeds/<source>/<category>    Latest items of one feed category of a source
+    /tags/<tag>                   Latest items with a tag
+    /trending?window=1&k=10       Trending tags of a window (hours)
+    /health                       Data version and cache statistics
+
+Responses are JSON, or an Arrow IPC stream with ?format=arrow (or
+"Accept: application/vnd.apache.arrow.stream"). Every response carries an
+ETag derived from the data version and the body; a matching If-None-Match
+gets 304 Not Modified.
+
+Responses are kept in an in-process LRU cache for at most CACHE_TTL_SECONDS.
+The cache is cleared as soon as RSS_Data_Version changes, which the pipeline
+bumps whenever a normalize run added items, tag links or cluster
+assignments. Trending responses are also dropped once Trending_Tags was
+recomputed (its computed_at moved), which happens on every publish even
+when no rows were added. Both are read at most once per
+VERSION_POLL_SECONDS, so cache hits do not touch MySQL.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from datetime import date, datetime
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from utils import setup_logging, get_logger
+from process_raw_data_s3 import init_mysql_engine
+from data_version import VERSION_TABLE
+from tag_loader import normalize_tag
+from trending_tags import TRENDING_WINDOWS, trending_now
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_News_API")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+API_HOST = os.getenv("NEWS_API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("NEWS_API_PORT", 8096))
+
+# Items per response: default and upper bound of ?limit
+DEFAULT_LIMIT = 50
+MAX_LIMIT = int(os.getenv("NEWS_API_MAX_LIMIT", 500))
+
+# Response cache: entries kept, and the longest an entry is served
+CACHE_SIZE = int(os.getenv("NEWS_API_CACHE_SIZE", 256))
+CACHE_TTL_SECONDS = float(os.getenv("NEWS_API_CACHE_TTL", 60))
+
+# Shortest interval between two reads of the data version
+VERSION_POLL_SECONDS = float(os.getenv("NEWS_API_VERSION_POLL_SECONDS", 2))
+
+JSON_TYPE = "application/json; charset=utf-8"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+# Pool settings for the long-lived MySQL engine
+MYSQL_POOL_OPTIONS = {
+    "pool_size": 4,
+    "max_overflow": 4,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+
+# Same columns as GetLatestNews; {where} narrows the items
+ITEMS_QUERY = """
+    SELECT
+        s.source_name,
+        s.feed_category,
+        i.item_id,
+        i.title,
+        i.link,
+        i.published_date,
+        i.description,
+        GROUP_CONCAT(t.tag_name SEPARATOR ', ') AS tags
+    FROM RSS_Items i
+    JOIN RSS_Sources s ON i.source_id = s.source_id
+    LEFT JOIN Item_Tags it ON i.item_id = it.item_id
+    LEFT JOIN RSS_Tags t ON it.tag_id = t.tag_id
+    {where}
+    GROUP BY i.item_id
+    ORDER BY i.published_date DESC
+    LIMIT :limit
+"""
+
+TAG_FILTER = """
+    WHERE i.item_id IN (
+        SELECT it2.item_id FROM Item_Tags it2
+        JOIN RSS_Tags t2 ON t2.tag_id = it2.tag_id
+        WHERE t2.tag_name = :tag
+    )
+"""
+
+
+class ApiError(Exception):
+    """A request that cannot be served; carries the HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CachedResponse:
+    """A rendered response body and its validators."""
+
+    def __init__(self, body: bytes, content_type: str, version: int, trending_at: Optional[float] = None):
+        self.body = body
+        self.content_type = content_type
+        self.version = version
+        # Trending_Tags.computed_at the body was built from (trending responses only)
+        self.trending_at = trending_at
+        self.etag = f'"{version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """LRU cache of responses with a TTL. Thread-safe."""
+
+    def __init__(self, size: int = CACHE_SIZE, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str], entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================================
+# API
+# ============================================================================
+class NewsApi:
+    """Answers read queries from MySQL through the response cache."""
+
+    def __init__(self, engine: Optional["Engine"] = None, cache: Optional[ResponseCache] = None):
+        self.engine = engine if engine is not None else init_mysql_engine(echo=False, **MYSQL_POOL_OPTIONS)
+        self.cache = cache if cache is not None else ResponseCache()
+        self._version_lock = threading.Lock()
+        self._version = 0
+        self._trending_at: Optional[float] = None
+        self._version_checked = 0.0
+
+    # ------------------------------------------------------------------
+    # Data version
+    # ------------------------------------------------------------------
+    def data_version(self) -> int:
+        """
+        Return the published data version, clearing the cache when it moved.
+
+        Also refreshes trending_at, the time Trending_Tags was last computed.
+        """
+        from sqlalchemy import text
+
+        with self._version_lock:
+            if time.monotonic() - self._version_checked < VERSION_POLL_SECONDS:
+                return self._version
+            try:
+                with self.engine.connect() as conn:
+                    row = conn.execute(
+                        text(
+                            f"SELECT (SELECT version FROM {VERSION_TABLE} WHERE id = 1) AS version, "
+                            f"(SELECT UNIX_TIMESTAMP(MAX(computed_at)) FROM Trending_Tags) AS trending_at"
+                        )
+                    ).mappings().one()
+                version = row["version"] or 0
+                self._trending_at = float(row["trending_at"]) if row["trending_at"] is not None else None
+            except Exception as e:
+                # Keep serving the cache; the TTL still bounds staleness
+                logger.warning(f"Could not read the data version: {e}")
+                return self._version
+            self._version_checked = time.monotonic()
+            if version != self._version:
+                if self._version:
+                    logger.info(f"Data version {self._version} -> {version}, clearing the response cache")
+                self.cache.clear()
+                self._version = int(version)
+            return self._version
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def latest(self, limit: int) -> List[Dict[str, Any]]:
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("CALL GetLatestNews(:limit)"), {"limit": limit}).mappings().all()
+        return [_item(row) for row in rows]
+
+    def items(self, limit: int, where: str = "", **params: Any) -> List[Dict[str, Any]]:
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(ITEMS_QUERY.format(where=where)), {"limit": limit, **params}).mappings().all()
+        return [_item(row) for row in rows]
+
+    def trending(self, window_hours: int, k: int) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            return [
+                {"tag_name": tag_name, "item_count": item_count}
+                for tag_name, item_count in trending_now(conn, window_hours, k)
+            ]
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Callable[[], List[Dict[str, Any]]]:
+        """
+        Resolve a request path to the query that answers it.
+
+        Raises:
+            ApiError: Unknown path or invalid parameter
+        """
+        limit = _int_param(query, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+
+        if parts == ["latest"]:
+            return lambda: self.latest(limit)
+        if parts and parts[0] == "feeds" and len(parts) in (2, 3):
+            if len(parts) == 2:
+                return lambda: self.items(limit, "WHERE s.source_name = :source", source=parts[1])
+            return lambda: self.items(
+                limit, "WHERE s.source_name = :source AND s.feed_category = :category",
+                source=parts[1], category=parts[2]
+            )
+        if parts and parts[0] == "tags" and len(parts) == 2:
+            tag = normalize_tag(parts[1])
+            if not tag:
+                raise ApiError(400, "empty tag")
+            return lambda: self.items(limit, TAG_FILTER, tag=tag)
+        if parts == ["trending"]:
+            window = _int_param(query, "window", TRENDING_WINDOWS[0], 1, TRENDING_WINDOWS[-1])
+            if window not in TRENDING_WINDOWS:
+                raise ApiError(400, f"window must be one of {list(TRENDING_WINDOWS)}")
+            k = _int_param(query, "k", 10, 1, MAX_LIMIT)
+            return lambda: self.trending(window, k)
+        raise ApiError(404, "not found")
+
+    def respond(self, path: str, query: Dict[str, List[str]], fmt: str) -> CachedResponse:
+        """
+        Return the response for a request, from the cache when possible.
+
+        Args:
+            path: Request path
+            query: Parsed query string
+            fmt: "json" or "arrow"
+        """
+        run_query = self.route(path, query)
+        version = self.data_version()
+        trending_at = self._trending_at if path.strip("/") == "trending" else None
+        key = (f"{path}?{sorted(query.items())}", fmt)
+        cached = self.cache.get(key)
+        if cached is not None and cached.version == version and cached.trending_at == trending_at:
+            return cached
+
+        rows = run_query()
+        if fmt == "arrow":
+            body, content_type = _to_arrow(rows), ARROW_TYPE
+        else:
+            payload = {"data_version": version, "count": len(rows), "items": rows}
+            body, content_type = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8"), JSON_TYPE
+        response = CachedResponse(body, content_type, version, trending_at)
+        self.cache.put(key, response)
+        return response
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "data_version": self.data_version(),
+            "trending_computed_at": self._trending_at,
+            "cache": self.cache.stats(),
+        }
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int, low: int, high: int) -> int:
+    """Read an integer query parameter, clamped to [low, high]."""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    return max(low, min(high, value))
+
+
+def _item(row: Any) -> Dict[str, Any]:
+    """Turn a GetLatestNews-shaped row into an API item (tags as a list)."""
+    item = dict(row)
+    tags = item.get("tags")
+    item["tags"] = [tag for tag in tags.split(", ") if tag] if tags else []
+    return item
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _to_arrow(rows: List[Dict[str, Any]]) -> bytes:
+    """Serialize rows as an Arrow IPC stream."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ApiError(406, "Arrow output needs pyarrow")
+
+    table = pa.Table.from_pylist(rows)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ============================================================================
+# HTTP Interface
+# ============================================================================
+def make_handler(api: NewsApi) -> type:
+    """
+    Build a request handler class bound to the given API.
+
+    Args:
+        api: News API instance
+
+    Returns:
+        BaseHTTPRequestHandler subclass
+    """
+
+    class NewsRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes, content_type: str, etag: Optional[str] = None) -> None:
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+                # Clients may keep the body but must revalidate (a cheap 304)
+                self.send_header("Cache-Control", "no-cache")
+            if status != 304:
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def _send_json(self, status: int, payload: Any) -> None:
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), JSON_TYPE)
+
+        def do_GET(self) -> None:
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            if parsed.path == "/health":
+                self._send_json(200, api.health())
+                return
+
+            wants_arrow = ARROW_TYPE in self.headers.get("Accept", "")
+            fmt = query.pop("format", ["arrow" if wants_arrow else "json"])[0]
+            if fmt not in ("json", "arrow"):
+                self._send_json(400, {"error": "format must be json or arrow"})
+                return
+            try:
+                response = api.respond(parsed.path, query, fmt)
+            except ApiError as e:
+                self._send_json(e.status, {"error": str(e)})
+                return
+            except Exception as e:
+                logger.error(f"Error serving {self.path}: {e}")
+                self._send_json(500, {"error": "internal error"})
+                return
+
+            if_none_match = self.headers.get("If-None-Match", "")
+            if response.etag in (tag.strip() for tag in if_none_match.split(",")):
+                self._send(304, b"", response.content_type, response.etag)
+            else:
+                self._send(200, response.body, response.content_type, response.etag)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"{self.address_string()} - {format % args}")
+
+    return NewsRequestHandler
+
+
+# ============================================================================
+# Main Execution
+# ============================================================================
+def main() -> None:
+    """Serve the API until interrupted."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--port", type=int, default=API_PORT)
+    args = arg_parser.parse_args()
+
+    setup_logging()
+    api = NewsApi()
+    server = ThreadingHTTPServer((API_HOST, args.port), make_handler(api))
+    logger.info(f"News API listening on {API_HOST}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down news API")
+    finally:
+        server.server_close()
+        api.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,36 @@
 """
 Process RSS raw data from S3 and upsert to MySQL database.
+
+Heavy dependencies (pandas, bs4, dateutil, pytz, SQLAlchemy) are imported in
+the functions that use them, so importing this module stays cheap. The
+record-based path (load_xml_files) never imports pandas.
 """
-from typing import List, Tuple, Optional, Dict, Any
-import os
-from bs4 import BeautifulSoup
-import boto3
-import pandas as pd
-from dateutil import parser
+from typing import IO, AbstractSet, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Dict, Any, TYPE_CHECKING
+import argparse
 import json
-from sqlalchemy import create_engine, MetaData, text
-from sqlalchemy.dialects.mysql import insert
-from sqlalchemy.engine import Engine
+import os
+import tempfile
 from datetime import timedelta, datetime, timezone
-import pytz
 from utils import setup_logging, get_logger, init_s3_client, upload_log_to_s3
+from rss_feeds import FEEDS, feeds_by_file, shard_feeds
+from run_metrics import current_run, start_run, finish_run
+from log_queue import attach_log_shipping, finish_logging, start_queued_logging
+from profiling import PROFILE_MODE, PROFILE_MODES, finish_profiling, start_profiling
+from archive_codec import open_decompressed
+from stage_queue import StageChain
+from tag_loader import link_item_tags
+from story_clusters import cluster_new_items
+from trending_tags import update_trending_tags
+from data_version import publish_data_version
+from dashboard_snapshot import refresh_snapshot
+from run_ledger import DONE, FAILED, RunLedger, open_ledger
+
+if TYPE_CHECKING:
+    import boto3
+    import pandas as pd
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Engine
 
-setup_logging()
 logger = get_logger("RSS_Processor")
 
 
@@ -25,6 +40,28 @@ logger = get_logger("RSS_Processor")
 RAW_DATA_BUCKET = "rss-raw-data-test"
 TABLE_NAME = "rss_raw_items"
 
+# Records per upsert batch (one executemany and one transaction each)
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 500))
+
+# Upserts of at least this many records go through LOAD DATA LOCAL INFILE
+# into a staging table instead; 0 disables. Once a run (a backfill, a catch-up
+# run) has parsed this many records, its batches grow to this size, so the
+# rest of the run is bulk loaded. The MySQL server needs local_infile=ON.
+BULK_LOAD_THRESHOLD = int(os.getenv("BULK_LOAD_THRESHOLD", 5000))
+
+# Columns written to the bulk load file, in file order
+BULK_LOAD_COLUMNS = ["id", "source", "category", "title", "link", "published_date", "description", "tags"]
+
+# Text columns cleaned of newlines before loading
+STRING_COLUMNS = ["id", "source", "category", "title", "link", "description"]
+
+
+class RecordBatch(NamedTuple):
+    """Cleaned records of whole files; a file is never split across batches."""
+    files: List[str]
+    records: List[Dict[str, Any]]
+
+
 # Database configuration
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
@@ -47,41 +84,115 @@ DB_CONNECTION_STRING = (
 # Using shared init_s3_client from utils
 
 
-def init_mysql_engine(echo: bool = True) -> Engine:
-    """Initialize and return SQLAlchemy MySQL engine."""
-    return create_engine(DB_CONNECTION_STRING, echo=echo)
+def init_mysql_engine(echo: bool = True, **engine_kwargs: Any) -> "Engine":
+    """
+    Initialize and return SQLAlchemy MySQL engine.
+
+    Args:
+        echo: Whether SQLAlchemy should log every statement
+        **engine_kwargs: Extra create_engine options (e.g. pool settings)
+    """
+    from sqlalchemy import create_engine
+
+    if BULK_LOAD_THRESHOLD > 0:
+        # LOAD DATA LOCAL INFILE (bulk_load_records) must be allowed by the client too
+        engine_kwargs["connect_args"] = {"local_infile": True, **engine_kwargs.get("connect_args", {})}
+    return create_engine(DB_CONNECTION_STRING, echo=echo, **engine_kwargs)
+
+
+# Reflected tables, keyed by (database URL, table name), so long-lived
+# engines reflect each table once instead of on every upsert
+_TABLE_CACHE: Dict[Tuple[str, str], "Table"] = {}
+
+
+def get_table(engine: "Engine", table_name: str) -> "Table":
+    """
+    Reflect a single table, reusing an earlier reflection when available.
+
+    Args:
+        engine: SQLAlchemy engine
+        table_name: Name of the MySQL table
+
+    Returns:
+        Reflected SQLAlchemy Table
+    """
+    from sqlalchemy import MetaData
+
+    cache_key = (str(engine.url), table_name)
+    if cache_key not in _TABLE_CACHE:
+        metadata = MetaData()
+        metadata.reflect(engine, only=[table_name])
+        _TABLE_CACHE[cache_key] = metadata.tables[table_name]
+    return _TABLE_CACHE[cache_key]
 
 
 # ============================================================================
 # S3 Data Retrieval
 # ============================================================================
-def get_raw_data(s3: boto3.client, bucket_name: str) -> List[Tuple[str, str]]:
+def iter_raw_data(
+    s3: "boto3.client",
+    bucket_name: str,
+    skip: AbstractSet[str] = frozenset(),
+    keys: Optional[AbstractSet[str]] = None
+) -> Iterator[Tuple[str, bytes, Optional[str]]]:
     """
-    Retrieve all XML files from S3 bucket.
+    Download the XML files of an S3 bucket one at a time.
+    
+    Compressed objects (Content-Encoding gzip/zstd) are decompressed while
+    streaming from S3. Content is returned as raw bytes so the XML parser
+    honors the document's declared encoding. The feed id the extractor
+    stored in the object's feed-id metadata comes with it.
     
     Args:
         s3: Boto3 S3 client
         bucket_name: Name of the S3 bucket
+        skip: Keys not to download (already loaded by this run)
+        keys: Download only these keys (optional)
         
-    Returns:
-        List of tuples containing (file_name, file_content)
+    Yields:
+        Tuples of (file_name, file_content, feed_id or None)
     """
-    xml_files = []
+    metrics = current_run()
     paginator = s3.get_paginator("list_objects_v2")
 
     for page in paginator.paginate(Bucket=bucket_name):
         for obj in page.get("Contents", []):
             key = obj["Key"]
+            if keys is not None and key not in keys:
+                continue
+            if key in skip:
+                metrics.add("get_raw_data", objects_resumed=1)
+                continue
             try:
-                response = s3.get_object(Bucket=bucket_name, Key=key)
-                data = response["Body"].read().decode("utf-8")
-                xml_files.append((key, data))
+                with metrics.stage("get_raw_data"):
+                    response = s3.get_object(Bucket=bucket_name, Key=key)
+                    with open_decompressed(response["Body"], response.get("ContentEncoding")) as body:
+                        data = body.read()
+                metrics.add(
+                    "get_raw_data",
+                    objects=1,
+                    bytes=obj.get("Size", len(data)),
+                    raw_bytes=len(data)
+                )
                 logger.info(f"Processing {key}")
             except Exception as e:
                 logger.error(f"Error processing {key}: {e}")
                 continue
-                
-    return xml_files
+            yield key, data, response.get("Metadata", {}).get("feed-id")
+
+
+def get_raw_data(s3: "boto3.client", bucket_name: str) -> List[Tuple[str, bytes, Optional[str]]]:
+    """
+    Retrieve all XML files from S3 bucket.
+    
+    Args:
+        s3: Boto3 S3 client
+        bucket_name: Name of the S3 bucket
+        
+    Returns:
+        List of tuples containing (file_name, file_content, feed_id or None)
+    """
+    return list(iter_raw_data(s3, bucket_name))
 
 
 # ============================================================================
@@ -99,6 +210,9 @@ def parse_xml_item(item, source: str, category: str) -> Optional[Dict[str, Any]]
     Returns:
         Dictionary with parsed item data or None if invalid
     """
+    from dateutil import parser
+    import pytz
+
     guid = item.find("guid")
     if not guid:
         return None
@@ -170,6 +284,8 @@ def parse_published_date(date_str: Optional[str], source: str) -> Optional[str]:
     if not date_str:
         return None
 
+    from dateutil import parser
+
     try:
         # Parse the date string to datetime object
         dt = parser.parse(date_str)
@@ -216,6 +332,8 @@ def extract_description(item) -> str:
     if not raw_desc:
         return ""
     
+    from bs4 import BeautifulSoup
+
     description = BeautifulSoup(raw_desc.text, "html.parser").get_text(" ", strip=True)
     return description.replace('""', '"').strip()
 
@@ -240,7 +358,8 @@ def extract_tags(item) -> List[str]:
 
 def parse_file_name(file_name: str) -> Tuple[str, str]:
     """
-    Parse source and category from file name.
+    Parse source and category from file name (for files of feeds that are
+    no longer in the registry).
     
     Args:
         file_name: File name in format "source_category.xml"
@@ -257,37 +376,77 @@ def parse_file_name(file_name: str) -> Tuple[str, str]:
 # ============================================================================
 # Data Processing
 # ============================================================================
-def process_raw_data(xml_files: List[Tuple[str, str]]) -> pd.DataFrame:
+def parse_raw_items(xml_files: List[Tuple]) -> List[Dict[str, Any]]:
     """
-    Process XML files and convert to cleaned DataFrame.
+    Parse RSS items out of XML files.
+    
+    The source and category come from the registry: by the feed id stored
+    with the object, else by file name, else parsed from the file name.
     
     Args:
-        xml_files: List of tuples containing (file_name, file_content)
+        xml_files: List of tuples containing (file_name, file_content[, feed_id]);
+            content may be str or raw bytes
         
     Returns:
-        Cleaned DataFrame with RSS items
+        List of parsed item dictionaries
     """
+    from bs4 import BeautifulSoup
+
+    metrics = current_run()
+    by_file = feeds_by_file()
     items_list = []
-    for file_name, file_data in xml_files:
+    for file_name, file_data, *feed_id in xml_files:
         try:
             soup = BeautifulSoup(file_data, "xml")
-            source, category = parse_file_name(file_name)
+            feed = (feed_id and FEEDS.get(feed_id[0])) or by_file.get(file_name)
+            if feed:
+                source, category = feed.source, feed.db_category
+            else:
+                source, category = parse_file_name(file_name)
             items = soup.find_all("item")
 
+            parsed_count = 0
             for item in items:
                 parsed_item = parse_xml_item(item, source, category)
                 if parsed_item:
                     items_list.append(parsed_item)
+                    parsed_count += 1
+            metrics.add(
+                "process_raw_data",
+                files=1,
+                items=parsed_count,
+                items_skipped=len(items) - parsed_count
+            )
         except Exception as e:
+            metrics.add("process_raw_data", errors=1)
             logger.error(f"Error processing file {file_name}: {e}")
             continue
 
-    if not items_list:
-        logger.warning("No items found in XML files")
-        return pd.DataFrame()
+    return items_list
+
+
+def process_raw_data(xml_files: List[Tuple]) -> "pd.DataFrame":
+    """
+    Process XML files and convert to cleaned DataFrame.
+    
+    Args:
+        xml_files: List of tuples containing (file_name, file_content[, feed_id]);
+            content may be str or raw bytes
+        
+    Returns:
+        Cleaned DataFrame with RSS items
+    """
+    import pandas as pd
+
+    with current_run().stage("process_raw_data"):
+        items_list = parse_raw_items(xml_files)
+
+        if not items_list:
+            logger.warning("No items found in XML files")
+            return pd.DataFrame()
 
-    df = pd.DataFrame(items_list)
-    df = clean_dataframe(df)
+        df = pd.DataFrame(items_list)
+        df = clean_dataframe(df)
     
     logger.info(f"Cleaned {len(df)} records")
     
@@ -295,7 +454,7 @@ def process_raw_data(xml_files: List[Tuple[str, str]]) -> pd.DataFrame:
     return df
 
 
-def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def clean_dataframe(df: "pd.DataFrame") -> "pd.DataFrame":
     """
     Clean and normalize DataFrame columns.
     
@@ -305,9 +464,10 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
+    import pandas as pd
+
     # Clean string columns
-    string_columns = ["id", "source", "category", "title", "link", "description"]
-    for col in string_columns:
+    for col in STRING_COLUMNS:
         if col in df.columns:
             df[col] = df[col].astype(str).str.replace("\n", " ").str.strip()
     
@@ -315,105 +475,646 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if "published_date" in df.columns:
         df["published_date"] = pd.to_datetime(df["published_date"], errors="coerce")
     
-    # Serialize tags to JSON string
+    # Keep tags as lists; the JSON column type serializes them once on insert
     if "tags" in df.columns:
-        df["tags"] = df["tags"].apply(
-            lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, list) else str(x)
-        )
+        df["tags"] = df["tags"].apply(normalize_tags)
     
     return df
 
 
+def clean_records(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Clean parsed items without pandas; mirrors clean_dataframe.
+    
+    Args:
+        items: Parsed item dictionaries
+        
+    Returns:
+        Cleaned records ready for upsert
+    """
+    records = []
+    for item in items:
+        record = dict(item)
+        for col in STRING_COLUMNS:
+            if col in record:
+                record[col] = str(record[col]).replace("\n", " ").strip()
+        if "published_date" in record:
+            record["published_date"] = to_datetime_or_none(record["published_date"])
+        if "tags" in record:
+            record["tags"] = normalize_tags(record["tags"])
+        records.append(record)
+    return records
+
+
+def to_datetime_or_none(value: Any) -> Optional[datetime]:
+    """
+    Convert a published_date value to datetime, like pd.to_datetime(errors="coerce").
+    
+    Args:
+        value: Formatted date string (or raw feed value when formatting failed)
+        
+    Returns:
+        Naive datetime or None if the value cannot be parsed
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        pass
+
+    from dateutil import parser
+
+    try:
+        return parser.parse(value).replace(tzinfo=None)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def normalize_tags(tags: Any) -> List[str]:
+    """
+    Return tags as a plain list of strings.
+    
+    The list is stored as-is in the JSON column (no json.dumps here, which
+    double-encoded the value) and is used by tag_loader to link Item_Tags.
+    """
+    if isinstance(tags, list):
+        return [str(tag) for tag in tags]
+    return []
+
+
 # ============================================================================
 # Database Operations
 # ============================================================================
-def upsert_to_mysql(df: pd.DataFrame, table_name: str = TABLE_NAME) -> None:
+def upsert_to_mysql(
+    df: "pd.DataFrame",
+    table_name: str = TABLE_NAME,
+    engine: Optional["Engine"] = None
+) -> None:
     """
     Upsert DataFrame records to MySQL table.
     
     Args:
         df: DataFrame to upsert
         table_name: Name of the MySQL table
+        engine: Existing engine to reuse; a temporary one is created
+            (and disposed) when omitted
     """
     if df.empty:
         logger.warning("DataFrame is empty, nothing to upsert")
         return
     
-    engine = init_mysql_engine(echo=False)
-    metadata = MetaData()
-    metadata.reflect(engine)
+    upsert_records(df.to_dict("records"), table_name, engine=engine)
+
+
+def upsert_records(
+    records: List[Dict[str, Any]],
+    table_name: str = TABLE_NAME,
+    engine: Optional["Engine"] = None
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    Upsert cleaned records to MySQL table.
+    
+    Every UPSERT_BATCH_SIZE records are committed on their own. A batch that
+    MySQL rejects for its data is split in halves until the offending
+    records are isolated; they are skipped and returned, the rest is loaded.
+    
+    From BULK_LOAD_THRESHOLD records on, bulk_load_records is tried first;
+    when it cannot load every record unchanged, the batched path above runs.
+    
+    Args:
+        records: Cleaned record dictionaries
+        table_name: Name of the MySQL table
+        engine: Existing engine to reuse; a temporary one is created
+            (and disposed) when omitted
     
-    if table_name not in metadata.tables:
-        raise ValueError(f"Table '{table_name}' not found in database")
+    Returns:
+        (record, error) of every rejected record
+    """
+    from sqlalchemy.dialects.mysql import insert
+    from sqlalchemy.exc import InvalidRequestError
+
+    if not records:
+        logger.warning("No records to upsert")
+        return []
     
-    table = metadata.tables[table_name]
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
     
+    rejected: List[Tuple[Dict[str, Any], str]] = []
     try:
-        with engine.begin() as conn:
-            for _, row in df.iterrows():
-                stmt = insert(table).values(**row.to_dict())
-                stmt = stmt.on_duplicate_key_update(
-                    title=stmt.inserted.title,
-                    description=stmt.inserted.description,
-                    published_date=stmt.inserted.published_date,
-                    tags=stmt.inserted.tags
-                )
-                conn.execute(stmt)
+        if 0 < BULK_LOAD_THRESHOLD <= len(records) and bulk_load_records(records, table_name, engine):
+            return rejected
+
+        try:
+            table = get_table(engine, table_name)
+        except InvalidRequestError:
+            raise ValueError(f"Table '{table_name}' not found in database")
+
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            title=stmt.inserted.title,
+            description=stmt.inserted.description,
+            published_date=stmt.inserted.published_date,
+            tags=stmt.inserted.tags
+        )
+        # One executemany per batch: a multi-row INSERT ... ON DUPLICATE KEY UPDATE
+        with current_run().stage("upsert_to_mysql"):
+            loaded = sum(
+                _upsert_batch(engine, stmt, records[start:start + UPSERT_BATCH_SIZE], rejected)
+                for start in range(0, len(records), UPSERT_BATCH_SIZE)
+            )
         
-        logger.info(f"Upserted {len(df)} records successfully!")
+        current_run().add("upsert_to_mysql", rows=loaded, rows_rejected=len(rejected))
+        logger.info(f"Upserted {loaded} records successfully!")
+        if rejected:
+            logger.warning(f"Rejected {len(rejected)} records")
     except Exception as e:
         logger.error(f"Error upserting to MySQL: {e}")
         raise
     finally:
-        engine.dispose()
+        if owns_engine:
+            engine.dispose()
+    return rejected
 
 
-def call_normalize_rss_data(procedure_name: str = "NormalizeRSSData") -> None:
+def _upsert_batch(
+    engine: "Engine",
+    stmt: Any,
+    batch: List[Dict[str, Any]],
+    rejected: List[Tuple[Dict[str, Any], str]]
+) -> int:
+    """Upsert a batch in one transaction, bisecting it on data errors. Returns rows loaded."""
+    from sqlalchemy.exc import DataError, IntegrityError
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(stmt, batch)
+        return len(batch)
+    except (DataError, IntegrityError) as e:
+        if len(batch) == 1:
+            error = str(e.orig or e)
+            logger.warning(f"Rejected record {batch[0].get('id')}: {error}")
+            rejected.append((batch[0], error))
+            return 0
+        middle = len(batch) // 2
+        return (
+            _upsert_batch(engine, stmt, batch[:middle], rejected)
+            + _upsert_batch(engine, stmt, batch[middle:], rejected)
+        )
+
+
+def _bulk_load_value(value: Any) -> str:
+    """Format a value for LOAD DATA (tab-separated, backslash escapes, \\N for NULL)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\0", "\\0")
+    )
+
+
+def _write_bulk_load_rows(tsv_file: IO[str], records: Iterable[Dict[str, Any]]) -> None:
+    """Write records as LOAD DATA rows of BULK_LOAD_COLUMNS."""
+    for record in records:
+        tsv_file.write("\t".join(_bulk_load_value(record.get(col)) for col in BULK_LOAD_COLUMNS))
+        tsv_file.write("\n")
+
+
+def bulk_load_records(
+    records: List[Dict[str, Any]],
+    table_name: str = TABLE_NAME,
+    engine: Optional["Engine"] = None
+) -> bool:
+    """
+    Upsert records with LOAD DATA LOCAL INFILE and one set-based statement.
+    
+    The records are written to a temporary TSV file, loaded into a session
+    staging table (CREATE TEMPORARY TABLE ... LIKE table_name), and merged
+    with a single INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+    
+    LOAD DATA LOCAL turns data errors into warnings (values are truncated
+    or coerced). If the load raised any warning, nothing is merged and
+    False is returned, so the caller can fall back to the batched upsert,
+    which rejects bad records instead.
+    
+    Args:
+        records: Cleaned record dictionaries
+        table_name: Name of the MySQL table
+        engine: Existing engine to reuse; a temporary one is created
+            (and disposed) when omitted
+    
+    Returns:
+        True if every record was loaded, False if nothing was
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+
+    # The last record of a guid wins, as with the batched upsert
+    by_id = {record["id"]: record for record in records}
+    staging_table = f"{table_name}_staging"
+    columns = ", ".join(BULK_LOAD_COLUMNS)
+
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
+
+    path = None
+    try:
+        with current_run().stage("upsert_to_mysql"):
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", newline="", suffix=".tsv", delete=False
+            ) as tsv_file:
+                path = tsv_file.name
+                _write_bulk_load_rows(tsv_file, by_id.values())
+
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}"))
+                conn.execute(text(f"CREATE TEMPORARY TABLE {staging_table} LIKE {table_name}"))
+                conn.execute(
+                    text(
+                        f"LOAD DATA LOCAL INFILE :path INTO TABLE {staging_table} "
+                        f"CHARACTER SET utf8mb4 "
+                        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                        f"({columns})"
+                    ),
+                    {"path": path}
+                )
+                warnings = conn.execute(text("SELECT @@warning_count")).scalar()
+                if warnings:
+                    conn.execute(text(f"DROP TEMPORARY TABLE {staging_table}"))
+                    logger.warning(f"Bulk load raised {warnings} warnings, falling back to batched upserts")
+                    return False
+                conn.execute(
+                    text(
+                        f"INSERT INTO {table_name} ({columns}) "
+                        f"SELECT {columns} FROM {staging_table} AS s "
+                        f"ON DUPLICATE KEY UPDATE title = s.title, description = s.description, "
+                        f"published_date = s.published_date, tags = s.tags"
+                    )
+                )
+                conn.execute(text(f"DROP TEMPORARY TABLE {staging_table}"))
+    except DBAPIError as e:
+        # e.g. local_infile disabled on the server
+        logger.warning(f"Bulk load failed, falling back to batched upserts: {e}")
+        return False
+    finally:
+        if path:
+            os.unlink(path)
+        if owns_engine:
+            engine.dispose()
+
+    current_run().add("upsert_to_mysql", rows=len(by_id), bulk_loads=1)
+    logger.info(f"Bulk loaded {len(by_id)} records")
+    return True
+
+
+def call_normalize_rss_data(
+    procedure_name: str = "NormalizeRSSData",
+    engine: Optional["Engine"] = None
+) -> None:
     """
     Execute MySQL stored procedure to normalize RSS data.
     
     Args:
         procedure_name: Name of the stored procedure to call
+        engine: Existing engine to reuse; a temporary one is created
+            (and disposed) when omitted
     """
-    engine = init_mysql_engine(echo=False)
+    from sqlalchemy import text
+
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
     
     try:
-        with engine.begin() as conn:
+        with current_run().stage("call_normalize_rss_data"), engine.begin() as conn:
             conn.execute(text(f"CALL {procedure_name}()"))
         logger.info(f"Successfully executed stored procedure: {procedure_name}")
     except Exception as e:
         logger.error(f"Error executing stored procedure {procedure_name}: {e}")
         raise
     finally:
-        engine.dispose()
+        if owns_engine:
+            engine.dispose()
 
 
 # ============================================================================
 # Main Execution
 # ============================================================================
-def main() -> None:
-    """Main execution function."""
+def run_processing(
+    s3: "boto3.client",
+    engine: Optional["Engine"] = None,
+    keys: Optional[AbstractSet[str]] = None,
+    normalize: bool = True
+) -> int:
+    """
+    Load the raw XML files from S3, upsert them and normalize.
+    
+    Download, parsing and upserts run concurrently (see stage_queue). When
+    the task is a retry of the same Airflow run, files the earlier attempt
+    loaded are skipped (see run_ledger).
+    
+    Args:
+        s3: Boto3 S3 client
+        engine: Existing engine to reuse across calls (optional)
+        keys: Load only these S3 keys, e.g. the files of one shard (optional)
+        normalize: Normalize and publish; False only upserts to
+            rss_raw_items and leaves the rest to normalize_pending()
+        
+    Returns:
+        Number of records upserted
+    """
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
+    
     try:
-        s3 = init_s3_client()
-        xml_files = get_raw_data(s3, RAW_DATA_BUCKET)
+        ledger = open_ledger("process_file", engine)
+        done = ledger.completed()
+        # A failed load stops the download and parse threads before it propagates
+        with StageChain() as chain:
+            xml_files = chain.stage(iter_raw_data(s3, RAW_DATA_BUCKET, skip=done, keys=keys), "get_raw_data")
+            return load_record_batches(
+                chain.stage(parse_record_batches(xml_files), "process_raw_data"),
+                engine,
+                ledger=ledger,
+                resumed=bool(done),
+                normalize=normalize
+            )
+    finally:
+        if owns_engine:
+            engine.dispose()
+
+
+def parse_record_batches(
+    xml_files: Iterable[Tuple],
+    batch_size: int = UPSERT_BATCH_SIZE
+) -> Iterator[RecordBatch]:
+    """
+    Parse and clean XML files as they arrive, in batches of whole files.
+    
+    Small runs are upserted batch by batch while parsing goes on. Once the
+    run has parsed BULK_LOAD_THRESHOLD records it is a large load, and the
+    following batches hold BULK_LOAD_THRESHOLD records each, so
+    upsert_records bulk loads them.
+    
+    Args:
+        xml_files: Tuples of (file_name, file_content[, feed_id])
+        batch_size: A batch is emitted once it holds at least this many records
         
-        if not xml_files:
-            logger.warning("No XML files found in S3 bucket")
-            return
+    Yields:
+        RecordBatch of the files parsed since the previous batch
+    """
+    files: List[str] = []
+    records: List[Dict[str, Any]] = []
+    parsed = 0
+    for xml_file in xml_files:
+        with current_run().stage("process_raw_data"):
+            new_records = clean_records(parse_raw_items([xml_file]))
+        records.extend(new_records)
+        parsed += len(new_records)
+        files.append(xml_file[0])
+        if 0 < BULK_LOAD_THRESHOLD <= parsed:
+            batch_size = max(batch_size, BULK_LOAD_THRESHOLD)
+        if len(records) >= batch_size:
+            yield RecordBatch(files, records)
+            files, records = [], []
+    if files:
+        yield RecordBatch(files, records)
+
+
+def load_record_batches(
+    batches: Iterable[RecordBatch],
+    engine: Optional["Engine"] = None,
+    ledger: Optional[RunLedger] = None,
+    resumed: bool = False,
+    normalize: bool = True
+) -> int:
+    """
+    Upsert record batches as they arrive, then normalize and publish once.
+    
+    Each batch is a checkpoint: once its records are upserted, its files
+    are marked done in the ledger. A failing batch marks its files failed
+    and stops the load; a retry of the run starts at those files.
+    NormalizeRSSData, tag linking and clustering run once, after the last
+    batch. A retry also normalizes what an earlier attempt upserted but did
+    not normalize (the rows missing from processed_raw_items).
+    
+    Args:
+        batches: RecordBatch of cleaned records
+        engine: Existing engine to reuse across calls (optional)
+        ledger: Run ledger of the "process_file" stage (optional)
+        resumed: Whether an earlier attempt of this run loaded files; the
+            data is then published even if this attempt loads nothing
+        normalize: Normalize after the last batch and publish; False only upserts
         
-        df = process_raw_data(xml_files)
+    Returns:
+        Number of records upserted
+    """
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
+    row_ledger = RunLedger(ledger.engine, ledger.run_id, "upsert_row") if ledger else None
+    
+    loaded = 0
+    records: List[Dict[str, Any]] = []
+    try:
+        for batch in batches:
+            try:
+                rejected = upsert_records(batch.records, engine=engine)
+                loaded += len(batch.records) - len(rejected)
+                if normalize:
+                    records.extend(batch.records)
+            except Exception as e:
+                if ledger:
+                    ledger.mark(batch.files, FAILED, error=str(e))
+                raise
+            if ledger:
+                for record, error in rejected:
+                    row_ledger.mark([str(record.get("id"))], FAILED, error=error)
+                ledger.mark(batch.files, DONE)
         
-        if not df.empty:
-            upsert_to_mysql(df)
-            # Execute stored procedure to normalize data
-            call_normalize_rss_data()
-        else:
+        if not loaded and not resumed:
             logger.warning("No data to upsert")
-        upload_log_to_s3(s3)
+            return 0
+        
+        logger.info(f"Upserted {loaded} cleaned records")
+        if normalize:
+            if resumed:
+                # Read before the procedure marks them processed
+                records = pending_records(engine)
+            if records:
+                normalize_records(records, engine)
+            publish_load(engine)
+    finally:
+        if owns_engine:
+            engine.dispose()
+    return loaded
+
+
+def normalize_records(records: List[Dict[str, Any]], engine: "Engine") -> None:
+    """
+    Run normalization, link tags and cluster new stories for upserted
+    records.
+    
+    Args:
+        records: Cleaned records already upserted to rss_raw_items
+        engine: SQLAlchemy engine
+    """
+    # Execute stored procedure to normalize data
+    call_normalize_rss_data(engine=engine)
+    link_item_tags(records, engine)
+    try:
+        cluster_new_items(records, engine)
+    except Exception as e:
+        # Unclustered items are shown as their own story
+        logger.error(f"Error clustering stories: {e}")
+
+
+def pending_records(engine: "Engine") -> List[Dict[str, Any]]:
+    """Return the rss_raw_items rows NormalizeRSSData has not processed yet."""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT id, title, description, tags FROM rss_raw_items "
+                "WHERE id NOT IN (SELECT raw_item_id FROM processed_raw_items)"
+            )
+        ).mappings().all()
+    records = []
+    for row in rows:
+        record = dict(row)
+        if isinstance(record["tags"], str):
+            record["tags"] = json.loads(record["tags"])
+        records.append(record)
+    return records
+
+
+def normalize_pending(engine: Optional["Engine"] = None) -> int:
+    """
+    Normalize everything upserted with normalize=False (e.g. by the shard
+    tasks of the pipeline DAG), then publish.
+    
+    Args:
+        engine: Existing engine to reuse across calls (optional)
+    
+    Returns:
+        Number of records normalized
+    """
+    owns_engine = engine is None
+    if owns_engine:
+        engine = init_mysql_engine(echo=False)
+    
+    try:
+        # Read before the procedure marks them processed
+        records = pending_records(engine)
+        if records:
+            normalize_records(records, engine)
+        logger.info(f"Normalized {len(records)} pending records")
+        publish_load(engine)
+    finally:
+        if owns_engine:
+            engine.dispose()
+    return len(records)
+
+
+def publish_load(engine: "Engine") -> None:
+    """
+    Count trending tags, then publish the new data version and refresh the
+    dashboard snapshot.
+    
+    Args:
+        engine: SQLAlchemy engine
+    """
+    try:
+        update_trending_tags(engine)
+    except Exception as e:
+        # The watermark did not move; the next run counts these items
+        logger.error(f"Error updating trending tags: {e}")
+    publish_data_version(engine)
+    try:
+        refresh_snapshot(engine)
+    except Exception as e:
+        # The load itself succeeded; the dashboard keeps the previous snapshot
+        logger.error(f"Error refreshing dashboard snapshot: {e}")
+
+
+def load_xml_files(
+    xml_files: List[Tuple],
+    engine: Optional["Engine"] = None
+) -> int:
+    """
+    Parse XML feeds and load them; parsing overlaps with the upserts.
+    
+    Args:
+        xml_files: List of tuples containing (file_name, file_content[, feed_id]);
+            content may be str or raw bytes
+        engine: Existing engine to reuse across calls (optional)
+        
+    Returns:
+        Number of records upserted
+    """
+    with StageChain() as chain:
+        return load_record_batches(chain.stage(parse_record_batches(xml_files), "process_raw_data"), engine)
+
+
+def main() -> None:
+    """Main execution function."""
+    arg_parser = argparse.ArgumentParser(description="Load raw RSS files from S3 into MySQL")
+    arg_parser.add_argument("--shard", help="Load only the files of this shard (see rss_feeds.feed_shards)")
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--no-normalize", action="store_true",
+        help="Only upsert to rss_raw_items; a later --normalize-only run normalizes"
+    )
+    mode.add_argument(
+        "--normalize-only", action="store_true",
+        help="Normalize and publish what earlier --no-normalize runs loaded"
+    )
+    arg_parser.add_argument(
+        "--profile", choices=PROFILE_MODES, default=PROFILE_MODE or None,
+        help="Profile the run and ship the profile next to the run report (default: RSS_PROFILE)"
+    )
+    args = arg_parser.parse_args()
+
+    setup_logging()
+    start_queued_logging()
+    keys = {feed.file_name for feed in shard_feeds(args.shard)} if args.shard else None
+    if args.normalize_only:
+        start_run("normalize")
+    else:
+        start_run(f"process_{args.shard}" if args.shard else "process")
+    start_profiling(args.profile)
+    s3 = None
+    try:
+        s3 = init_s3_client()
+        attach_log_shipping(s3)
+        if args.normalize_only:
+            normalize_pending()
+        else:
+            run_processing(s3, keys=keys, normalize=not args.no_normalize)
+        finish_profiling(s3)
+        finish_run(s3)
     except Exception as e:
         logger.error(f"Fatal error: {e}")
-        upload_log_to_s3(s3)
+        finish_profiling(s3)
+        finish_run(s3, status="error")
         raise
+    finally:
+        # Shipped in chunks when RSS_LOG_BUCKET is set, otherwise uploaded whole
+        if not finish_logging(s3):
+            upload_log_to_s3(s3)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+"""
+Opt-in profiling of a pipeline run, shipped as artifacts next to the run report.
+
+Enabled with RSS_PROFILE (or the --profile flag of the scripts):
+    cprofile  deterministic cProfile of the main thread:
+              <run>_profile.prof (pstats dump, e.g. for snakeviz) and
+              <run>_profile.pstats.txt (top functions)
+    sample    a background thread samples the stacks of every thread each
+              RSS_PROFILE_INTERVAL_MS: <run>_profile.collapsed.txt in
+              collapsed-stack format ("frame;frame;frame count"), ready for
+              flamegraph.pl or speedscope. Covers the stage_queue and
+              executor threads, which cProfile does not see.
+
+Both modes also trace allocations with tracemalloc (RSS_PROFILE_MEMORY=0
+turns that off): run_metrics then records peak_memory_bytes per stage, and
+<run>_profile.memory.txt lists the top allocation sites.
+
+Artifacts are written to RUN_REPORT_DIR and uploaded to LOG_BUCKET under the
+run report's prefix, run_reports/<run>/<started_at>.*.
+"""
+from typing import Dict, List, Optional, TYPE_CHECKING
+from collections import Counter
+from pathlib import Path
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from utils import get_logger
+from run_metrics import LOG_BUCKET, RUN_REPORT_DIR, current_run, ensure_log_bucket
+
+if TYPE_CHECKING:
+    import boto3
+    import pstats
+
+logger = get_logger("RSS_Profiling")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+PROFILE_MODES = ("cprofile", "sample")
+
+# Profiling mode; off when empty
+PROFILE_MODE = os.getenv("RSS_PROFILE", "")
+
+# Time between stack samples in "sample" mode
+PROFILE_INTERVAL_MS = float(os.getenv("RSS_PROFILE_INTERVAL_MS", 5))
+
+# Whether profiled runs also trace allocations (slows the run down noticeably)
+PROFILE_MEMORY = os.getenv("RSS_PROFILE_MEMORY", "1") != "0"
+
+# Frames kept per allocation traceback, and rows in the reports
+TRACEMALLOC_FRAMES = 1
+REPORT_TOP = 40
+
+
+class StackSampler:
+    """Samples the stacks of all other threads from a background thread."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Return the samples in collapsed-stack format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """One profiled run."""
+
+    def __init__(self, mode: str, memory: bool = PROFILE_MEMORY, interval_ms: float = PROFILE_INTERVAL_MS):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.memory = memory
+        self.interval_ms = interval_ms
+        self._cprofile = None
+        self._sampler: Optional[StackSampler] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.mode == "cprofile":
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = StackSampler(self.interval_ms / 1000)
+            self._sampler.start()
+        self._started = time.monotonic()
+        logger.info(f"Profiling this run ({self.mode}{', memory' if self.memory else ''})")
+
+    def stop(self) -> Dict[str, bytes]:
+        """
+        Stop profiling.
+
+        Returns:
+            Artifact contents keyed by file suffix (e.g. "collapsed.txt")
+        """
+        import pstats
+
+        artifacts: Dict[str, bytes] = {}
+        seconds = time.monotonic() - self._started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            stats = pstats.Stats(self._cprofile)
+            artifacts["prof"] = _dump_stats(stats)
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats("cumulative").print_stats(REPORT_TOP)
+            artifacts["pstats.txt"] = text.getvalue().encode("utf-8")
+        if self._sampler is not None:
+            self._sampler.stop()
+            artifacts["collapsed.txt"] = self._sampler.collapsed().encode("utf-8")
+            logger.info(f"Collected {self._sampler.samples} stack samples in {seconds:.1f}s")
+        if self.memory and tracemalloc.is_tracing():
+            artifacts["memory.txt"] = _memory_report().encode("utf-8")
+            tracemalloc.stop()
+        return artifacts
+
+
+def _dump_stats(stats: "pstats.Stats") -> bytes:
+    """Return a pstats dump as bytes (Stats.dump_stats only writes files)."""
+    import marshal
+
+    return marshal.dumps(stats.stats)
+
+
+def _memory_report() -> str:
+    """Describe the traced memory and the top allocation sites still alive."""
+    current, _ = tracemalloc.get_traced_memory()
+    lines = [
+        f"traced memory at the end of the run: {current / 1e6:.1f} MB "
+        f"(peaks per stage are in the run report)",
+        "",
+    ]
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ])
+    for stat in snapshot.statistics("lineno")[:REPORT_TOP]:
+        lines.append(str(stat))
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# Current Profiler
+# ============================================================================
+_profiler: Optional[Profiler] = None
+
+
+def start_profiling(mode: Optional[str] = None) -> Optional[Profiler]:
+    """
+    Start profiling the current run when a mode is given or RSS_PROFILE is set.
+
+    Call after start_run(); finish_profiling() stops it and ships the artifacts.
+
+    Args:
+        mode: "cprofile" or "sample" (defaults to RSS_PROFILE)
+
+    Returns:
+        The Profiler, or None when profiling is off
+    """
+    global _profiler
+    mode = mode or PROFILE_MODE
+    if not mode:
+        return None
+    _profiler = Profiler(mode)
+    _profiler.start()
+    return _profiler
+
+
+def finish_profiling(s3: Optional["boto3.client"] = None) -> List[Path]:
+    """
+    Stop the profiler started by start_profiling and export its artifacts.
+
+    Writes <RUN_REPORT_DIR>/<run>_profile.<suffix> and uploads each file to
+    LOG_BUCKET next to the run report. Export errors are logged, not raised.
+    Does nothing when profiling is off.
+
+    Args:
+        s3: Boto3 S3 client used to ship the artifacts (optional)
+
+    Returns:
+        Paths of the written artifacts
+    """
+    global _profiler
+    if _profiler is None:
+        return []
+    profiler, _profiler = _profiler, None
+
+    run = current_run()
+    paths = []
+    try:
+        artifacts = profiler.stop()
+        prefix = f"run_reports/{run.run_name}/{run.started_at.strftime('%Y%m%dT%H%M%SZ')}"
+        for suffix, content in artifacts.items():
+            path = Path(RUN_REPORT_DIR) / f"{run.run_name}_profile.{suffix}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            paths.append(path)
+            if ensure_log_bucket(s3):
+                s3.put_object(Bucket=LOG_BUCKET, Key=f"{prefix}.{suffix}", Body=content)
+        logger.info(f"Profile written to {', '.join(str(path) for path in paths)}")
+    except Exception as e:
+        logger.error(f"Error exporting profile: {e}")
+    return paths
@@ -0,0 +1,420 @@
+"""
+Retention for rss_raw_items and processed_raw_items.
+
+Raw rows that NormalizeRSSData has already processed and that are older than
+the retention window are moved to cold storage and deleted from the hot
+tables, in batches:
+
+- "table" mode copies them into rss_raw_items_archive (compressed rows,
+  monthly partitions; archive months past ARCHIVE_KEEP_MONTHS are purged
+  with DROP PARTITION)
+- "parquet" mode writes one zstd-compressed Parquet file per batch to S3
+
+The normalized tables (RSS_Items, RSS_Tags, Item_Tags) are not touched.
+"""
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from datetime import date, datetime, timedelta
+import argparse
+import io
+import os
+from utils import setup_logging, get_logger, init_s3_client
+from run_metrics import current_run, start_run, finish_run
+from process_raw_data_s3 import init_mysql_engine
+
+if TYPE_CHECKING:
+    import boto3
+    from sqlalchemy.engine import Connection, Engine
+
+logger = get_logger("RSS_Retention")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Raw rows older than this many days (by inserted_at) are archived
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 30))
+
+# "table" (rss_raw_items_archive) or "parquet" (S3)
+ARCHIVE_MODE = os.getenv("RETENTION_ARCHIVE_MODE", "table")
+
+# Rows moved per transaction / Parquet file
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 5000))
+
+# Months of archive partitions to keep in table mode (0 keeps everything)
+ARCHIVE_KEEP_MONTHS = int(os.getenv("RETENTION_ARCHIVE_KEEP_MONTHS", 0))
+
+# Parquet mode destination
+ARCHIVE_BUCKET = os.getenv("RETENTION_ARCHIVE_BUCKET", "rss-archive")
+ARCHIVE_PREFIX = "rss_raw_items"
+
+RAW_TABLE = "rss_raw_items"
+PROCESSED_TABLE = "processed_raw_items"
+ARCHIVE_TABLE = "rss_raw_items_archive"
+RAW_COLUMNS = [
+    "id", "source", "category", "title", "link",
+    "published_date", "description", "tags", "inserted_at",
+]
+
+
+# ============================================================================
+# Table Statistics
+# ============================================================================
+def table_sizes(conn: "Connection", tables: List[str]) -> Dict[str, int]:
+    """
+    Return data + index bytes per table, after refreshing InnoDB statistics.
+
+    Args:
+        conn: Open connection
+        tables: Table names in the current database
+
+    Returns:
+        Mapping of table name -> bytes
+    """
+    from sqlalchemy import bindparam, text
+
+    for table in tables:
+        conn.execute(text(f"ANALYZE TABLE {table}")).fetchall()
+    rows = conn.execute(
+        text(
+            "SELECT TABLE_NAME, COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0) "
+            "FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables"
+        ).bindparams(bindparam("tables", expanding=True)),
+        {"tables": tables}
+    )
+    return {name: int(size) for name, size in rows}
+
+
+def table_free_space(conn: "Connection", tables: List[str]) -> Dict[str, int]:
+    """
+    Return the free bytes inside each table's tablespace (DATA_FREE).
+
+    Deleted rows free pages that InnoDB reuses for new rows but keeps
+    allocated; OPTIMIZE TABLE returns them to the filesystem. Call after
+    table_sizes(), which refreshes the statistics.
+    """
+    from sqlalchemy import bindparam, text
+
+    rows = conn.execute(
+        text(
+            "SELECT TABLE_NAME, COALESCE(DATA_FREE, 0) FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables"
+        ).bindparams(bindparam("tables", expanding=True)),
+        {"tables": tables}
+    )
+    return {name: int(size) for name, size in rows}
+
+
+# ============================================================================
+# Archive Partitions (table mode)
+# ============================================================================
+def _partition_name(month_start: date) -> str:
+    return f"p{month_start:%Y%m}"
+
+
+def _next_month(month_start: date) -> date:
+    return (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_partitions(conn: "Connection") -> List[str]:
+    """Return the partition names of the archive table (empty if not partitioned)."""
+    from sqlalchemy import text
+
+    rows = conn.execute(
+        text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": ARCHIVE_TABLE}
+    )
+    return [name for (name,) in rows]
+
+
+def ensure_archive_partition(conn: "Connection", day: date) -> None:
+    """
+    Split the month of `day` off the catch-all pmax partition if needed.
+
+    Args:
+        conn: Open connection
+        day: Archive date that is about to be written
+    """
+    from sqlalchemy import text
+
+    partitions = archive_partitions(conn)
+    month_start = day.replace(day=1)
+    name = _partition_name(month_start)
+    if "pmax" not in partitions or name in partitions:
+        return
+
+    conn.execute(text(
+        f"ALTER TABLE {ARCHIVE_TABLE} REORGANIZE PARTITION pmax INTO ("
+        f"PARTITION {name} VALUES LESS THAN ('{_next_month(month_start):%Y-%m-%d}'), "
+        f"PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+    ))
+    logger.info(f"Created archive partition {name}")
+
+
+def drop_expired_archive_partitions(conn: "Connection", keep_months: int) -> List[str]:
+    """
+    Drop monthly archive partitions older than `keep_months` months.
+
+    Args:
+        conn: Open connection
+        keep_months: Number of months to keep, including the current one
+
+    Returns:
+        Names of the dropped partitions
+    """
+    from sqlalchemy import text
+
+    if keep_months <= 0:
+        return []
+
+    oldest_kept = date.today().replace(day=1)
+    for _ in range(keep_months - 1):
+        oldest_kept = (oldest_kept - timedelta(days=1)).replace(day=1)
+
+    expired = [
+        name for name in archive_partitions(conn)
+        if name != "pmax" and name < _partition_name(oldest_kept)
+    ]
+    for name in expired:
+        conn.execute(text(f"ALTER TABLE {ARCHIVE_TABLE} DROP PARTITION {name}"))
+        logger.info(f"Dropped archive partition {name}")
+    return expired
+
+
+# ============================================================================
+# Archiving
+# ============================================================================
+def select_expired_ids(conn: "Connection", cutoff: datetime, limit: int) -> List[str]:
+    """
+    Return ids of processed raw rows inserted before the cutoff.
+
+    Args:
+        conn: Open connection
+        cutoff: Rows inserted before this time are expired
+        limit: Maximum number of ids
+
+    Returns:
+        Raw item ids, oldest first
+    """
+    from sqlalchemy import text
+
+    rows = conn.execute(
+        text(
+            f"SELECT r.id FROM {RAW_TABLE} r "
+            f"JOIN {PROCESSED_TABLE} p ON p.raw_item_id = r.id "
+            f"WHERE r.inserted_at < :cutoff "
+            f"ORDER BY r.inserted_at LIMIT :limit"
+        ),
+        {"cutoff": cutoff, "limit": limit}
+    )
+    return [row_id for (row_id,) in rows]
+
+
+def archive_batch_to_table(conn: "Connection", ids: List[str]) -> None:
+    """Copy raw rows into the archive table."""
+    from sqlalchemy import bindparam, text
+
+    today = date.today()
+    ensure_archive_partition(conn, today)
+    columns = ", ".join(RAW_COLUMNS)
+    conn.execute(
+        text(
+            f"INSERT IGNORE INTO {ARCHIVE_TABLE} ({columns}, archived_on) "
+            f"SELECT {columns}, :archived_on FROM {RAW_TABLE} WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids, "archived_on": today}
+    )
+
+
+def archive_batch_to_parquet(
+    conn: "Connection",
+    s3: "boto3.client",
+    ids: List[str],
+    batch_number: int
+) -> int:
+    """
+    Write raw rows to S3 as one Parquet file.
+
+    Returns:
+        Size of the written object in bytes
+    """
+    import pandas as pd
+    from sqlalchemy import bindparam, text
+
+    rows = conn.execute(
+        text(f"SELECT {', '.join(RAW_COLUMNS)} FROM {RAW_TABLE} WHERE id IN :ids")
+        .bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids}
+    ).mappings().all()
+
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=RAW_COLUMNS).to_parquet(buffer, index=False, compression="zstd")
+    now = datetime.now()
+    key = (
+        f"{ARCHIVE_PREFIX}/archived_on={now:%Y-%m-%d}/"
+        f"part-{now:%H%M%S}-{batch_number:05d}.parquet"
+    )
+    s3.put_object(Bucket=ARCHIVE_BUCKET, Key=key, Body=buffer.getvalue())
+    return buffer.tell()
+
+
+def delete_batch(conn: "Connection", ids: List[str]) -> None:
+    """Delete archived rows from the hot tables."""
+    from sqlalchemy import bindparam, text
+
+    for table, column in ((PROCESSED_TABLE, "raw_item_id"), (RAW_TABLE, "id")):
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE {column} IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids}
+        )
+
+
+def run_retention(
+    engine: "Engine",
+    retention_days: int = RETENTION_DAYS,
+    mode: str = ARCHIVE_MODE,
+    s3: Optional["boto3.client"] = None,
+    dry_run: bool = False,
+    optimize: bool = False
+) -> Dict[str, Any]:
+    """
+    Move expired raw rows to cold storage and report reclaimed space.
+
+    Args:
+        engine: SQLAlchemy engine
+        retention_days: Window of raw rows kept in the hot tables
+        mode: "table" or "parquet"
+        s3: Boto3 S3 client (parquet mode)
+        dry_run: Only count the rows that would be archived
+        optimize: Run OPTIMIZE TABLE afterwards so InnoDB returns freed pages
+
+    Returns:
+        Report with rows archived and table sizes before/after
+    """
+    from sqlalchemy import text
+
+    if mode not in ("table", "parquet"):
+        raise ValueError(f"Unknown archive mode: {mode}")
+    if mode == "parquet" and s3 is None:
+        raise ValueError("Parquet mode requires an S3 client")
+
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    hot_tables = [RAW_TABLE, PROCESSED_TABLE]
+    metrics = current_run()
+
+    with engine.connect() as conn:
+        sizes_before = table_sizes(conn, hot_tables)
+        if dry_run:
+            pending = conn.execute(
+                text(
+                    f"SELECT COUNT(*) FROM {RAW_TABLE} r "
+                    f"JOIN {PROCESSED_TABLE} p ON p.raw_item_id = r.id "
+                    f"WHERE r.inserted_at < :cutoff"
+                ),
+                {"cutoff": cutoff}
+            ).scalar()
+            logger.info(f"Dry run: {pending} rows older than {cutoff:%Y-%m-%d %H:%M} would be archived")
+            return {"cutoff": cutoff.isoformat(), "rows_pending": int(pending), "sizes_before": sizes_before}
+
+    archived = 0
+    batches = 0
+    with metrics.stage("archive_raw_items"):
+        while True:
+            with engine.begin() as conn:
+                ids = select_expired_ids(conn, cutoff, RETENTION_BATCH_SIZE)
+                if not ids:
+                    break
+                if mode == "table":
+                    archive_batch_to_table(conn, ids)
+                else:
+                    written = archive_batch_to_parquet(conn, s3, ids, batches)
+                    metrics.add("archive_raw_items", bytes=written)
+                delete_batch(conn, ids)
+            archived += len(ids)
+            batches += 1
+            logger.info(f"Archived batch {batches} ({len(ids)} rows, {archived} total)")
+    metrics.add("archive_raw_items", rows=archived, batches=batches)
+
+    dropped: List[str] = []
+    if mode == "table" and ARCHIVE_KEEP_MONTHS > 0:
+        with engine.begin() as conn:
+            dropped = drop_expired_archive_partitions(conn, ARCHIVE_KEEP_MONTHS)
+
+    with engine.connect() as conn:
+        if optimize and archived:
+            with metrics.stage("optimize_tables"):
+                for table in hot_tables:
+                    conn.execute(text(f"OPTIMIZE TABLE {table}")).fetchall()
+        sizes_after = table_sizes(conn, hot_tables)
+        free_after = table_free_space(conn, hot_tables)
+
+    # Without OPTIMIZE the freed pages stay in the tablespace: the hot tables
+    # hardly shrink, and the space shows up as free (reusable) instead
+    reclaimed = sum(sizes_before.values()) - sum(sizes_after.values())
+    free_bytes = sum(free_after.values())
+    metrics.add("archive_raw_items", reclaimed_bytes=max(reclaimed, 0), free_bytes=free_bytes)
+    logger.info(
+        f"Archived {archived} raw rows older than {cutoff:%Y-%m-%d} ({mode} mode); "
+        f"hot tables {sum(sizes_before.values()) / 1e6:.1f} MB -> "
+        f"{sum(sizes_after.values()) / 1e6:.1f} MB, reclaimed {reclaimed / 1e6:.1f} MB, "
+        f"{free_bytes / 1e6:.1f} MB free in the tablespace"
+        + ("" if optimize else " (returned to the filesystem by --optimize)")
+    )
+    return {
+        "cutoff": cutoff.isoformat(),
+        "mode": mode,
+        "rows_archived": archived,
+        "batches": batches,
+        "dropped_archive_partitions": dropped,
+        "sizes_before": sizes_before,
+        "sizes_after": sizes_after,
+        "reclaimed_bytes": reclaimed,
+        "free_bytes": free_after,
+    }
+
+
+# ============================================================================
+# Main Execution
+# ============================================================================
+def main() -> None:
+    """Main execution function."""
+    arg_parser = argparse.ArgumentParser(description="Archive and purge old raw RSS rows")
+    arg_parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    arg_parser.add_argument("--mode", choices=("table", "parquet"), default=ARCHIVE_MODE)
+    arg_parser.add_argument("--dry-run", action="store_true")
+    arg_parser.add_argument(
+        "--optimize", action="store_true",
+        help="Rebuild the hot tables afterwards so the freed space is returned"
+    )
+    args = arg_parser.parse_args()
+
+    setup_logging()
+    start_run("retention")
+    s3 = None
+    engine = init_mysql_engine(echo=False)
+    try:
+        s3 = init_s3_client(ensure_bucket=ARCHIVE_BUCKET) if args.mode == "parquet" else init_s3_client()
+        run_retention(
+            engine,
+            retention_days=args.days,
+            mode=args.mode,
+            s3=s3,
+            dry_run=args.dry_run,
+            optimize=args.optimize
+        )
+        finish_run(s3)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}")
+        finish_run(s3, status="error")
+        raise
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
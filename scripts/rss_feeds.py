@@ -1,126 +1,300 @@
-RSS_FEEDS = {
+"""
+Feed registry.
+
+Every feed has a stable feed id, its source, the configured category, the
+URL and a polling hint. Whether a feed is due is decided from when it was
+last fetched (the archive object's LastModified, see
+get_xml_upload_s3.last_fetch_times), not from the wall clock, so neither the
+DAG schedule nor the ingestion service's interval changes how often a
+slow feed is fetched. The archive filename and the category stored in
+RSS_Sources are resolved once when the registry is loaded, so the fetch
+and load stages look them up instead of re-deriving them from the channel
+or reverse-parsing the filename.
+"""
+from typing import Dict, List, NamedTuple, Optional
+import json
+import os
+from utils import clean_for_filename
+from host_health import host_of
+
+# How often the pipeline DAG runs; feeds with a longer poll interval are
+# fetched once their last fetch is that old
+SCHEDULE_MINUTES = int(os.getenv("RSS_SCHEDULE_MINUTES", 5))
+
+# Most feeds per pipeline DAG shard; a host with more feeds is split into
+# several shards that share its rate limit (0: one shard per host)
+SHARD_SIZE = int(os.getenv("RSS_SHARD_SIZE", 8))
+
+# Runs start a little late or early; a feed this close to its poll interval
+# is fetched now rather than one schedule later
+DUE_SLACK_SECONDS = 30
+
+
+
+class Feed(NamedTuple):
+    """A registered feed with its precomputed resolution."""
+    feed_id: str
+    source: str
+    category: str
+    url: str
+    # Polling hint: minimum minutes between fetches
+    poll_minutes: int
+    # Object key in the raw data bucket ("source_category.xml")
+    file_name: str
+    # feed_category value in RSS_Sources (what parse_file_name gives for file_name)
+    db_category: str
+
+    def is_due(self, now: float, last_fetched: Optional[float] = None) -> bool:
+        """
+        Whether a run at `now` should fetch this feed.
+
+        Args:
+            now: Epoch seconds
+            last_fetched: Epoch seconds of the last successful fetch (None
+                if unknown, the feed is then due)
+        """
+        if self.poll_minutes <= SCHEDULE_MINUTES or last_fetched is None:
+            return True
+        return now - last_fetched >= self.poll_minutes * 60 - DUE_SLACK_SECONDS
+
+
+def make_feed(feed_id: str, source: str, category: str, url: str, poll_minutes: int = SCHEDULE_MINUTES) -> Feed:
+    """Build a Feed, resolving its filename and stored category."""
+    source_clean = clean_for_filename(source) or "unknown"
+    category_clean = clean_for_filename(category) or "unknown"
+    file_name = f"{source_clean}_{category_clean}.xml".replace("/", "-").replace("\\", "-")
+    return Feed(
+        feed_id=feed_id,
+        source=source_clean,
+        category=category,
+        url=url,
+        poll_minutes=poll_minutes,
+        file_name=file_name,
+        db_category=" ".join(category_clean.split("_")),
+    )
+
+
+# (feed id, source, category, url[, poll minutes])
+# Feed ids are stored with the archived objects; never reuse or rename one.
+FEED_DEFINITIONS = [
     # ======================
     # YNET
     # ======================
-    "news_all": "https://www.ynet.co.il/Integration/StoryRss2.xml",
-    "news_updates": "https://www.ynet.co.il/Integration/StoryRss1854.xml",
+    ("ynet.news_all", "ynet", "news_all", "https://www.ynet.co.il/Integration/StoryRss2.xml"),
+    ("ynet.news_updates", "ynet", "news_updates", "https://www.ynet.co.il/Integration/StoryRss1854.xml"),
 
-    "opinions_all": "https://www.ynet.co.il/Integration/StoryRss194.xml",
-    "צרכנות": "https://www.ynet.co.il/Integration/StoryRss5363.xml",
+    ("ynet.opinions_all", "ynet", "opinions_all", "https://www.ynet.co.il/Integration/StoryRss194.xml"),
+    ("ynet.storyrss5363", "ynet", "צרכנות", "https://www.ynet.co.il/Integration/StoryRss5363.xml"),
 
-    "sports_all": "https://www.ynet.co.il/Integration/StoryRss3.xml",
-    "sports_israeli_football": "https://www.ynet.co.il/Integration/StoryRss57.xml",
+    ("ynet.sports_all", "ynet", "sports_all", "https://www.ynet.co.il/Integration/StoryRss3.xml"),
+    ("ynet.sports_israeli_football", "ynet", "sports_israeli_football", "https://www.ynet.co.il/Integration/StoryRss57.xml"),
 
-    "תרבות ובידור": "https://www.ynet.co.il/Integration/StoryRss538.xml",
-    "הפרעת קשב": "https://www.ynet.co.il/Integration/StoryRss4450.xml",
-    "מעורבות": "https://www.ynet.co.il/Integration/StoryRss3908.xml",
+    ("ynet.storyrss538", "ynet", "תרבות ובידור", "https://www.ynet.co.il/Integration/StoryRss538.xml"),
+    ("ynet.storyrss4450", "ynet", "הפרעת קשב", "https://www.ynet.co.il/Integration/StoryRss4450.xml"),
+    ("ynet.storyrss3908", "ynet", "מעורבות", "https://www.ynet.co.il/Integration/StoryRss3908.xml"),
 
-    "involvement_all": "https://www.ynet.co.il/Integration/StoryRss3262.xml",
+    ("ynet.involvement_all", "ynet", "involvement_all", "https://www.ynet.co.il/Integration/StoryRss3262.xml"),
 
-    "home": "https://www.ynet.co.il/Integration/StoryRss4113.xml",
-    "relationships": "https://www.ynet.co.il/Integration/StoryRss4107.xml",
-    "style": "https://www.ynet.co.il/Integration/StoryRss4104.xml",
-    "laisha": "https://www.ynet.co.il/Integration/StoryRss4111.xml",
-    "health": "https://www.ynet.co.il/Integration/StoryRss1208.xml",
+    ("ynet.home", "ynet", "home", "https://www.ynet.co.il/Integration/StoryRss4113.xml"),
+    ("ynet.relationships", "ynet", "relationships", "https://www.ynet.co.il/Integration/StoryRss4107.xml"),
+    ("ynet.style", "ynet", "style", "https://www.ynet.co.il/Integration/StoryRss4104.xml"),
+    ("ynet.laisha", "ynet", "laisha", "https://www.ynet.co.il/Integration/StoryRss4111.xml"),
+    ("ynet.health", "ynet", "health", "https://www.ynet.co.il/Integration/StoryRss1208.xml"),
 
-    "environment": "https://www.ynet.co.il/Integration/StoryRss4879.xml",
-    "animals": "https://www.ynet.co.il/Integration/StoryRss4880.xml",
+    ("ynet.environment", "ynet", "environment", "https://www.ynet.co.il/Integration/StoryRss4879.xml"),
+    ("ynet.animals", "ynet", "animals", "https://www.ynet.co.il/Integration/StoryRss4880.xml"),
 
-    "digital": "https://www.ynet.co.il/Integration/StoryRss544.xml",
-    "reviews": "https://www.ynet.co.il/Integration/StoryRss2424.xml",
-    "internet": "https://www.ynet.co.il/Integration/StoryRss546.xml",
-    "games": "https://www.ynet.co.il/Integration/StoryRss571.xml",
+    ("ynet.digital", "ynet", "digital", "https://www.ynet.co.il/Integration/StoryRss544.xml"),
+    ("ynet.reviews", "ynet", "reviews", "https://www.ynet.co.il/Integration/StoryRss2424.xml"),
+    ("ynet.internet", "ynet", "internet", "https://www.ynet.co.il/Integration/StoryRss546.xml"),
+    ("ynet.games", "ynet", "games", "https://www.ynet.co.il/Integration/StoryRss571.xml"),
 
-    "מגזין": "https://www.ynet.co.il/Integration/StoryRss545.xml",
-    "guides": "https://www.ynet.co.il/Integration/StoryRss786.xml",
-    "cars": "https://www.ynet.co.il/Integration/StoryRss550.xml",
-    "vacations_and_travel": "https://www.ynet.co.il/Integration/StoryRss598.xml",
-    "parents": "https://www.ynet.co.il/Integration/StoryRss3052.xml",
+    ("ynet.storyrss545", "ynet", "מגזין", "https://www.ynet.co.il/Integration/StoryRss545.xml"),
+    ("ynet.guides", "ynet", "guides", "https://www.ynet.co.il/Integration/StoryRss786.xml"),
+    ("ynet.cars", "ynet", "cars", "https://www.ynet.co.il/Integration/StoryRss550.xml"),
+    ("ynet.vacations_and_travel", "ynet", "vacations_and_travel", "https://www.ynet.co.il/Integration/StoryRss598.xml"),
+    ("ynet.parents", "ynet", "parents", "https://www.ynet.co.il/Integration/StoryRss3052.xml"),
 
-    "food": "https://www.ynet.co.il/Integration/StoryRss975.xml",
-    "jewish": "https://www.ynet.co.il/Integration/StoryRss4403.xml",
-    "economy": "https://www.ynet.co.il/Integration/StoryRss6.xml",
-    "science": "https://www.ynet.co.il/Integration/StoryRss2142.xml",
+    ("ynet.food", "ynet", "food", "https://www.ynet.co.il/Integration/StoryRss975.xml"),
+    ("ynet.jewish", "ynet", "jewish", "https://www.ynet.co.il/Integration/StoryRss4403.xml"),
+    ("ynet.economy", "ynet", "economy", "https://www.ynet.co.il/Integration/StoryRss6.xml"),
+    ("ynet.science", "ynet", "science", "https://www.ynet.co.il/Integration/StoryRss2142.xml"),
 
     # ======================
     # YNETNEWS (EN)
     # ======================
-    "news_english": "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3082/",
-    "updates_english": "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3089/",
-    "opinion_english": "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3084/",
-    "culture_english": "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3086/",
-    "jewish_english": "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3443/",
+    ("ynetnews.news_english", "ynetnews", "news_english", "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3082/"),
+    ("ynetnews.updates_english", "ynetnews", "updates_english", "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3089/"),
+    ("ynetnews.opinion_english", "ynetnews", "opinion_english", "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3084/"),
+    ("ynetnews.culture_english", "ynetnews", "culture_english", "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3086/"),
+    ("ynetnews.jewish_english", "ynetnews", "jewish_english", "https://www.ynet.co.il/3rdparty/mobile/rss/ynetnews/3443/"),
 
     # ======================
     # WALLA
     # ======================
-    "חדשות בארץ - כל החדשות והעדכונים 24/7 אונליין": "https://rss.walla.co.il/feed/1",
-    "מבזקי חדשות": "https://rss.walla.co.il/feed/22",
-    "כל החדשות העדכניות בתחומי צבא ושירותי הביטחון": "https://rss.walla.co.il/feed/2689",
-    "כל החדשות בתחום הפוליטי מדיני": "https://rss.walla.co.il/feed/2686",
-    "חדשות בעולם - כל העדכונים והדיווחים מסביב לעולם": "https://rss.walla.co.il/feed/2",
-    "כתבות בנושאי חדשות ועדכונים עסקיים": "https://rss.walla.co.il/feed/557",
-    "דעות ופרשנויות": "https://rss.walla.co.il/feed/4996",
-    "רישיונות, ביטוח ומשפט": "https://rss.walla.co.il/feed/4715",
+    ("walla.feed1", "walla", "חדשות בארץ - כל החדשות והעדכונים 24/7 אונליין", "https://rss.walla.co.il/feed/1"),
+    ("walla.feed22", "walla", "מבזקי חדשות", "https://rss.walla.co.il/feed/22"),
+    ("walla.feed2689", "walla", "כל החדשות העדכניות בתחומי צבא ושירותי הביטחון", "https://rss.walla.co.il/feed/2689"),
+    ("walla.feed2686", "walla", "כל החדשות בתחום הפוליטי מדיני", "https://rss.walla.co.il/feed/2686"),
+    ("walla.feed2", "walla", "חדשות בעולם - כל העדכונים והדיווחים מסביב לעולם", "https://rss.walla.co.il/feed/2"),
+    ("walla.feed557", "walla", "כתבות בנושאי חדשות ועדכונים עסקיים", "https://rss.walla.co.il/feed/557"),
+    ("walla.feed4996", "walla", "דעות ופרשנויות", "https://rss.walla.co.il/feed/4996"),
+    ("walla.feed4715", "walla", "רישיונות, ביטוח ומשפט", "https://rss.walla.co.il/feed/4715"),
 
-    "וואלה כסף": "https://rss.walla.co.il/feed/3",
-    "כדורגל ישראלי - חדשות ועדכונים": "https://rss.walla.co.il/feed/156",
-    "כדורגל עולמי- חדשות ועדכונים": "https://rss.walla.co.il/feed/316",
-    "כדורסל: חדשות, סרטונים, כתבות": "https://rss.walla.co.il/feed/151",
-    "חדשות NBA": "https://rss.walla.co.il/feed/175",
-    "ישראלים בNBA": "https://rss.walla.co.il/feed/13444",
-    "טניס: חדשות, סרטונים וכתבות": "https://rss.walla.co.il/feed/152",
+    ("walla.feed3", "walla", "וואלה כסף", "https://rss.walla.co.il/feed/3"),
+    ("walla.feed156", "walla", "כדורגל ישראלי - חדשות ועדכונים", "https://rss.walla.co.il/feed/156"),
+    ("walla.feed316", "walla", "כדורגל עולמי- חדשות ועדכונים", "https://rss.walla.co.il/feed/316"),
+    ("walla.feed151", "walla", "כדורסל: חדשות, סרטונים, כתבות", "https://rss.walla.co.il/feed/151"),
+    ("walla.feed175", "walla", "חדשות NBA", "https://rss.walla.co.il/feed/175"),
+    ("walla.feed13444", "walla", "ישראלים בNBA", "https://rss.walla.co.il/feed/13444"),
+    ("walla.feed152", "walla", "טניס: חדשות, סרטונים וכתבות", "https://rss.walla.co.il/feed/152"),
 
-    "סקירות": "https://rss.walla.co.il/feed/4001",
-    "המדריך המלא בנושא הסייבר": "https://rss.walla.co.il/feed/12765",
-    "המדריך המלא לסטארטאפים בעולם ההייטק הישראלי": "https://rss.walla.co.il/feed/12766",
+    ("walla.feed4001", "walla", "סקירות", "https://rss.walla.co.il/feed/4001"),
+    ("walla.feed12765", "walla", "המדריך המלא בנושא הסייבר", "https://rss.walla.co.il/feed/12765", 60),
+    ("walla.feed12766", "walla", "המדריך המלא לסטארטאפים בעולם ההייטק הישראלי", "https://rss.walla.co.il/feed/12766", 60),
 
-    "חדשות פוליטיקה וממשל - כל העדכונים, המידע והפרשנויות": "https://rss.walla.co.il/feed/9",
-    "חדשות האוכל": "https://rss.walla.co.il/feed/905",
-    "משחקי בישול": "https://rss.walla.co.il/feed/2309",
+    ("walla.feed9", "walla", "חדשות פוליטיקה וממשל - כל העדכונים, המידע והפרשנויות", "https://rss.walla.co.il/feed/9"),
+    ("walla.feed905", "walla", "חדשות האוכל", "https://rss.walla.co.il/feed/905"),
+    ("walla.feed2309", "walla", "משחקי בישול", "https://rss.walla.co.il/feed/2309"),
 
-    "מדינות אירופה והאיחוד האירופי - חדשות ועדכונים": "https://rss.walla.co.il/feed/14",
-    "המדריך המלא לטיולים בארץ: מסלולים, המלצות וטיפים": "https://rss.walla.co.il/feed/5735",
+    ("walla.feed14", "walla", "מדינות אירופה והאיחוד האירופי - חדשות ועדכונים", "https://rss.walla.co.il/feed/14"),
+    ("walla.feed5735", "walla", "המדריך המלא לטיולים בארץ: מסלולים, המלצות וטיפים", "https://rss.walla.co.il/feed/5735", 60),
 
     # ======================
     # MAKO / MAARIV / HAMAL
     # ======================
-    "חדשות - פוליטי": "https://rcs.mako.co.il/rss/news-military.xml",
-    "חדשות מהארץ והעולם": "https://www.maariv.co.il/rss/rsschadashot",
-    "כלכלה": "https://www.maariv.co.il/rss/rssfeedsasakim",
-     # ======================
+    ("mako.news-military", "mako", "חדשות - פוליטי", "https://rcs.mako.co.il/rss/news-military.xml"),
+    ("maariv.rsschadashot", "maariv", "חדשות מהארץ והעולם", "https://www.maariv.co.il/rss/rsschadashot"),
+    ("maariv.rssfeedsasakim", "maariv", "כלכלה", "https://www.maariv.co.il/rss/rssfeedsasakim"),
+    # ======================
     # HAARETZ – Main
     # ======================
-    "main": "https://www.haaretz.co.il/srv/rss---feedly",
+    ("haaretz.main", "haaretz", "main", "https://www.haaretz.co.il/srv/rss---feedly"),
 
     # ======================
     # HAARETZ – Economy
     # ======================
-    "labels": "http://haaretz.co.il/srv/lableshtz",
+    ("haaretz.labels", "haaretz", "labels", "http://haaretz.co.il/srv/lableshtz"),
 
     # ======================
     # HAARETZ – Culture
     # ======================
-    "culture": "https://www.haaretz.co.il/srv/htz---culture---rss",
-    "books": "https://www.haaretz.co.il/srv/%D7%A1%D7%A4%D7%A8%D7%99%D7%9D--%D7%94%D7%90%D7%A8%D7%A5-rss",
+    ("haaretz.culture", "haaretz", "culture", "https://www.haaretz.co.il/srv/htz---culture---rss"),
+    ("haaretz.books", "haaretz", "books", "https://www.haaretz.co.il/srv/%D7%A1%D7%A4%D7%A8%D7%99%D7%9D--%D7%94%D7%90%D7%A8%D7%A5-rss", 60),
 
     # ======================
     # HAARETZ – Opinion
     # ======================
-    "opinion": "https://www.haaretz.co.il/srv/rss-opinion",
+    ("haaretz.opinion", "haaretz", "opinion", "https://www.haaretz.co.il/srv/rss-opinion"),
 
     # ======================
     # HAARETZ – Lifestyle
     # ======================
-    "food": "https://www.haaretz.co.il/srv/%D7%90%D7%95%D7%9B%D7%9C--%D7%94%D7%90%D7%A8%D7%A5-rss",
-    "health": "https://www.haaretz.co.il/srv/%D7%91%D7%A8%D7%99%D7%90%D7%95%D7%AA--%D7%94%D7%90%D7%A8%D7%A5-rss",
-    "family": "https://www.haaretz.co.il/srv/rss---%D7%9E%D7%A9%D7%A4%D7%97%D7%94",
+    ("haaretz.food", "haaretz", "food", "https://www.haaretz.co.il/srv/%D7%90%D7%95%D7%9B%D7%9C--%D7%94%D7%90%D7%A8%D7%A5-rss"),
+    ("haaretz.health", "haaretz", "health", "https://www.haaretz.co.il/srv/%D7%91%D7%A8%D7%99%D7%90%D7%95%D7%AA--%D7%94%D7%90%D7%A8%D7%A5-rss"),
+    ("haaretz.family", "haaretz", "family", "https://www.haaretz.co.il/srv/rss---%D7%9E%D7%A9%D7%A4%D7%97%D7%94"),
 
     # ======================
     # HAARETZ – Sports
     # ======================
-    "sports": "https://www.haaretz.co.il/srv/%D7%A1%D7%A4%D7%95%D7%A8%D7%98--%D7%94%D7%90%D7%A8%D7%A5-rss",
+    ("haaretz.sports", "haaretz", "sports", "https://www.haaretz.co.il/srv/%D7%A1%D7%A4%D7%95%D7%A8%D7%98--%D7%94%D7%90%D7%A8%D7%A5-rss"),
+
+    ("haaretz.travel", "haaretz", "travel", "https://www.haaretz.co.il/srv/%D7%98%D7%99%D7%95%D7%9C%D7%99%D7%9D---%D7%94%D7%90%D7%A8%D7%A5-rss"),
+    ("haaretz.weekend", "haaretz", "weekend", "https://www.haaretz.co.il/srv/%D7%A1%D7%95%D7%A3-%D7%A9%D7%91%D7%95%D7%A2---%D7%94%D7%90%D7%A8%D7%A5-rss", 60),]
+
+
+def load_registry(definitions=FEED_DEFINITIONS) -> Dict[str, Feed]:
+    """
+    Build the registry keyed by feed id.
+
+    Raises:
+        ValueError: If two feeds share a feed id or an archive filename
+            (one would silently overwrite the other)
+    """
+    registry: Dict[str, Feed] = {}
+    file_names: Dict[str, str] = {}
+    for definition in definitions:
+        feed = make_feed(*definition)
+        if feed.feed_id in registry:
+            raise ValueError(f"Duplicate feed id: {feed.feed_id}")
+        if feed.file_name in file_names:
+            raise ValueError(
+                f"Feeds {file_names[feed.file_name]} and {feed.feed_id} share the filename {feed.file_name}"
+            )
+        registry[feed.feed_id] = feed
+        file_names[feed.file_name] = feed.feed_id
+    return registry
+
+
+FEEDS: Dict[str, Feed] = load_registry()
+
+
+def feeds_by_file() -> Dict[str, Feed]:
+    """Return the registered feeds keyed by archive filename."""
+    return {feed.file_name: feed for feed in FEEDS.values()}
+
+
+
+def feed_shards(shard_size: int = SHARD_SIZE) -> Dict[str, List[str]]:
+    """
+    Split the registry into shards of feed ids, grouped by feed host.
+
+    A host with more than `shard_size` feeds is split into several shards of
+    about equal size, named "<host>:1", "<host>:2", ...; a host that fits in
+    one shard is named after the host. Shards of one host run at the same
+    time, so each gets an equal share of the host's rate limit (see
+    shard_hosts and host_health.HostHealth.split_rate).
+
+    Args:
+        shard_size: Most feeds per shard; 0 makes one shard per host
+
+    Returns:
+        Mapping of shard name -> feed ids, in registry order
+    """
+    by_host: Dict[str, List[str]] = {}
+    for feed in FEEDS.values():
+        by_host.setdefault(host_of(feed.url) or "unknown", []).append(feed.feed_id)
+
+    shards: Dict[str, List[str]] = {}
+    for host, feed_ids in by_host.items():
+        parts = -(-len(feed_ids) // shard_size) if shard_size > 0 else 1
+        if parts == 1:
+            shards[host] = feed_ids
+            continue
+        size = len(feed_ids)
+        for part in range(parts):
+            shards[f"{host}:{part + 1}"] = feed_ids[part * size // parts:(part + 1) * size // parts]
+    return shards
+
+
+def shard_hosts(shard: str) -> Dict[str, int]:
+    """
+    Return the hosts of a shard and how many shards each host is split into.
+
+    Raises:
+        ValueError: If there is no such shard
+    """
+    shards = feed_shards()
+    hosts = {host_of(feed.url) or "unknown" for feed in shard_feeds(shard)}
+    return {
+        host: sum(1 for name in shards if name == host or name.startswith(f"{host}:"))
+        for host in hosts
+    }
+
+
+def shard_feeds(shard: str) -> List[Feed]:
+    """
+    Return the feeds of a shard named by feed_shards().
+
+    Raises:
+        ValueError: If there is no such shard
+    """
+    shards = feed_shards()
+    if shard not in shards:
+        raise ValueError(f"Unknown shard {shard!r}, expected one of: {', '.join(shards)}")
+    return [FEEDS[feed_id] for feed_id in shards[shard]]
+
 
-    "travel": "https://www.haaretz.co.il/srv/%D7%98%D7%99%D7%95%D7%9C%D7%99%D7%9D---%D7%94%D7%90%D7%A8%D7%A5-rss",
-    "weekend": "https://www.haaretz.co.il/srv/%D7%A1%D7%95%D7%A3-%D7%A9%D7%91%D7%95%D7%A2---%D7%94%D7%90%D7%A8%D7%A5-rss",
-}
\ No newline at end of file
+if __name__ == "__main__":
+    # Shard names for the pipeline DAG, as a JSON list
+    print(json.dumps(list(feed_shards())))
@@ -0,0 +1,160 @@
+"""
+Combined extract → load pipeline: fetched feeds go straight to the parser in
+the same process, while the raw XML is archived to S3 in the background.
+
+This is also the lean entry point: the record-based load path never imports
+pandas.
+"""
+from typing import List, Tuple, Optional, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import os
+import time
+from utils import setup_logging, get_logger, init_s3_client, upload_log_to_s3
+from rss_feeds import FEEDS
+from get_xml_upload_s3 import RAW_DATA_BUCKET, fetch_with_retry, last_fetch_times, upload_to_s3
+from host_health import host_health
+from process_raw_data_s3 import load_xml_files
+from run_metrics import current_run, start_run, finish_run
+from log_queue import attach_log_shipping, finish_logging, start_queued_logging
+
+if TYPE_CHECKING:
+    import boto3
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_Pipeline")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Background threads writing the raw archive to S3
+ARCHIVE_UPLOAD_WORKERS = int(os.getenv("ARCHIVE_UPLOAD_WORKERS", 4))
+
+
+# ============================================================================
+# Archive Side Channel
+# ============================================================================
+def _log_archive_failure(filename: str, future: Future) -> None:
+    """Log a failed background archive upload."""
+    if future.exception():
+        logger.error(f"Background archive of {filename} failed: {future.exception()}")
+
+
+def archive_in_background(
+    executor: ThreadPoolExecutor,
+    s3: "boto3.client",
+    filename: str,
+    xml_data: bytes,
+    feed_id: str
+) -> Future:
+    """
+    Schedule an S3 archive upload without blocking the caller.
+
+    Args:
+        executor: Executor running the uploads
+        s3: Boto3 S3 client
+        filename: Object key in the raw data bucket
+        xml_data: XML data as bytes
+        feed_id: Registry id stored as the object's feed-id metadata
+
+    Returns:
+        Future of the upload
+    """
+    future = executor.submit(
+        upload_to_s3, s3, RAW_DATA_BUCKET, filename, xml_data, metadata={"feed-id": feed_id}
+    )
+    future.add_done_callback(lambda f: _log_archive_failure(filename, f))
+    return future
+
+
+# ============================================================================
+# Pipeline
+# ============================================================================
+def run_combined_cycle(
+    s3: "boto3.client",
+    archive_executor: ThreadPoolExecutor,
+    engine: Optional["Engine"] = None
+) -> Tuple[int, List[Future]]:
+    """
+    Fetch every feed, archive it asynchronously and load it directly.
+
+    Args:
+        s3: Boto3 S3 client
+        archive_executor: Executor for background archive uploads
+        engine: Existing engine to reuse across calls (optional)
+
+    Returns:
+        Tuple of (records upserted, pending archive upload futures)
+    """
+    xml_files: List[Tuple[str, bytes, str]] = []
+    archive_futures: List[Future] = []
+    host_health(engine)
+    now = time.time()
+    last_fetched = last_fetch_times(s3)
+    due_feeds = [feed for feed in FEEDS.values() if feed.is_due(now, last_fetched.get(feed.file_name))]
+
+    try:
+        with current_run().stage("get_rss_xml"):
+            for feed in due_feeds:
+                try:
+                    fetched = fetch_with_retry(feed)
+                except Exception as e:
+                    logger.error(f"Error processing {feed.feed_id}: {e}")
+                    continue
+                if not fetched:
+                    continue
+
+                filename, xml_data = fetched
+                xml_files.append((filename, xml_data, feed.feed_id))
+                archive_futures.append(
+                    archive_in_background(archive_executor, s3, filename, xml_data, feed.feed_id)
+                )
+    finally:
+        host_health().save()
+
+    current_run().add(
+        "get_rss_xml",
+        errors=len(due_feeds) - len(xml_files),
+        feeds=len(due_feeds),
+        feeds_ok=len(xml_files)
+    )
+
+    logger.info(f"Fetched {len(xml_files)}/{len(due_feeds)} feeds, loading in-process")
+
+    if not xml_files:
+        return 0, archive_futures
+
+    return load_xml_files(xml_files, engine=engine), archive_futures
+
+
+# ============================================================================
+# Main Execution
+# ============================================================================
+def main() -> None:
+    """Main execution function."""
+    setup_logging()
+    start_queued_logging()
+    start_run("pipeline")
+    s3 = init_s3_client(ensure_bucket=RAW_DATA_BUCKET)
+    attach_log_shipping(s3)
+    with ThreadPoolExecutor(
+        max_workers=ARCHIVE_UPLOAD_WORKERS, thread_name_prefix="s3-archive"
+    ) as archive_executor:
+        try:
+            records, archive_futures = run_combined_cycle(s3, archive_executor)
+            logger.info(f"Loaded {records} records")
+            # The process must not exit before the archive is durable
+            wait(archive_futures)
+            finish_run(s3)
+        except Exception as e:
+            logger.error(f"Fatal error: {e}")
+            finish_run(s3, status="error")
+            raise
+        finally:
+            # Shipped in chunks when RSS_LOG_BUCKET is set, otherwise uploaded whole
+            if not finish_logging(s3):
+                upload_log_to_s3(s3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Run ledger: which units of work (feeds, S3 files, rows) a run completed.
+
+Airflow re-runs a failed task with the same dag run id, which it exports as
+AIRFLOW_CTX_DAG_RUN_ID. The scripts record each unit in etl_run_ledger
+under that id and, on a retry, skip the units already marked done, so only
+the failed feeds and files are redone.
+
+Outside Airflow (no run id) the ledger is disabled and every unit runs.
+Ledger errors are logged, never raised: losing a checkpoint only means
+redoing idempotent work.
+"""
+from typing import Iterable, Optional, Set, TYPE_CHECKING
+import os
+from utils import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = get_logger("RSS_Run_Ledger")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+LEDGER_TABLE = "etl_run_ledger"
+
+# Ledger rows older than this are deleted when a ledger is opened
+LEDGER_KEEP_DAYS = int(os.getenv("RUN_LEDGER_KEEP_DAYS", 7))
+
+# Rows per executemany batch
+LEDGER_BATCH_SIZE = 500
+
+# etl_run_ledger.error is VARCHAR(1024)
+MAX_ERROR_LENGTH = 1024
+
+DONE = "done"
+FAILED = "failed"
+
+
+def current_run_id() -> str:
+    """Return the Airflow dag run id (or RSS_RUN_ID), empty when not set."""
+    return os.getenv("AIRFLOW_CTX_DAG_RUN_ID") or os.getenv("RSS_RUN_ID", "")
+
+
+class RunLedger:
+    """Checkpoints of one stage of one run."""
+
+    def __init__(self, engine: Optional["Engine"], run_id: str, stage: str):
+        self.engine = engine
+        self.run_id = run_id
+        self.stage = stage
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engine is not None and self.run_id)
+
+    def completed(self) -> Set[str]:
+        """Return the units this stage already finished in this run."""
+        done = self._units(DONE, prune=True)
+        if done:
+            logger.info(f"Resuming run {self.run_id}: {len(done)} {self.stage} units already done")
+        return done
+
+    def failed(self) -> Set[str]:
+        """Return the units an earlier attempt of this run failed (and no attempt finished)."""
+        return self._units(FAILED)
+
+    def _units(self, status: str, prune: bool = False) -> Set[str]:
+        from sqlalchemy import text
+
+        if not self.enabled:
+            return set()
+        try:
+            with self.engine.begin() as conn:
+                if prune:
+                    conn.execute(
+                        text(f"DELETE FROM {LEDGER_TABLE} WHERE updated_at < NOW() - INTERVAL :days DAY"),
+                        {"days": LEDGER_KEEP_DAYS}
+                    )
+                rows = conn.execute(
+                    text(
+                        f"SELECT unit FROM {LEDGER_TABLE} "
+                        f"WHERE run_id = :run_id AND stage = :stage AND status = :status"
+                    ),
+                    {"run_id": self.run_id, "stage": self.stage, "status": status}
+                )
+                return {unit for unit, in rows}
+        except Exception as e:
+            logger.warning(f"Could not read the run ledger, running every unit: {e}")
+            return set()
+
+    def mark(self, units: Iterable[str], status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of units; a unit seen again gets its attempts bumped."""
+        from sqlalchemy import text
+
+        units = sorted(set(units))
+        if not self.enabled or not units:
+            return
+        rows = [
+            {
+                "run_id": self.run_id,
+                "stage": self.stage,
+                "unit": unit,
+                "status": status,
+                "error": error[:MAX_ERROR_LENGTH] if error else None,
+            }
+            for unit in units
+        ]
+        try:
+            with self.engine.begin() as conn:
+                for start in range(0, len(rows), LEDGER_BATCH_SIZE):
+                    conn.execute(
+                        text(
+                            f"INSERT INTO {LEDGER_TABLE} (run_id, stage, unit, status, error) "
+                            f"VALUES (:run_id, :stage, :unit, :status, :error) "
+                            f"ON DUPLICATE KEY UPDATE status = VALUES(status), error = VALUES(error), "
+                            f"attempts = attempts + 1"
+                        ),
+                        rows[start:start + LEDGER_BATCH_SIZE]
+                    )
+        except Exception as e:
+            logger.warning(f"Could not update the run ledger ({len(rows)} {self.stage} units): {e}")
+
+
+def open_ledger(stage: str, engine: Optional["Engine"] = None) -> RunLedger:
+    """
+    Return the ledger of a stage for the current run.
+
+    Args:
+        stage: Stage name (e.g. "fetch_feed", "process_file")
+        engine: Engine to use; one is created when a run id is set and
+            no engine is given
+
+    Returns:
+        A RunLedger (disabled when there is no run id)
+    """
+    run_id = current_run_id()
+    if run_id and engine is None:
+        from process_raw_data_s3 import init_mysql_engine
+
+        try:
+            engine = init_mysql_engine(echo=False)
+        except Exception as e:
+            logger.warning(f"Run ledger disabled, no database: {e}")
+    return RunLedger(engine, run_id, stage)
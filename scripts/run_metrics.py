@@ -0,0 +1,369 @@
+"""
+Structured per-run instrumentation for the ETL: stage durations, counters
+(bytes, items, errors) and per-feed latency, exported as a JSON run report
+and optionally as Prometheus textfile metrics. While tracemalloc is tracing
+(see profiling), stages also record their peak traced memory.
+"""
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import os
+import threading
+import time
+import tracemalloc
+from utils import get_logger
+
+if TYPE_CHECKING:
+    import boto3
+
+logger = get_logger("RSS_Metrics")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Local directory for JSON run reports (next to the pipeline log)
+RUN_REPORT_DIR = os.getenv("RSS_RUN_REPORT_DIR", "logs")
+
+# Bucket the reports, the chunked log and profiles are shipped to (created on
+# first use). Unset by default: reports stay next to the local log and the
+# log is uploaded whole by utils.upload_log_to_s3, as before
+LOG_BUCKET = os.getenv("RSS_LOG_BUCKET", "")
+
+# node_exporter textfile collector directory; Prometheus export is off when unset
+PROMETHEUS_TEXTFILE_DIR = os.getenv("RSS_PROMETHEUS_TEXTFILE_DIR", "")
+
+
+# ============================================================================
+# Run Metrics
+# ============================================================================
+class RunMetrics:
+    """Collects timings and counters for one pipeline run. Thread-safe."""
+
+    def __init__(self, run_name: str):
+        self.run_name = run_name
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.status = "running"
+        self._started = time.monotonic()
+        self._duration: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._feeds: List[Dict[str, Any]] = []
+        # Peak traced memory of every open stage, keyed by a token per call
+        self._open_peaks: Dict[object, int] = {}
+
+    def _stage_entry(self, name: str) -> Dict[str, Any]:
+        """Return the mutable entry of a stage, creating it if needed."""
+        if name not in self._stages:
+            self._stages[name] = {"calls": 0, "duration_seconds": 0.0, "errors": 0, "counters": {}}
+        return self._stages[name]
+
+    def _fold_memory_peak(self) -> None:
+        """Credit the traced peak so far to every open stage, then restart it. Caller holds the lock."""
+        _, peak = tracemalloc.get_traced_memory()
+        for token, open_peak in self._open_peaks.items():
+            self._open_peaks[token] = max(open_peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a pipeline stage; repeated calls accumulate.
+
+        While tracemalloc is tracing, the largest traced memory seen while
+        any call of the stage was open is kept as peak_memory_bytes. Stages
+        running at the same time (threads) share the process-wide figure.
+
+        Args:
+            name: Stage name (usually the instrumented function name)
+        """
+        token = object()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            with self._lock:
+                self._fold_memory_peak()
+                self._open_peaks[token] = tracemalloc.get_traced_memory()[0]
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.add(name, errors=1)
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                entry = self._stage_entry(name)
+                entry["calls"] += 1
+                entry["duration_seconds"] += elapsed
+                if tracing and tracemalloc.is_tracing():
+                    self._fold_memory_peak()
+                    peak = self._open_peaks.pop(token)
+                    entry["peak_memory_bytes"] = max(entry.get("peak_memory_bytes", 0), peak)
+                else:
+                    self._open_peaks.pop(token, None)
+
+    def add(self, stage: str, errors: int = 0, **counters: int) -> None:
+        """
+        Increment counters of a stage.
+
+        Args:
+            stage: Stage name
+            errors: Number of errors to record
+            **counters: Named counters, e.g. bytes=1024, items=30
+        """
+        with self._lock:
+            entry = self._stage_entry(stage)
+            entry["errors"] += errors
+            for key, value in counters.items():
+                entry["counters"][key] = entry["counters"].get(key, 0) + value
+
+    def observe_feed(
+        self,
+        feed: str,
+        url: str,
+        seconds: float,
+        num_bytes: int = 0,
+        ok: bool = True,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Record the outcome of fetching a single feed.
+
+        Args:
+            feed: Feed name
+            url: Feed URL
+            seconds: Fetch latency
+            num_bytes: Size of the fetched document
+            ok: Whether the fetch succeeded
+            error: Error description for failed fetches
+        """
+        with self._lock:
+            self._feeds.append({
+                "feed": feed,
+                "url": url,
+                "seconds": round(seconds, 4),
+                "bytes": num_bytes,
+                "ok": ok,
+                "error": error,
+            })
+
+    def finish(self, status: str = "ok") -> None:
+        """Mark the run as finished."""
+        self.status = status
+        self.finished_at = datetime.now(timezone.utc)
+        self._duration = time.monotonic() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the run report as a JSON-serializable dictionary."""
+        with self._lock:
+            stages = {
+                name: dict(entry, duration_seconds=round(entry["duration_seconds"], 4),
+                           counters=dict(entry["counters"]))
+                for name, entry in self._stages.items()
+            }
+            feeds = list(self._feeds)
+        duration = self._duration if self._duration is not None else time.monotonic() - self._started
+        return {
+            "run": self.run_name,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": round(duration, 4),
+            "stages": stages,
+            "feeds": {
+                "total": len(feeds),
+                "failed": sum(1 for feed in feeds if not feed["ok"]),
+                "bytes": sum(feed["bytes"] for feed in feeds),
+                "slowest": sorted(feeds, key=lambda feed: feed["seconds"], reverse=True)[:10],
+                "all": feeds,
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the run as Prometheus text exposition format."""
+        report = self.to_dict()
+        run = _label(self.run_name)
+        lines = [
+            "# HELP rss_etl_run_duration_seconds Duration of the last run",
+            "# TYPE rss_etl_run_duration_seconds gauge",
+            f'rss_etl_run_duration_seconds{{run="{run}"}} {report["duration_seconds"]}',
+            "# HELP rss_etl_run_success Whether the last run succeeded",
+            "# TYPE rss_etl_run_success gauge",
+            f'rss_etl_run_success{{run="{run}"}} {1 if report["status"] == "ok" else 0}',
+            "# HELP rss_etl_last_run_timestamp_seconds Finish time of the last run",
+            "# TYPE rss_etl_last_run_timestamp_seconds gauge",
+            f'rss_etl_last_run_timestamp_seconds{{run="{run}"}} {int(time.time())}',
+            "# HELP rss_etl_stage_duration_seconds Time spent per stage in the last run",
+            "# TYPE rss_etl_stage_duration_seconds gauge",
+        ]
+        for name, entry in report["stages"].items():
+            lines.append(
+                f'rss_etl_stage_duration_seconds{{run="{run}",stage="{_label(name)}"}} '
+                f'{entry["duration_seconds"]}'
+            )
+        lines += [
+            "# HELP rss_etl_stage_errors Errors per stage in the last run",
+            "# TYPE rss_etl_stage_errors gauge",
+        ]
+        for name, entry in report["stages"].items():
+            lines.append(f'rss_etl_stage_errors{{run="{run}",stage="{_label(name)}"}} {entry["errors"]}')
+        lines += [
+            "# HELP rss_etl_stage_count Stage counters (bytes, items, ...) in the last run",
+            "# TYPE rss_etl_stage_count gauge",
+        ]
+        for name, entry in report["stages"].items():
+            for key, value in entry["counters"].items():
+                lines.append(
+                    f'rss_etl_stage_count{{run="{run}",stage="{_label(name)}",counter="{_label(key)}"}} {value}'
+                )
+        memory_stages = {name: entry for name, entry in report["stages"].items() if "peak_memory_bytes" in entry}
+        if memory_stages:
+            lines += [
+                "# HELP rss_etl_stage_peak_memory_bytes Peak traced memory per stage in the last (profiled) run",
+                "# TYPE rss_etl_stage_peak_memory_bytes gauge",
+            ]
+            for name, entry in memory_stages.items():
+                lines.append(
+                    f'rss_etl_stage_peak_memory_bytes{{run="{run}",stage="{_label(name)}"}} '
+                    f'{entry["peak_memory_bytes"]}'
+                )
+        # A retried feed was observed once per attempt; keep its last attempt,
+        # since the textfile collector rejects a file with duplicate series
+        last_attempts: Dict[str, Dict[str, Any]] = {}
+        attempts: Dict[str, int] = {}
+        for feed in report["feeds"]["all"]:
+            last_attempts[feed["feed"]] = feed
+            attempts[feed["feed"]] = attempts.get(feed["feed"], 0) + 1
+        lines += [
+            "# HELP rss_etl_feed_fetch_seconds Fetch latency of the last attempt per feed in the last run",
+            "# TYPE rss_etl_feed_fetch_seconds gauge",
+        ]
+        for name, feed in last_attempts.items():
+            lines.append(
+                f'rss_etl_feed_fetch_seconds{{run="{run}",feed="{_label(name)}",'
+                f'ok="{str(feed["ok"]).lower()}"}} {feed["seconds"]}'
+            )
+        lines += [
+            "# HELP rss_etl_feed_fetch_attempts Fetch attempts per feed in the last run",
+            "# TYPE rss_etl_feed_fetch_attempts gauge",
+        ]
+        for name, count in attempts.items():
+            lines.append(f'rss_etl_feed_fetch_attempts{{run="{run}",feed="{_label(name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ============================================================================
+# Current Run
+# ============================================================================
+_current_run = RunMetrics("default")
+
+
+def start_run(run_name: str) -> RunMetrics:
+    """
+    Start collecting metrics for a new run; instrumented code records into it.
+
+    Args:
+        run_name: Name of the run (e.g. "extract", "process")
+
+    Returns:
+        The new RunMetrics
+    """
+    global _current_run
+    _current_run = RunMetrics(run_name)
+    return _current_run
+
+
+def current_run() -> RunMetrics:
+    """Return the run instrumented code should record into."""
+    return _current_run
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Write a file via rename so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+_log_bucket_checked: Dict[str, bool] = {}
+
+
+def ensure_log_bucket(s3: Optional["boto3.client"]) -> bool:
+    """
+    Make sure LOG_BUCKET exists, creating it on first use.
+
+    Checked once per process. Errors are logged, not raised.
+
+    Returns:
+        True when artifacts can be shipped to LOG_BUCKET
+    """
+    if s3 is None or not LOG_BUCKET:
+        return False
+    if LOG_BUCKET not in _log_bucket_checked:
+        try:
+            try:
+                s3.head_bucket(Bucket=LOG_BUCKET)
+            except Exception:
+                s3.create_bucket(Bucket=LOG_BUCKET)
+                logger.info(f"Created log bucket {LOG_BUCKET}")
+            _log_bucket_checked[LOG_BUCKET] = True
+        except Exception as e:
+            logger.error(f"Log bucket {LOG_BUCKET} unavailable, keeping reports local: {e}")
+            _log_bucket_checked[LOG_BUCKET] = False
+    return _log_bucket_checked[LOG_BUCKET]
+
+
+def finish_run(s3: Optional["boto3.client"] = None, status: str = "ok") -> Dict[str, Any]:
+    """
+    Finish the current run and export its report.
+
+    Writes <RUN_REPORT_DIR>/<run>_run_report.json, uploads it to LOG_BUCKET
+    when configured, and writes Prometheus textfile metrics when
+    PROMETHEUS_TEXTFILE_DIR is set. Export errors are logged, not raised.
+
+    Args:
+        s3: Boto3 S3 client used to ship the report (optional)
+        status: Final run status
+
+    Returns:
+        The run report
+    """
+    run = current_run()
+    run.finish(status)
+    report = run.to_dict()
+
+    try:
+        report_path = Path(RUN_REPORT_DIR) / f"{run.run_name}_run_report.json"
+        _write_atomic(report_path, json.dumps(report, ensure_ascii=False, indent=2))
+        logger.info(
+            f"Run report written to {report_path} "
+            f"({report['duration_seconds']}s, status {report['status']})"
+        )
+        if s3 is not None and ensure_log_bucket(s3):
+            key = f"run_reports/{run.run_name}/{run.started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+            s3.put_object(
+                Bucket=LOG_BUCKET,
+                Key=key,
+                Body=report_path.read_bytes(),
+                ContentType="application/json"
+            )
+    except Exception as e:
+        logger.error(f"Error exporting run report: {e}")
+
+    if PROMETHEUS_TEXTFILE_DIR:
+        try:
+            prom_path = Path(PROMETHEUS_TEXTFILE_DIR) / f"rss_etl_{run.run_name}.prom"
+            _write_atomic(prom_path, run.to_prometheus())
+        except Exception as e:
+            logger.error(f"Error writing Prometheus metrics: {e}")
+
+    return report
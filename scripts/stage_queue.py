@@ -0,0 +1,163 @@
+"""
+Run pipeline stages concurrently, connected by bounded queues.
+
+threaded_stage() moves the production of an iterable to a background thread
+and hands its items over through a queue of at most `maxsize` items. Chaining
+stages this way (download → parse → upsert) keeps the network, the parser
+and the database busy at the same time; when a consumer falls behind, the
+full queue blocks its producer (backpressure), so memory stays bounded.
+StageChain groups the stages of one pipeline: when the consumer fails, every
+producer thread is stopped and joined before the error propagates.
+
+Each stage records how long it waited on its neighbours:
+    blocked_ms  producer waiting for room in the queue (consumer is slower)
+    starved_ms  consumer waiting for the next item (producer is slower)
+"""
+from typing import Iterable, Iterator, List, Optional, TypeVar
+import os
+import queue
+import threading
+import time
+from utils import get_logger
+from run_metrics import current_run
+
+logger = get_logger("RSS_Stage_Queue")
+
+T = TypeVar("T")
+
+# Items buffered between two stages
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", 8))
+
+# How often a blocked producer or consumer checks whether the stage was stopped
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class _StageError:
+    """Carries a producer exception to the consumer thread."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def threaded_stage(
+    iterable: Iterable[T],
+    name: str,
+    maxsize: int = STAGE_QUEUE_SIZE,
+    stop: Optional[threading.Event] = None
+) -> Iterator[T]:
+    """
+    Iterate `iterable` in a background thread, yielding its items here.
+
+    An exception in the producer is re-raised in the consumer. When the
+    stage is closed (the consumer stopped early, or a StageChain around it
+    exited), `stop` is set, the producer thread is joined and the items
+    still buffered are dropped. Stages sharing a `stop` event stop together.
+
+    Args:
+        iterable: Items to produce (evaluated in the background thread)
+        name: Stage name, used for the thread name and the metrics
+        maxsize: Queue capacity; the producer blocks when it is full
+        stop: Event that stops the stage and the producer (optional)
+
+    Yields:
+        The items of `iterable`, in order
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = stop or threading.Event()
+    blocked = [0.0]
+
+    def put(item) -> bool:
+        started = time.monotonic()
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=_POLL_SECONDS)
+                blocked[0] += time.monotonic() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            logger.error(f"Stage {name} failed: {e}")
+            put(_StageError(e))
+            return
+        finally:
+            # Lets an upstream threaded_stage stop too when we stop early
+            close = getattr(iterable, "close", None)
+            if close:
+                close()
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, name=f"stage-{name}", daemon=True)
+    producer.start()
+
+    starved = 0.0
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                item = items.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            finally:
+                starved += time.monotonic() - started
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+        # Release the buffered items (S3 bodies, parsed batches) now
+        while True:
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                break
+        current_run().add(name, blocked_ms=int(blocked[0] * 1000), starved_ms=int(starved * 1000))
+
+
+class StageChain:
+    """
+    Stages connected to each other, stopped together.
+
+    Use as a context manager around the consumer. On exit, normal or by an
+    exception, every stage is stopped and its producer thread joined before
+    the exception propagates:
+
+        with StageChain() as chain:
+            files = chain.stage(download(), "get_raw_data")
+            load(chain.stage(parse(files), "process_raw_data"))
+    """
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self._stages: List[Iterator] = []
+
+    def stage(self, iterable: Iterable[T], name: str, maxsize: int = STAGE_QUEUE_SIZE) -> Iterator[T]:
+        """Start a threaded_stage in this chain."""
+        stage = threaded_stage(iterable, name, maxsize, stop=self.stop)
+        self._stages.append(stage)
+        return stage
+
+    def close(self) -> None:
+        """Stop every stage and join the producer threads."""
+        self.stop.set()
+        # The last stage is the one consumed here; upstream stages are
+        # consumed by the producers joined when it closes
+        for stage in reversed(self._stages):
+            stage.close()
+
+    def __enter__(self) -> "StageChain":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
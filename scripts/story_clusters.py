@@ -0,0 +1,289 @@
+"""
+Cluster near-duplicate stories across publishers.
+
+The same story arrives from several sources with different guids and
+slightly different wording. Each new item gets a MinHash signature over
+character shingles of its normalized title and description; the signature
+is split into LSH bands, and items sharing a band bucket are candidates.
+Only candidates are compared, so assigning an item costs a few indexed
+lookups instead of a comparison with every stored item.
+
+An item joins the cluster of its most similar candidate when the estimated
+Jaccard similarity reaches SIMILARITY_THRESHOLD, otherwise it starts a new
+cluster (cluster_id = its own item_id). Assignments never change afterwards,
+so readers can load clusters incrementally.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, TYPE_CHECKING
+import hashlib
+import os
+import re
+import unicodedata
+import zlib
+from utils import get_logger
+from run_metrics import current_run
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sqlalchemy.engine import Connection, Engine
+
+logger = get_logger("RSS_Story_Clusters")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Signature length = LSH_BANDS * LSH_ROWS. With 16 bands of 4 rows, pairs
+# with Jaccard similarity 0.5 become candidates about 65% of the time, 0.7
+# about 99% of the time, 0.3 about 12% of the time.
+LSH_BANDS = 16
+LSH_ROWS = 4
+NUM_PERM = LSH_BANDS * LSH_ROWS
+
+# Characters per shingle (on normalized text, words joined by one space)
+SHINGLE_SIZE = int(os.getenv("STORY_SHINGLE_SIZE", 5))
+
+# Description characters included after the title
+DESCRIPTION_CHARS = int(os.getenv("STORY_DESCRIPTION_CHARS", 200))
+
+# Estimated Jaccard similarity at which a candidate counts as the same story
+SIMILARITY_THRESHOLD = float(os.getenv("STORY_SIMILARITY_THRESHOLD", 0.5))
+
+# Items older than this drop out of the LSH index (they keep their cluster)
+CLUSTER_WINDOW_HOURS = int(os.getenv("STORY_CLUSTER_WINDOW_HOURS", 48))
+
+# Rows per executemany / IN (...) batch
+CLUSTER_BATCH_SIZE = int(os.getenv("STORY_CLUSTER_BATCH_SIZE", 1000))
+
+# Universal hashing (a * x + b) mod p with a fixed seed, so signatures stored
+# by earlier runs stay comparable
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_SEED = 1
+_permutations = None
+
+# Niqqud and cantillation marks, then anything that is not a letter or digit
+_HEBREW_MARKS_RE = re.compile("[\u0591-\u05C7]")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def _chunks(values: List[Any], size: int = CLUSTER_BATCH_SIZE) -> Iterable[List[Any]]:
+    """Yield consecutive slices of at most `size` values."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _get_permutations():
+    """Return the (a, b) coefficient arrays, generated on first use."""
+    import numpy as np
+
+    global _permutations
+    if _permutations is None:
+        rng = np.random.RandomState(_HASH_SEED)
+        a = rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+        b = rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+        _permutations = (a, b)
+    return _permutations
+
+
+# ============================================================================
+# Signatures
+# ============================================================================
+def normalize_text(text: str) -> str:
+    """Lower-case, drop niqqud and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _HEBREW_MARKS_RE.sub("", text)
+    return " ".join(_NON_WORD_RE.sub(" ", text.lower()).split())
+
+
+def shingles(title: str, description: str) -> Set[int]:
+    """Return the crc32 hashes of the character shingles of an item."""
+    text = normalize_text(f"{title} {(description or '')[:DESCRIPTION_CHARS]}")
+    if not text:
+        return set()
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(shingle_hashes: Set[int]) -> "np.ndarray":
+    """Return the MinHash signature (NUM_PERM x uint32) of a shingle set."""
+    import numpy as np
+
+    a, b = _get_permutations()
+    values = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+    # a, x < 2**32, so a * x + b cannot overflow uint64
+    hashed = (np.outer(a, values) + b[:, None]) % np.uint64(_MERSENNE_PRIME)
+    return (hashed.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def band_keys(signature: "np.ndarray") -> List[int]:
+    """Return one bucket key per LSH band (signed 63-bit, for a BIGINT column)."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].astype("<u4").tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF)
+    return keys
+
+
+def similarity(left: "np.ndarray", right: "np.ndarray") -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float((left == right).mean())
+
+
+def _to_bytes(signature: "np.ndarray") -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def _from_bytes(data: bytes) -> "np.ndarray":
+    import numpy as np
+
+    return np.frombuffer(data, dtype="<u4")
+
+
+# ============================================================================
+# Cluster Assignment
+# ============================================================================
+def _unclustered_item_ids(conn: "Connection", guids: List[str]) -> Dict[str, int]:
+    """Look up RSS_Items ids of raw guids that have no cluster yet."""
+    from sqlalchemy import bindparam, text
+
+    item_ids: Dict[str, int] = {}
+    for batch in _chunks(guids):
+        rows = conn.execute(
+            text(
+                "SELECT ri.raw_guid, ri.item_id FROM RSS_Items ri "
+                "LEFT JOIN Item_Clusters ic ON ic.item_id = ri.item_id "
+                "WHERE ri.raw_guid IN :guids AND ic.item_id IS NULL"
+            ).bindparams(bindparam("guids", expanding=True)),
+            {"guids": batch}
+        )
+        item_ids.update((guid, item_id) for guid, item_id in rows)
+    return item_ids
+
+
+def _load_candidates(
+    conn: "Connection",
+    keys: List[int],
+    buckets: Dict[int, List[int]],
+    members: Dict[int, Any]
+) -> None:
+    """Load indexed items sharing any of the bucket keys into buckets/members."""
+    from sqlalchemy import bindparam, text
+
+    for batch in _chunks(keys):
+        rows = conn.execute(
+            text(
+                "SELECT b.bucket_key, b.item_id, ic.cluster_id, ic.signature "
+                "FROM Story_LSH_Buckets b JOIN Item_Clusters ic ON ic.item_id = b.item_id "
+                "WHERE b.bucket_key IN :keys"
+            ).bindparams(bindparam("keys", expanding=True)),
+            {"keys": batch}
+        )
+        for bucket_key, item_id, cluster_id, signature in rows:
+            buckets.setdefault(bucket_key, []).append(item_id)
+            if item_id not in members and signature:
+                members[item_id] = (cluster_id, _from_bytes(signature))
+
+
+def prune_lsh_buckets(conn: "Connection", window_hours: int = CLUSTER_WINDOW_HOURS) -> int:
+    """Drop index rows older than the clustering window. Returns rows deleted."""
+    from sqlalchemy import text
+
+    result = conn.execute(
+        text("DELETE FROM Story_LSH_Buckets WHERE insert_date < NOW() - INTERVAL :hours HOUR"),
+        {"hours": window_hours}
+    )
+    return result.rowcount or 0
+
+
+def cluster_new_items(records: List[Dict[str, Any]], engine: "Engine") -> int:
+    """
+    Assign a story cluster to every record that does not have one yet.
+
+    Must run after NormalizeRSSData so the records have RSS_Items rows.
+    Items that already have a cluster are skipped, so re-running is safe.
+
+    Args:
+        records: Cleaned records with "id" (raw guid), "title" and "description"
+        engine: SQLAlchemy engine
+
+    Returns:
+        Number of items that joined an existing cluster
+    """
+    from sqlalchemy import text
+
+    by_guid = {record["id"]: record for record in records if record.get("id")}
+    if not by_guid:
+        return 0
+
+    joined = 0
+    with current_run().stage("cluster_stories"), engine.begin() as conn:
+        pruned = prune_lsh_buckets(conn)
+        item_ids = _unclustered_item_ids(conn, list(by_guid))
+
+        # Older items first, so a cluster is always named after its first item
+        new_items = []
+        for guid, item_id in sorted(item_ids.items(), key=lambda pair: pair[1]):
+            record = by_guid[guid]
+            hashes = shingles(record.get("title") or "", record.get("description") or "")
+            signature = minhash(hashes) if hashes else None
+            keys = band_keys(signature) if signature is not None else []
+            new_items.append((item_id, signature, keys))
+
+        buckets: Dict[int, List[int]] = {}
+        members: Dict[int, Any] = {}
+        _load_candidates(conn, sorted({key for _, _, keys in new_items for key in keys}), buckets, members)
+
+        cluster_rows = []
+        bucket_rows = []
+        candidates_checked = 0
+        for item_id, signature, keys in new_items:
+            cluster_id = item_id
+            if signature is not None:
+                candidates = {other for key in keys for other in buckets.get(key, ()) if other in members}
+                candidates_checked += len(candidates)
+                best_score: Optional[float] = None
+                for other in candidates:
+                    score = similarity(signature, members[other][1])
+                    if score >= SIMILARITY_THRESHOLD and (best_score is None or score > best_score):
+                        best_score = score
+                        cluster_id = members[other][0]
+                if cluster_id != item_id:
+                    joined += 1
+                # Visible to the following items of this batch
+                members[item_id] = (cluster_id, signature)
+                for key in keys:
+                    buckets.setdefault(key, []).append(item_id)
+                    bucket_rows.append({"bucket_key": key, "item_id": item_id})
+            cluster_rows.append({
+                "item_id": item_id,
+                "cluster_id": cluster_id,
+                "signature": _to_bytes(signature) if signature is not None else None,
+            })
+
+        for batch in _chunks(cluster_rows):
+            conn.execute(
+                text(
+                    "INSERT IGNORE INTO Item_Clusters (item_id, cluster_id, signature) "
+                    "VALUES (:item_id, :cluster_id, :signature)"
+                ),
+                batch
+            )
+        for batch in _chunks(bucket_rows):
+            conn.execute(
+                text("INSERT IGNORE INTO Story_LSH_Buckets (bucket_key, item_id) VALUES (:bucket_key, :item_id)"),
+                batch
+            )
+
+    current_run().add(
+        "cluster_stories",
+        items=len(cluster_rows),
+        joined=joined,
+        candidates=candidates_checked,
+        buckets_pruned=pruned
+    )
+    logger.info(f"Clustered {len(cluster_rows)} items, {joined} joined an existing story")
+    return joined
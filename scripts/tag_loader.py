@@ -0,0 +1,244 @@
+"""
+Resolve tag ids and link items to tags from Python.
+
+Replaces the JSON_TABLE expansion of rss_raw_items.tags that NormalizeRSSData
+used to do twice per run: tag ids come from an in-memory cache warmed from
+RSS_Tags, and new tags and Item_Tags pairs are inserted in batches.
+NormalizeRSSData queues the items it processes in Item_Tag_Queue; an item
+leaves the queue in the transaction that links its tags.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+import json
+import os
+from utils import get_logger
+from run_metrics import current_run
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+
+logger = get_logger("RSS_Tag_Loader")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Rows per executemany / IN (...) batch
+TAG_BATCH_SIZE = int(os.getenv("TAG_BATCH_SIZE", 1000))
+
+# RSS_Tags.tag_name is VARCHAR(255)
+MAX_TAG_LENGTH = 255
+
+
+def _chunks(values: List[Any], size: int = TAG_BATCH_SIZE) -> Iterable[List[Any]]:
+    """Yield consecutive slices of at most `size` values."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def normalize_tag(tag: str) -> str:
+    """Trim a tag to the form stored in RSS_Tags."""
+    return tag.strip()[:MAX_TAG_LENGTH]
+
+
+# ============================================================================
+# Tag Cache
+# ============================================================================
+class TagCache:
+    """In-memory tag_name -> tag_id map, warmed once from RSS_Tags."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._warmed = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def invalidate(self) -> None:
+        """Drop cached ids (e.g. after a rolled-back transaction) so the next use re-warms."""
+        self._ids.clear()
+        self._warmed = False
+
+    def warm(self, conn: "Connection") -> None:
+        """Load every existing tag (only on first use)."""
+        from sqlalchemy import text
+
+        if self._warmed:
+            return
+        rows = conn.execute(text("SELECT tag_id, tag_name FROM RSS_Tags"))
+        self._ids.update((name, tag_id) for tag_id, name in rows)
+        self._warmed = True
+        logger.info(f"Tag cache warmed with {len(self._ids)} tags")
+
+    def resolve(self, conn: "Connection", names: Iterable[str]) -> Dict[str, int]:
+        """
+        Return ids for the given tag names, inserting tags that do not exist yet.
+
+        Args:
+            conn: Open connection (inside a transaction)
+            names: Normalized tag names
+
+        Returns:
+            Mapping of tag name -> tag_id
+        """
+        from sqlalchemy import bindparam, text
+
+        self.warm(conn)
+        missing = sorted({name for name in names if name and name not in self._ids})
+        if missing:
+            for batch in _chunks(missing):
+                conn.execute(
+                    text("INSERT IGNORE INTO RSS_Tags (tag_name) VALUES (:tag_name)"),
+                    [{"tag_name": name} for name in batch]
+                )
+                rows = conn.execute(
+                    text("SELECT tag_id, tag_name FROM RSS_Tags WHERE tag_name IN :names")
+                    .bindparams(bindparam("names", expanding=True)),
+                    {"names": batch}
+                )
+                self._ids.update((name, tag_id) for tag_id, name in rows)
+
+            # The column collation is case/accent-insensitive, so a new name may
+            # have matched an existing tag spelled differently
+            for name in missing:
+                if name not in self._ids:
+                    tag_id = conn.execute(
+                        text("SELECT tag_id FROM RSS_Tags WHERE tag_name = :name"), {"name": name}
+                    ).scalar()
+                    if tag_id is not None:
+                        self._ids[name] = tag_id
+            current_run().add("link_item_tags", new_tags=len(missing))
+
+        return {name: self._ids[name] for name in names if name in self._ids}
+
+
+# Shared cache, so long-lived processes keep it warm between runs
+DEFAULT_TAG_CACHE = TagCache()
+
+
+# ============================================================================
+# Item Tag Linking
+# ============================================================================
+def _tags_from_json(value: Any) -> List[str]:
+    """Decode an rss_raw_items.tags value (rows loaded before 032 are double-encoded)."""
+    for _ in range(2):
+        if not isinstance(value, str):
+            break
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return [tag for tag in value if isinstance(tag, str)] if isinstance(value, list) else []
+
+
+def _tag_names(tags: Iterable[str]) -> Set[str]:
+    names = {normalize_tag(tag) for tag in tags}
+    names.discard("")
+    return names
+
+
+def _queued_items(conn: "Connection", limit: int) -> List[Tuple[int, str]]:
+    """Return (item_id, raw_guid) of items NormalizeRSSData queued for linking."""
+    from sqlalchemy import text
+
+    rows = conn.execute(
+        text(
+            "SELECT q.item_id, i.raw_guid FROM Item_Tag_Queue q "
+            "JOIN RSS_Items i ON i.item_id = q.item_id "
+            "ORDER BY q.item_id LIMIT :limit FOR UPDATE"
+        ),
+        {"limit": limit}
+    )
+    return [(item_id, guid) for item_id, guid in rows]
+
+
+def _raw_tags_by_guid(conn: "Connection", guids: List[str]) -> Dict[str, Set[str]]:
+    """Read the tags of raw rows that are not in memory."""
+    from sqlalchemy import bindparam, text
+
+    tags_by_guid: Dict[str, Set[str]] = {}
+    for batch in _chunks(guids):
+        rows = conn.execute(
+            text("SELECT id, tags FROM rss_raw_items WHERE id IN :guids")
+            .bindparams(bindparam("guids", expanding=True)),
+            {"guids": batch}
+        )
+        tags_by_guid.update((guid, _tag_names(_tags_from_json(tags))) for guid, tags in rows)
+    return tags_by_guid
+
+
+def link_item_tags(
+    records: List[Dict[str, Any]],
+    engine: "Engine",
+    cache: Optional[TagCache] = None
+) -> int:
+    """
+    Insert missing tags and Item_Tags pairs for the items queued in
+    Item_Tag_Queue.
+
+    Must run after NormalizeRSSData, which queues every item it processes.
+    Each batch of queued items is linked and dequeued in one transaction, so
+    items whose linking failed (in this or an earlier run) stay queued and
+    are linked by the next call. Existing pairs are ignored.
+
+    Args:
+        records: Cleaned records with "id" (raw guid) and "tags" (list of
+            str); their tags are used as-is, other queued items read theirs
+            from rss_raw_items
+        engine: SQLAlchemy engine
+        cache: Tag cache to use (defaults to the shared cache)
+
+    Returns:
+        Number of (item, tag) pairs submitted
+    """
+    from sqlalchemy import bindparam, text
+
+    if cache is None:
+        cache = DEFAULT_TAG_CACHE
+    tags_by_guid: Dict[str, Set[str]] = {}
+    for record in records:
+        tags = record.get("tags")
+        if isinstance(tags, list):
+            tags_by_guid.setdefault(record["id"], set()).update(
+                _tag_names(tag for tag in tags if isinstance(tag, str))
+            )
+
+    linked_items = 0
+    linked_pairs = 0
+    try:
+        with current_run().stage("link_item_tags"):
+            while True:
+                with engine.begin() as conn:
+                    queued = _queued_items(conn, TAG_BATCH_SIZE)
+                    if not queued:
+                        break
+                    guids = [guid for _, guid in queued]
+                    item_tags = {guid: tags_by_guid[guid] for guid in guids if guid in tags_by_guid}
+                    item_tags.update(_raw_tags_by_guid(conn, [guid for guid in guids if guid not in item_tags]))
+                    tag_ids = cache.resolve(conn, {name for names in item_tags.values() for name in names})
+
+                    pairs: Set[Tuple[int, int]] = set()
+                    for item_id, guid in queued:
+                        names = item_tags.get(guid, ())
+                        pairs.update((item_id, tag_ids[name]) for name in names if name in tag_ids)
+
+                    for batch in _chunks(sorted(pairs)):
+                        conn.execute(
+                            text("INSERT IGNORE INTO Item_Tags (item_id, tag_id) VALUES (:item_id, :tag_id)"),
+                            [{"item_id": item_id, "tag_id": tag_id} for item_id, tag_id in batch]
+                        )
+                    conn.execute(
+                        text("DELETE FROM Item_Tag_Queue WHERE item_id IN :item_ids")
+                        .bindparams(bindparam("item_ids", expanding=True)),
+                        {"item_ids": [item_id for item_id, _ in queued]}
+                    )
+                linked_items += len(queued)
+                linked_pairs += len(pairs)
+    except Exception as e:
+        # Ids of tags inserted in the rolled-back transaction must not stay cached
+        cache.invalidate()
+        logger.error(f"Error linking item tags, {linked_items} items linked before the error: {e}")
+        raise
+
+    current_run().add("link_item_tags", pairs=linked_pairs)
+    logger.info(f"Linked {linked_pairs} item tags for {linked_items} items")
+    return linked_pairs
@@ -0,0 +1,229 @@
+"""
+Incremental trending tags over sliding time windows.
+
+Each run counts only the Item_Tags rows added since the previous run (a
+watermark on the link_id insert sequence, so a tag linked to an older item
+by a later run is still counted) into fixed-size time buckets per tag, then rebuilds
+the top-k of every window from the buckets that are still inside the
+longest window. The work depends on the new items and on the tags active in
+the last TRENDING_WINDOWS[-1] hours, never on the size of the archive.
+
+Readers get "trending now" from Trending_Tags with trending_now(), which
+reads k rows.
+"""
+from typing import Any, Dict, Iterable, List, Tuple, TYPE_CHECKING
+from collections import Counter
+from datetime import timedelta
+import heapq
+import os
+from utils import get_logger
+from run_metrics import current_run
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+
+logger = get_logger("RSS_Trending_Tags")
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+# Window lengths in hours, shortest first
+TRENDING_WINDOWS = (1, 6, 24)
+
+# Bucket size; a window covers the buckets that started inside it
+TRENDING_BUCKET_MINUTES = int(os.getenv("TRENDING_BUCKET_MINUTES", 10))
+
+# Tags kept per window
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", 50))
+
+# Rows per executemany batch
+TRENDING_BATCH_SIZE = int(os.getenv("TRENDING_BATCH_SIZE", 1000))
+
+
+def _chunks(values: List[Any], size: int = TRENDING_BATCH_SIZE) -> Iterable[List[Any]]:
+    """Yield consecutive slices of at most `size` values."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ============================================================================
+# Counting
+# ============================================================================
+def count_new_tags(conn: "Connection") -> int:
+    """
+    Add the Item_Tags rows above the watermark to the bucket counters.
+
+    Returns:
+        Number of (item, tag) pairs counted
+    """
+    from sqlalchemy import text
+
+    watermark = conn.execute(
+        text("SELECT max_link_id FROM Trending_State WHERE id = 1 FOR UPDATE")
+    ).scalar() or 0
+    max_link_id = conn.execute(
+        text("SELECT COALESCE(MAX(link_id), :watermark) FROM Item_Tags WHERE link_id > :watermark"),
+        {"watermark": watermark}
+    ).scalar()
+    if max_link_id <= watermark:
+        return 0
+
+    bucket_seconds = TRENDING_BUCKET_MINUTES * 60
+    rows = conn.execute(
+        text(
+            "SELECT FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(ri.insert_date) / :bucket_seconds) * :bucket_seconds) "
+            "AS bucket_start, it.tag_id, COUNT(*) AS item_count "
+            "FROM Item_Tags it JOIN RSS_Items ri ON ri.item_id = it.item_id "
+            "WHERE it.link_id > :watermark AND it.link_id <= :max_link_id "
+            "AND ri.insert_date >= NOW() - INTERVAL :hours HOUR "
+            "GROUP BY bucket_start, it.tag_id"
+        ),
+        {
+            "bucket_seconds": bucket_seconds,
+            "watermark": watermark,
+            "max_link_id": max_link_id,
+            "hours": TRENDING_WINDOWS[-1],
+        }
+    ).mappings().all()
+
+    for batch in _chunks([dict(row) for row in rows]):
+        conn.execute(
+            text(
+                "INSERT INTO Tag_Bucket_Counts (bucket_start, tag_id, item_count) "
+                "VALUES (:bucket_start, :tag_id, :item_count) "
+                "ON DUPLICATE KEY UPDATE item_count = item_count + VALUES(item_count)"
+            ),
+            batch
+        )
+    conn.execute(
+        text(
+            "INSERT INTO Trending_State (id, max_link_id) VALUES (1, :max_link_id) "
+            "ON DUPLICATE KEY UPDATE max_link_id = :max_link_id"
+        ),
+        {"max_link_id": max_link_id}
+    )
+    return sum(row["item_count"] for row in rows)
+
+
+def prune_buckets(conn: "Connection") -> int:
+    """Drop buckets that fell out of the longest window. Returns rows deleted."""
+    from sqlalchemy import text
+
+    result = conn.execute(
+        text(
+            "DELETE FROM Tag_Bucket_Counts "
+            "WHERE bucket_start < NOW() - INTERVAL :hours HOUR - INTERVAL :minutes MINUTE"
+        ),
+        {"hours": TRENDING_WINDOWS[-1], "minutes": TRENDING_BUCKET_MINUTES}
+    )
+    return result.rowcount or 0
+
+
+# ============================================================================
+# Top-k
+# ============================================================================
+def top_k_per_window(
+    buckets: List[Tuple[Any, int, int]],
+    now: Any,
+    k: int = TRENDING_TOP_K
+) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Sum bucket counts per window and keep the k largest tags of each.
+
+    Args:
+        buckets: (bucket_start, tag_id, item_count) rows
+        now: Current time on the database clock
+        k: Tags kept per window
+
+    Returns:
+        Mapping of window hours -> [(tag_id, item_count), ...], largest first
+    """
+    counts = {hours: Counter() for hours in TRENDING_WINDOWS}
+    cutoffs = {hours: now - timedelta(hours=hours) for hours in TRENDING_WINDOWS}
+    for bucket_start, tag_id, item_count in buckets:
+        for hours in TRENDING_WINDOWS:
+            if bucket_start >= cutoffs[hours]:
+                counts[hours][tag_id] += item_count
+    # Ties go to the lower tag_id, so the ranking is stable between runs
+    return {
+        hours: heapq.nsmallest(k, window.items(), key=lambda pair: (-pair[1], pair[0]))
+        for hours, window in counts.items()
+    }
+
+
+def rebuild_trending(conn: "Connection", k: int = TRENDING_TOP_K) -> Dict[int, List[Tuple[int, int]]]:
+    """Recompute Trending_Tags from the buckets of the longest window."""
+    from sqlalchemy import bindparam, text
+
+    now = conn.execute(text("SELECT NOW()")).scalar()
+    buckets = conn.execute(
+        text("SELECT bucket_start, tag_id, item_count FROM Tag_Bucket_Counts WHERE bucket_start >= :cutoff"),
+        {"cutoff": now - timedelta(hours=TRENDING_WINDOWS[-1])}
+    ).all()
+    top = top_k_per_window(buckets, now, k)
+
+    tag_ids = sorted({tag_id for ranked in top.values() for tag_id, _ in ranked})
+    names: Dict[int, str] = {}
+    if tag_ids:
+        rows = conn.execute(
+            text("SELECT tag_id, tag_name FROM RSS_Tags WHERE tag_id IN :tag_ids")
+            .bindparams(bindparam("tag_ids", expanding=True)),
+            {"tag_ids": tag_ids}
+        )
+        names.update((tag_id, tag_name) for tag_id, tag_name in rows)
+
+    rows = [
+        {"window_hours": hours, "tag_rank": rank, "tag_id": tag_id,
+         "tag_name": names[tag_id], "item_count": item_count}
+        for hours, ranked in top.items()
+        for rank, (tag_id, item_count) in enumerate(ranked, start=1)
+        if tag_id in names
+    ]
+    conn.execute(text("DELETE FROM Trending_Tags"))
+    if rows:
+        conn.execute(
+            text(
+                "INSERT INTO Trending_Tags (window_hours, tag_rank, tag_id, tag_name, item_count) "
+                "VALUES (:window_hours, :tag_rank, :tag_id, :tag_name, :item_count)"
+            ),
+            rows
+        )
+    return top
+
+
+def update_trending_tags(engine: "Engine") -> int:
+    """
+    Count the tags of new items and rebuild the trending top-k.
+
+    Must run after link_item_tags. Safe to re-run: the watermark makes
+    every Item_Tags row count once.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Number of (item, tag) pairs counted
+    """
+    with current_run().stage("trending_tags"), engine.begin() as conn:
+        counted = count_new_tags(conn)
+        pruned = prune_buckets(conn)
+        top = rebuild_trending(conn)
+
+    current_run().add("trending_tags", pairs=counted, buckets_pruned=pruned)
+    logger.info(f"Counted {counted} tag pairs, {len(top[TRENDING_WINDOWS[-1]])} tags trending")
+    return counted
+
+
+def trending_now(conn: "Connection", window_hours: int = TRENDING_WINDOWS[0], k: int = 10) -> List[Tuple[str, int]]:
+    """Return the top k (tag_name, item_count) of a window."""
+    from sqlalchemy import text
+
+    rows = conn.execute(
+        text(
+            "SELECT tag_name, item_count FROM Trending_Tags "
+            "WHERE window_hours = :window_hours ORDER BY tag_rank LIMIT :k"
+        ),
+        {"window_hours": window_hours, "k": k}
+    )
+    return [(tag_name, item_count) for tag_name, item_count in rows]
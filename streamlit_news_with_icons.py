@@ -1,22 +1,22 @@
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from sqlalchemy import create_engine
 import json
 import plotly.express as px
 import re
 import os
 import base64
+import functools
+import html
+import threading
 from pathlib import Path
+from news_cards import CARDS_PER_PAGE, prepare_cards, render_cards
 
 # ==========================================
 # 1. פונקציות עזר ועיצוב CSS
 # ==========================================
-def clean_html(raw_html):
-    if not raw_html: return ""
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', raw_html)
-    return " ".join(cleantext.split())
-
 def local_css():
     st.markdown("""
         <style>
@@ -149,66 +149,78 @@ SOURCE_ICONS = {
     # "ynetnews": "icons/ynetnews.png",
 }
 
+# גודל התצוגה של האייקון בכרטיס; התמונה נשמרת פי 2 למסכי רזולוציה גבוהה
+ICON_DISPLAY_SIZE = 18
+ICON_SCALE = 2
+
+def icon_css_class(source_key: str) -> str:
+    return f"src-icon-{re.sub(r'[^a-z0-9_-]', '-', source_key)}"
+
+def resize_icon(image_path: str) -> str:
+    """
+    מקטין את התמונה לגודל התצוגה (פעם אחת) ומחזיר data URI של PNG.
+    """
+    from PIL import Image
+    import io
+
+    size = ICON_DISPLAY_SIZE * ICON_SCALE
+    with Image.open(image_path) as img:
+        img = img.convert("RGBA")
+        img.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
 @st.cache_data
-def load_all_icons_base64() -> dict:
+def load_icon_css() -> str:
     """
-    טוען את כל התמונות פעם אחת וממיר אותן ל-base64.
-    נשמר ב-cache כדי למנוע טעינה חוזרת.
+    בונה בלוק CSS אחד: מחלקה לכל מקור עם האייקון המוקטן כ-data URI.
+    הכרטיסים רק מפנים למחלקה, כך שבייטים של כל אייקון נשלחים פעם אחת בעמוד.
     """
-    icons_cache = {}
+    rules = [
+        f".src-icon {{ display: inline-block; width: {ICON_DISPLAY_SIZE}px; height: {ICON_DISPLAY_SIZE}px; "
+        "background-size: contain; background-repeat: no-repeat; background-position: center; "
+        "border-radius: 3px; vertical-align: middle; }"
+    ]
     for source_name, image_path in SOURCE_ICONS.items():
-        # רק תמונות מקומיות (לא URLs)
-        if not (image_path.startswith('http://') or image_path.startswith('https://')):
+        source_key = source_name.lower()
+        # URL חיצוני - הדפדפן טוען ושומר ב-cache בעצמו
+        if image_path.startswith('http://') or image_path.startswith('https://'):
+            url = image_path
+        else:
             try:
-                if os.path.exists(image_path):
-                    with open(image_path, "rb") as img_file:
-                        encoded = base64.b64encode(img_file.read()).decode()
-                        ext = Path(image_path).suffix.lower()
-                        mime_type = {
-                            '.png': 'image/png',
-                            '.jpg': 'image/jpeg',
-                            '.jpeg': 'image/jpeg',
-                            '.gif': 'image/gif',
-                            '.svg': 'image/svg+xml',
-                            '.webp': 'image/webp'
-                        }.get(ext, 'image/png')
-                        icons_cache[source_name.lower()] = f"data:{mime_type};base64,{encoded}"
+                if not os.path.exists(image_path):
+                    continue
+                url = resize_icon(image_path)
             except Exception as e:
                 print(f"⚠️ Error loading image {image_path}: {e}")
-    return icons_cache
+                continue
+        rules.append(f".{icon_css_class(source_key)} {{ background-image: url('{url}'); }}")
+    return "<style>\n" + "\n".join(rules) + "\n</style>"
 
-def get_source_icon_html(source_name: str, icons_cache: dict) -> str:
+@functools.lru_cache(maxsize=None)
+def get_source_icon_html(source_name: str) -> str:
     """
-    מחזיר HTML של אייקון למקור נתון.
-    משתמש ב-cache שכבר נטען.
+    מחזיר HTML של אייקון למקור נתון (span עם מחלקת CSS).
+    ההתאמה (מדויקת ואז חלקית) מחושבת פעם אחת לכל מקור.
     """
-    # נסה למצוא התאמה מדויקת
+    source_lower = source_name.lower()
     source_key = None
-    icon_path = None
     
-    if source_name.lower() in SOURCE_ICONS:
-        icon_path = SOURCE_ICONS[source_name.lower()]
-        source_key = source_name.lower()
+    # נסה למצוא התאמה מדויקת
+    if source_lower in SOURCE_ICONS:
+        source_key = source_lower
     else:
         # נסה למצוא התאמה חלקית
-        for key, path in SOURCE_ICONS.items():
-            if key.lower() in source_name.lower():
-                icon_path = path
+        for key in SOURCE_ICONS:
+            if key.lower() in source_lower:
                 source_key = key.lower()
                 break
     
-    if not icon_path:
+    if not source_key:
         return ''  # אין אייקון
     
-    # בדוק אם זה URL או נתיב מקומי
-    if icon_path.startswith('http://') or icon_path.startswith('https://'):
-        return f'<img src="{icon_path}" style="width:18px;height:18px;object-fit:contain;border-radius:3px;" loading="lazy" onerror="this.style.display=\'none\'">'
-    else:
-        # זה נתיב מקומי - השתמש ב-cache
-        if source_key and source_key in icons_cache:
-            return f'<img src="{icons_cache[source_key]}" style="width:18px;height:18px;object-fit:contain;border-radius:3px;" loading="lazy">'
-    
-    return ''
+    return f'<span class="src-icon {icon_css_class(source_key)}"></span>'
 
 # ==========================================
 # 3. חיבור לדאטאבייס
@@ -216,58 +228,261 @@ def get_source_icon_html(source_name: str, icons_cache: dict) -> str:
 DB_CONFIG = {"user": "hodaya", "password": "hodaya123", "host": "localhost", "port": 3307, "database": "rss_project"}
 DB_CONNECTION_STRING = f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 
-@st.cache_data(ttl=300)
+# מסלול הקריאה של הדאשבורד - לא נוגע ב-MySQL שה-ETL כותב אליו:
+# 1. snapshot של קבצי Arrow שה-pipeline מרענן אחרי כל נרמול (RSS_SNAPSHOT_DIR)
+# 2. replica לקריאה בלבד (RSS_DASHBOARD_DSN)
+# 3. אם אף אחד מהם לא זמין - הדאטאבייס הראשי
+# ברירת המחדל היא תיקיית snapshots שליד הקובץ - אותה תיקייה שה-pipeline כותב אליה
+SNAPSHOT_DIR = os.getenv("RSS_SNAPSHOT_DIR", str(Path(__file__).resolve().parent / "snapshots"))
+DASHBOARD_DSN = os.getenv("RSS_DASHBOARD_DSN", "")
+
+# כל כמה שניות לבדוק אם ה-pipeline פרסם גרסת נתונים חדשה
+VERSION_POLL_SECONDS = int(os.getenv("RSS_DASHBOARD_POLL_SECONDS", 15))
+
+# כל טבלה נשלפת מה-watermark שלה: כתבות לפי item_id, תגיות לפי link_id ושיוכי
+# סיפורים לפי assign_id - כך נטענים גם תגית או סיפור שנוספו לכתבה שכבר בזיכרון
+ITEMS_QUERY = """
+    SELECT 
+        ri.item_id AS id,
+        rs.source_name AS source,
+        rs.feed_category AS category,
+        ri.title,
+        ri.link,
+        ri.published_date,
+        ri.description,
+        COALESCE(ic.cluster_id, ri.item_id) AS cluster_id
+    FROM RSS_Items ri
+    JOIN RSS_Sources rs ON ri.source_id = rs.source_id
+    LEFT JOIN Item_Clusters ic ON ic.item_id = ri.item_id
+    WHERE ri.item_id > %(item)s
+    ORDER BY ri.published_date DESC
+"""
+
+TAGS_QUERY = """
+    SELECT 
+        it.item_id, 
+        rt.tag_name,
+        it.link_id
+    FROM Item_Tags it
+    JOIN RSS_Tags rt ON it.tag_id = rt.tag_id
+    WHERE it.link_id > %(link)s
+"""
+
+CLUSTERS_QUERY = """
+    SELECT item_id, cluster_id, assign_id
+    FROM Item_Clusters
+    WHERE assign_id > %(assign)s
+"""
+
+# top-k של התגיות החמות לכל חלון זמן (מחושב ב-pipeline, scripts/trending_tags.py)
+TRENDING_QUERY = """
+    SELECT window_hours, tag_rank, tag_name, item_count
+    FROM Trending_Tags
+    ORDER BY window_hours, tag_rank
+"""
+TRENDING_WINDOWS = {"שעה": 1, "6 שעות": 6, "24 שעות": 24}
+TRENDING_SHOWN = 10
+
+# הנתונים נשמרים בזיכרון כטבלאות Arrow (עמודות, לקריאה בלבד) - משותפות לכל הסשנים
+ITEMS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("source", pa.string()),
+    ("category", pa.string()),
+    ("title", pa.string()),
+    ("link", pa.string()),
+    ("published_date", pa.timestamp("us")),
+    ("description", pa.string()),
+    ("cluster_id", pa.int64()),
+])
+TAGS_SCHEMA = pa.schema([("item_id", pa.int64()), ("tag_name", pa.string()), ("link_id", pa.int64())])
+CLUSTERS_SCHEMA = pa.schema([("item_id", pa.int64()), ("cluster_id", pa.int64()), ("assign_id", pa.int64())])
+
+def snapshot_path():
+    """
+    מחזיר את תיקיית ה-snapshot הנוכחית (הקובץ CURRENT מצביע עליה),
+    או None אם אין snapshot או שהוא בפורמט הישן (בלי manifest.json).
+    """
+    if not SNAPSHOT_DIR:
+        return None
+    pointer = Path(SNAPSHOT_DIR) / "CURRENT"
+    if not pointer.exists():
+        return None
+    snapshot = Path(SNAPSHOT_DIR) / pointer.read_text().strip()
+    return snapshot if (snapshot / "manifest.json").exists() else None
+
+def read_manifest(snapshot):
+    # רשימת ה-segments של ה-snapshot, מהישן לחדש
+    return json.loads((snapshot / "manifest.json").read_text())
+
+@st.cache_resource
+def get_engine():
+    # engine אחד לכל השרת - ה-polling לא פותח חיבור חדש בכל פעם
+    return create_engine(DASHBOARD_DSN or DB_CONNECTION_STRING, pool_pre_ping=True)
+
+@st.cache_data(ttl=VERSION_POLL_SECONDS, show_spinner=False)
+def current_data_version():
+    """
+    בדיקה זולה של גרסת הנתונים: שם ה-snapshot הנוכחי,
+    או השורה היחידה בטבלה RSS_Data_Version.
+    """
+    snapshot = snapshot_path()
+    if snapshot is not None:
+        return f"snapshot:{snapshot.name}"
+    try:
+        version = pd.read_sql("SELECT version FROM RSS_Data_Version WHERE id = 1", get_engine())
+        return None if version.empty else f"db:{version['version'].iloc[0]}"
+    except Exception:
+        # הטבלה עוד לא קיימת - בכל בדיקה נשלוף רק את מה שמעל ה-watermark
+        return None
+
+def read_arrow_file(path):
+    """
+    ממפה את קובץ ה-Arrow לזיכרון (memory-map) - בלי להעתיק אותו.
+    כל תהליכי השרת חולקים את אותם דפים מה-page cache.
+    """
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+def collapse_clusters(table):
+    """
+    משאיר כתבה אחת (האחרונה) מכל סיפור - כתבות כפולות ממקורות שונים
+    מקבלות את אותו cluster_id ב-pipeline.
+    """
+    ordered = table.take(pc.sort_indices(table, sort_keys=[('published_date', 'descending')]))
+    # index_in מחזיר לכל cluster את המיקום הראשון שלו - כלומר הכתבה האחרונה
+    first_rows = pc.index_in(pc.unique(ordered['cluster_id']), value_set=ordered['cluster_id'])
+    return ordered.take(first_rows)
+
+def apply_cluster_updates(items, clusters):
+    """
+    מעדכן את ה-cluster_id של כתבות שכבר נטענו לפי שיוכים חדשים
+    (רק עמודת cluster_id נבנית מחדש).
+    """
+    positions = pc.index_in(items['id'], value_set=clusters['item_id'].combine_chunks())
+    if not pc.any(pc.is_valid(positions)).as_py():
+        return items
+    updated = pc.if_else(pc.is_null(positions), items['cluster_id'], pc.take(clusters['cluster_id'], positions))
+    return items.set_column(items.schema.get_field_index('cluster_id'), 'cluster_id', updated)
+
+def read_snapshot_segments(snapshot, segments):
+    """
+    קורא כתבות, תגיות ושיוכי סיפורים מה-segments שעוד לא נטענו (כטבלאות Arrow).
+    כל segment מכיל רק את השורות שנוספו בריענון שלו.
+    """
+    def read_all(table, schema):
+        parts = [read_arrow_file(snapshot / f"{table}-{segment}.arrow") for segment in segments]
+        return pa.concat_tables(parts) if parts else schema.empty_table()
+
+    return (read_all("items", ITEMS_SCHEMA),
+            read_all("tags", TAGS_SCHEMA),
+            read_all("clusters", CLUSTERS_SCHEMA))
+
+def fetch_new_rows(watermarks):
+    """שולף מה-DB כתבות, תגיות ושיוכי סיפורים שמעל ה-watermarks (כטבלאות Arrow)."""
+    params = watermarks
+    df_items = pd.read_sql(ITEMS_QUERY, get_engine(), params=params)
+    
+    # המרת תאריך
+    if 'published_date' in df_items.columns: 
+        df_items['published_date'] = pd.to_datetime(df_items['published_date'])
+    
+    # וידוא שה-ID הוא מספר (חשוב לחיבור עם התגיות)
+    if 'id' in df_items.columns:
+        df_items['id'] = pd.to_numeric(df_items['id'], errors='coerce').fillna(0).astype(int)
+
+    df_tags = pd.read_sql(TAGS_QUERY, get_engine(), params=params)
+    
+    # וידוא שה-item_id בתגיות הוא מספר
+    if 'item_id' in df_tags.columns:
+        df_tags['item_id'] = pd.to_numeric(df_tags['item_id'], errors='coerce').fillna(0).astype(int)
+
+    df_clusters = pd.read_sql(CLUSTERS_QUERY, get_engine(), params=params)
+    
+    return (pa.Table.from_pandas(df_items, schema=ITEMS_SCHEMA, preserve_index=False),
+            pa.Table.from_pandas(df_tags, schema=TAGS_SCHEMA, preserve_index=False),
+            pa.Table.from_pandas(df_clusters, schema=CLUSTERS_SCHEMA, preserve_index=False))
+
+@st.cache_data(ttl=VERSION_POLL_SECONDS, show_spinner=False)
+def load_trending(version):
+    """
+    טבלת הטרנדים (כמה עשרות שורות לכל חלון) - נשלפת מחדש רק כשגרסת הנתונים משתנה.
+    """
+    snapshot = snapshot_path()
+    if snapshot is not None:
+        path = snapshot / "trending.arrow"
+        return read_arrow_file(path).to_pandas() if path.exists() else pd.DataFrame()
+    try:
+        return pd.read_sql(TRENDING_QUERY, get_engine())
+    except Exception:
+        # הטבלה עוד לא קיימת
+        return pd.DataFrame()
+
+def compact(table, max_chunks=64):
+    # אחרי הרבה עדכונים קטנים - מאחדים את ה-chunks (העתקה חד-פעמית)
+    if table.num_columns and table.column(0).num_chunks > max_chunks:
+        return table.combine_chunks()
+    return table
+
+@st.cache_resource
+def get_store():
+    # הנתונים שכבר נטענו, משותפים לכל המשתמשים של השרת
+    store = {"lock": threading.Lock()}
+    reset_store(store, None)
+    return store
+
+def reset_store(store, source):
+    # מתחילים מאפס: במעבר בין snapshot ל-DB, או כשה-segments של ה-snapshot אוחדו
+    store.update({
+        "source": source,
+        "version": None,
+        "segments": [],
+        "watermarks": {"item": 0, "link": 0, "assign": 0},
+        "items": prepare_cards(ITEMS_SCHEMA.empty_table()),
+        "tags": TAGS_SCHEMA.empty_table(),
+    })
+
 def load_data():
-    engine = create_engine(DB_CONNECTION_STRING)
+    """
+    מחזיר את הכתבות והתגיות. רק כשגרסת הנתונים השתנתה
+    שולפים את השורות החדשות ומצרפים אותן למה שכבר בזיכרון.
+    """
+    store = get_store()
     try:
-        # 1. שליפת הכתבות (Items) + שמות המקורות והקטגוריות (Sources)
-        # אנחנו מבצעים JOIN כדי לקבל את ה-source_name וה-feed_category
-        # שימו לב: אנו לוקחים את item_id וקוראים לו id כדי שהדאשבורד יזהה אותו
-        items_query = """
-            SELECT 
-                ri.item_id AS id,
-                rs.source_name AS source,
-                rs.feed_category AS category,
-                ri.title,
-                ri.link,
-                ri.published_date,
-                ri.description
-            FROM RSS_Items ri
-            JOIN RSS_Sources rs ON ri.source_id = rs.source_id
-            ORDER BY ri.published_date DESC
-        """
-        df_items = pd.read_sql(items_query, engine)
-        
-        # המרת תאריך
-        if 'published_date' in df_items.columns: 
-            df_items['published_date'] = pd.to_datetime(df_items['published_date'])
-        
-        # וידוא שה-ID הוא מספר (חשוב לחיבור עם התגיות)
-        if 'id' in df_items.columns:
-            df_items['id'] = pd.to_numeric(df_items['id'], errors='coerce').fillna(0).astype(int)
-
-        # 2. שליפת התגיות (Tags)
-        # חיבור בין טבלת הקישור (Item_Tags) לבין שמות התגיות (RSS_Tags)
-        tags_query = """
-            SELECT 
-                it.item_id, 
-                rt.tag_name
-            FROM Item_Tags it
-            JOIN RSS_Tags rt ON it.tag_id = rt.tag_id
-        """
-        df_tags = pd.read_sql(tags_query, engine)
-        
-        # וידוא שה-item_id בתגיות הוא מספר
-        if 'item_id' in df_tags.columns:
-            df_tags['item_id'] = pd.to_numeric(df_tags['item_id'], errors='coerce').fillna(0).astype(int)
-        
-        return df_items, df_tags
+        version = current_data_version()
+        with store["lock"]:
+            if version is None or version != store["version"]:
+                snapshot = snapshot_path()
+                if snapshot is not None:
+                    segments = read_manifest(snapshot)["segments"]
+                    if store["source"] != "snapshot" or segments[:len(store["segments"])] != store["segments"]:
+                        reset_store(store, "snapshot")
+                    # רק ה-segments החדשים נקראים - השאר כבר בזיכרון
+                    new_items, new_tags, new_clusters = read_snapshot_segments(
+                        snapshot, segments[len(store["segments"]):])
+                    store["segments"] = segments
+                else:
+                    if store["source"] != "db":
+                        reset_store(store, "db")
+                    new_items, new_tags, new_clusters = fetch_new_rows(store["watermarks"])
+                # ניקוי התיאור, תאריך ו-escaping - פעם אחת לכל שורה חדשה
+                new_items = prepare_cards(new_items)
+                # concat_tables לא מעתיק - השורות החדשות נוספות כ-chunk נוסף
+                if new_items.num_rows:
+                    # כתבות חדשות קודם, כמו ב-ORDER BY published_date DESC
+                    store["items"] = compact(pa.concat_tables([new_items, store["items"]]))
+                    store["watermarks"]["item"] = pc.max(new_items['id']).as_py()
+                if new_tags.num_rows:
+                    store["tags"] = compact(pa.concat_tables([store["tags"], new_tags]))
+                    store["watermarks"]["link"] = pc.max(new_tags['link_id']).as_py()
+                if new_clusters.num_rows:
+                    # גם כתבות שנטענו לפני שהסיפור שלהן שויך
+                    store["items"] = apply_cluster_updates(store["items"], new_clusters)
+                    store["watermarks"]["assign"] = pc.max(new_clusters['assign_id']).as_py()
+                store["version"] = version
+            return store["items"], store["tags"]
 
     except Exception as e:
         st.error(f"שגיאה בטעינת נתונים: {e}")
-        return pd.DataFrame(), pd.DataFrame()
-    finally: 
-        engine.dispose()
+        return store["items"], store["tags"]
 
 # ==========================================
 # 4. ממשק משתמש
@@ -283,10 +498,15 @@ st.markdown("""
     </div>
     """, unsafe_allow_html=True)
 
-# --- טעינת נתונים (עכשיו מקבלים 2 דאטה-פריימים) ---
+def and_masks(*masks):
+    """מחבר מסכות בוליאניות (None = אין סינון)."""
+    masks = [mask for mask in masks if mask is not None]
+    return functools.reduce(pc.and_, masks) if masks else None
+
+# --- טעינת נתונים (טבלאות Arrow משותפות; כל הסינון נעשה עם מסכות, בלי העתקות) ---
 df, df_tags = load_data()
 
-if not df.empty:
+if df.num_rows:
     st.sidebar.image("https://cdn-icons-png.flaticon.com/512/2540/2540832.png", width=120)
     st.sidebar.title("מסננים")
     
@@ -295,50 +515,49 @@ if not df.empty:
     st.sidebar.markdown("---")
 
     # 2. פילטר מקור
-    selected_source = st.sidebar.selectbox("🏠 מקור", ["הכל"] + sorted(df['source'].unique().tolist()))
+    selected_source = st.sidebar.selectbox("🏠 מקור", ["הכל"] + sorted(pc.unique(df['source']).to_pylist()))
+    source_mask = pc.equal(df['source'], selected_source) if selected_source != "הכל" else None
 
     # --- חישוב קטגוריות דינמי ---
-    if selected_source == "הכל":
-        available_categories = sorted(df['category'].unique().tolist())
+    if source_mask is None:
+        available_categories = sorted(pc.unique(df['category']).to_pylist())
     else:
-        available_categories = sorted(df[df['source'] == selected_source]['category'].unique().tolist())
+        available_categories = sorted(pc.unique(df['category'].filter(source_mask)).to_pylist())
     
     # 3. פילטר קטגוריה
     selected_cat = st.sidebar.selectbox("📂 קטגוריה", ["הכל"] + available_categories)
+    category_mask = pc.equal(df['category'], selected_cat) if selected_cat != "הכל" else None
     
-    # --- יצירת בסיס לסינון ראשוני (כדי לחשב תגיות רלוונטיות) ---
-    temp_df = df.copy()
-    if selected_source != "הכל":
-        temp_df = temp_df[temp_df['source'] == selected_source]
-    if selected_cat != "הכל":
-        temp_df = temp_df[temp_df['category'] == selected_cat]
+    # --- מסכה בסיסית (מקור + קטגוריה) כדי לחשב תגיות רלוונטיות ---
+    base_mask = and_masks(source_mask, category_mask)
     
     # 4. פילטר תגיות חכם
     st.sidebar.markdown("---")
     
     selected_tags = []
-    
-    # --- בלוק דיבוג זמני (יופיע בסיידבר) ---
-    # st.sidebar.write(f"סך כתבות: {len(temp_df)}")
-    # st.sidebar.write(f"סך תגיות ב-DB: {len(df_tags)}")
-    # ------------------------------------
-
-    if not df_tags.empty and not temp_df.empty:
-        # א. מוצאים את ה-IDs של הכתבות שמוצגות כרגע
-        visible_ids = temp_df['id'].tolist()
-        
+
+    # א. מוצאים את ה-IDs של הכתבות שמוצגות כרגע
+    visible_ids = df['id'] if base_mask is None else df['id'].filter(base_mask)
+
+    if df_tags.num_rows and len(visible_ids):
         # ב. מסננים את טבלת התגיות
-        relevant_tags = df_tags[df_tags['item_id'].isin(visible_ids)]
+        relevant_tags = df_tags['tag_name'].filter(
+            pc.is_in(df_tags['item_id'], value_set=visible_ids.combine_chunks()))
         
         # --- בדיקה האם נמצאו תגיות ---
-        if relevant_tags.empty:
+        if not len(relevant_tags):
             st.sidebar.warning("לא נמצאו תגיות לכתבות המוצגות. נא בחר מקורות או קטגוריות אחרות.")
         else:
             # ג. סופרים ולוקחים את ה-50 הנפוצות ביותר
-            top_tags_counts = relevant_tags['tag_name'].value_counts().head(50)
+            tag_counts = pc.value_counts(relevant_tags)
+            top = pc.array_sort_indices(tag_counts.field('counts'), order="descending")[:50]
             
             # ד. מכינים מפה לתצוגה
-            tag_display_map = {f"{tag} ({count})": tag for tag, count in top_tags_counts.items()}
+            tag_display_map = {
+                f"{tag} ({count})": tag
+                for tag, count in zip(tag_counts.field('values').take(top).to_pylist(),
+                                      tag_counts.field('counts').take(top).to_pylist())
+            }
             
             # ה. הצגת הפילטר
             selected_tags_display = st.sidebar.multiselect(
@@ -348,62 +567,69 @@ if not df.empty:
             
             selected_tags = [tag_display_map[t] for t in selected_tags_display]
 
+    # 5. טרנדים - התגיות החמות בחלון הזמן שנבחר (קריאה של k שורות)
+    st.sidebar.markdown("---")
+    trending_window = st.sidebar.radio("🔥 חם עכשיו", list(TRENDING_WINDOWS), horizontal=True)
+    trending = load_trending(current_data_version())
+    if trending.empty:
+        st.sidebar.caption("אין עדיין נתוני טרנדים.")
+    else:
+        top_trending = trending[trending['window_hours'] == TRENDING_WINDOWS[trending_window]].head(TRENDING_SHOWN)
+        st.sidebar.markdown("<br>".join(
+            f"{rank}. {html.escape(tag)} ({count})"
+            for rank, tag, count in zip(top_trending['tag_rank'], top_trending['tag_name'], top_trending['item_count'])
+        ), unsafe_allow_html=True)
+
+    # 6. איחוד כפילויות - אותו סיפור מכמה מקורות מוצג ככרטיס אחד
+    collapse_duplicates = st.sidebar.checkbox("🧩 איחוד כתבות כפולות ממקורות שונים", value=True)
+
     if st.sidebar.button('🔄 רענן נתונים'):
-        st.cache_data.clear()
+        # בדיקת גרסה מיידית - נטענות רק כתבות חדשות, לא הכל מחדש
+        current_data_version.clear()
         st.rerun()
 
-    # --- יישום הפילטרים הסופיים על הטבלה ---
-    filtered_df = df.copy()
-    
-    # סינון לפי מקור
-    if selected_source != "הכל": 
-        filtered_df = filtered_df[filtered_df['source'] == selected_source]
-
-    # סינון לפי קטגוריה
-    if selected_cat != "הכל": 
-        filtered_df = filtered_df[filtered_df['category'] == selected_cat]
-    
-    # סינון לפי תגיות (החלק החדש)
-    # if selected_tags:
-    #     # מוצאים את ה-item_id שיש להם את התגיות שנבחרו
-    #     ids_with_tags = df_tags[df_tags['tag_name'].isin(selected_tags)]['item_id'].unique()
-    #     filtered_df = filtered_df[filtered_df['id'].isin(ids_with_tags)] 
+    # --- יישום הפילטרים הסופיים (מקור וקטגוריה כבר במסכה הבסיסית) ---
+    final_mask = base_mask
     
     # סינון לפי תגיות (לוגיקה של AND: הכתבה חייבת להכיל את כל התגיות שנבחרו)
     if selected_tags:
         # 1. מסננים את טבלת התגיות רק לשורות שרלוונטיות לתגיות שנבחרו
-        relevant_rows = df_tags[df_tags['tag_name'].isin(selected_tags)]
+        relevant_rows = df_tags.filter(pc.is_in(df_tags['tag_name'], value_set=pa.array(selected_tags)))
         
         # 2. סופרים כמה תגיות *ייחודיות* מתוך הבחירה יש לכל כתבה
         # (למשל: אם בחרת "מלחמה" ו"פוליטיקה", נחפש כתבות שיש להן count של 2)
-        id_counts = relevant_rows.groupby('item_id')['tag_name'].nunique()
+        id_counts = relevant_rows.group_by('item_id').aggregate([('tag_name', 'count_distinct')])
         
         # 3. שומרים רק את ה-IDs של הכתבות שהמספר הזה שווה למספר התגיות שנבחרו
-        ids_with_all_tags = id_counts[id_counts == len(selected_tags)].index.tolist()
+        ids_with_all_tags = id_counts['item_id'].filter(
+            pc.equal(id_counts['tag_name_count_distinct'], len(selected_tags)))
         
-        # 4. מסננים את הטבלה הראשית
-        filtered_df = filtered_df[filtered_df['id'].isin(ids_with_all_tags)]
+        # 4. מוסיפים למסכה
+        final_mask = and_masks(final_mask, pc.is_in(df['id'], value_set=ids_with_all_tags.combine_chunks()))
 
     # סינון לפי חיפוש טקסט
     if search_query: 
-        filtered_df = filtered_df[filtered_df['title'].str.contains(search_query, case=False, na=False)]
+        title_mask = pc.match_substring_regex(df['title'], pattern=search_query, ignore_case=True)
+        final_mask = and_masks(final_mask, pc.fill_null(title_mask, False))
+
+    # רק כאן נוצרת טבלה חדשה - עם השורות שעברו את הסינון בלבד
+    filtered_df = df if final_mask is None else df.filter(final_mask)
 
-    # מיון התוצאות
-    filtered_df = filtered_df.sort_values(by='published_date', ascending=False)
     # --- דאשבורד עליון ---
     # שלב 1: מדדים רחבים
     m1, m2, m3 = st.columns(3)
 
     with m1:
         # עכשיו קטגוריות מופיעות ראשונות מימין
-        st.metric("קטגוריות פעילות", filtered_df['category'].nunique())
+        st.metric("קטגוריות פעילות", pc.count_distinct(filtered_df['category']).as_py())
 
     with m2:
         # סה"כ כתבות עבר לאמצע
-        st.metric("סה\"כ כתבות", len(filtered_df))
+        st.metric("סה\"כ כתבות", filtered_df.num_rows)
     
     with m3:
-        latest = filtered_df['published_date'].max().strftime('%H:%M') if not filtered_df.empty else "--:--"
+        latest_date = pc.max(filtered_df['published_date']).as_py()
+        latest = latest_date.strftime('%H:%M') if latest_date else "--:--"
         st.metric("עדכון אחרון", latest)
 
     # st.markdown("<br>", unsafe_allow_html=True)
@@ -413,9 +639,12 @@ if not df.empty:
     # כאן מחקנו את ה-<br> שהיה קודם
 
     # שלב 2: גרף בר בודד (צמוד למדדים)
-    if not filtered_df.empty:
-        source_counts = filtered_df['source'].value_counts().reset_index()
-        source_counts.columns = ['מקור', 'כמות']
+    if filtered_df.num_rows:
+        source_value_counts = pc.value_counts(filtered_df['source'])
+        source_counts = pd.DataFrame({
+            'מקור': source_value_counts.field('values').to_pylist(),
+            'כמות': source_value_counts.field('counts').to_pylist(),
+        }).sort_values('כמות', ascending=False)
         source_counts['all'] = 'התפלגות'
 
         fig = px.bar(source_counts, x='כמות', y='all', color='מקור', orientation='h',
@@ -443,32 +672,26 @@ if not df.empty:
     st.divider()
     
     # --- גריד כתבות ---
-    if filtered_df.empty:
+    if not filtered_df.num_rows:
         st.info("לא נמצאו כתבות.")
     else:
-        # טען את כל האייקונים פעם אחת לפני הלולאה (ב-cache)
-        icons_cache = load_all_icons_base64()
+        # בלוק CSS אחד עם כל האייקונים, לפני הכרטיסים (ב-cache)
+        st.markdown(load_icon_css(), unsafe_allow_html=True)
         
-        # שינוי: הורדנו את st.columns(2) ואת החלוקה לעמודות
-        for i, (idx, row) in enumerate(filtered_df.iterrows()):
-            
-            clean_description = clean_html(row['description'])
-            
-            # קבל את האייקון מה-cache
-            icon_html = get_source_icon_html(row['source'], icons_cache)
-            
-            # יצירת הכרטיס ישירות בדף (ללא with target_col)
-            st.markdown(f"""
-                <div class="news-card">
-                    <div class="news-meta">
-                        <span class="source-tag">{icon_html} {row['source']}</span>
-                        <span>{row['category']} • {row['published_date'].strftime('%Y-%m-%d %H:%M:%S') if pd.notnull(row['published_date']) else ''}</span>
-                    </div>
-                    <div class="news-title">{row['title']}</div>
-                    <div class="news-desc">{clean_description[:200]}...</div>
-                    <a href="{row['link']}" target="_blank" class="read-more-link">קרא עוד ב-{row['source']} ←</a>
-                </div>
-            """, unsafe_allow_html=True)
-            st.write("")  # מרווח קטן בין כרטיסים
+        cards_df = collapse_clusters(filtered_df) if collapse_duplicates else filtered_df
+        
+        # עימוד: מרנדרים רק את הכרטיסים של העמוד הנוכחי (0 - הכול בעמוד אחד)
+        page_size = CARDS_PER_PAGE or cards_df.num_rows
+        total_pages = -(-cards_df.num_rows // page_size)
+        page_number = 1
+        if total_pages > 1:
+            page_number = st.number_input(f"עמוד (מתוך {total_pages})", min_value=1,
+                                          max_value=total_pages, value=1, step=1)
+        # מיון התוצאות - ממיינים אינדקסים ושולפים רק את שורות העמוד
+        order = pc.sort_indices(cards_df, sort_keys=[('published_date', 'descending')])
+        page = cards_df.take(order.slice((page_number - 1) * page_size, page_size))
+        
+        # כל העמוד נבנה מתבנית אחת ונשלח כ-markdown יחיד
+        st.markdown(render_cards(page, get_source_icon_html), unsafe_allow_html=True)
 else:
-    st.warning("אין נתונים.")
\ No newline at end of file
+    st.warning("אין נתונים.")
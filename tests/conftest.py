@@ -0,0 +1,8 @@
+"""
+The pipeline scripts import each other as top-level modules (they run from
+scripts/, as in the Airflow containers), so the tests do the same.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,78 @@
+"""Incremental export of the dashboard snapshot (scripts/dashboard_snapshot.py)."""
+import sqlite3
+
+import pytest
+
+pyarrow = pytest.importorskip("pyarrow")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+import dashboard_snapshot  # noqa: E402
+from dashboard_snapshot import read_manifest, refresh_snapshot  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE RSS_Sources (source_id INTEGER PRIMARY KEY, source_name TEXT, feed_category TEXT);
+CREATE TABLE RSS_Items (
+    item_id INTEGER PRIMARY KEY, source_id INTEGER, title TEXT, link TEXT,
+    published_date TIMESTAMP, description TEXT
+);
+CREATE TABLE RSS_Tags (tag_id INTEGER PRIMARY KEY, tag_name TEXT);
+CREATE TABLE Item_Tags (link_id INTEGER PRIMARY KEY, item_id INTEGER, tag_id INTEGER);
+CREATE TABLE Item_Clusters (assign_id INTEGER PRIMARY KEY, item_id INTEGER, cluster_id INTEGER);
+CREATE TABLE Trending_Tags (window_hours INTEGER, tag_rank INTEGER, tag_name TEXT, item_count INTEGER);
+INSERT INTO RSS_Sources VALUES (1, 'ynet', 'news');
+INSERT INTO RSS_Tags VALUES (1, 'politics');
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlalchemy.create_engine(
+        f"sqlite:///{tmp_path / 'rss.db'}", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES}
+    )
+    with engine.begin() as conn:
+        for statement in SCHEMA.strip().split(";"):
+            if statement.strip():
+                conn.exec_driver_sql(statement)
+    return engine
+
+
+def add_item(engine, item_id):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO RSS_Items VALUES (?, 1, ?, ?, '2026-01-01 10:00:00', '')",
+            (item_id, f"title {item_id}", f"https://example.com/{item_id}")
+        )
+        conn.exec_driver_sql("INSERT INTO Item_Tags (item_id, tag_id) VALUES (?, 1)", (item_id,))
+        conn.exec_driver_sql("INSERT INTO Item_Clusters (item_id, cluster_id) VALUES (?, ?)", (item_id, item_id))
+
+
+def test_refresh_adds_new_rows_as_a_segment(engine, tmp_path, monkeypatch):
+    # pa.compute only resolves once something has bound the submodule on the
+    # package (pandas does, the pandas-free pipeline path does not); load it,
+    # then unbind it, so the export cannot rely on that
+    import pyarrow.compute  # noqa: F401
+    monkeypatch.delattr(pyarrow, "compute")
+    snapshot_dir = str(tmp_path / "snapshots")
+    add_item(engine, 1)
+    first = read_manifest(refresh_snapshot(engine, snapshot_dir))
+    assert first["segments"] == ["000001"]
+    assert first["max_item_id"] == 1
+
+    add_item(engine, 2)
+    add_item(engine, 3)
+    second_dir = refresh_snapshot(engine, snapshot_dir)
+    second = read_manifest(second_dir)
+    assert second["segments"] == ["000001", "000002"]
+    assert (second["max_item_id"], second["max_link_id"], second["max_assign_id"]) == (3, 3, 3)
+
+    items = dashboard_snapshot._read_table(second_dir / "items-000002.arrow")
+    assert sorted(items.column("id").to_pylist()) == [2, 3]
+
+
+def test_refresh_without_new_rows_keeps_the_segments(engine, tmp_path):
+    snapshot_dir = str(tmp_path / "snapshots")
+    add_item(engine, 1)
+    refresh_snapshot(engine, snapshot_dir)
+    manifest = read_manifest(refresh_snapshot(engine, snapshot_dir))
+    assert manifest["segments"] == ["000001"]
+    assert manifest["max_item_id"] == 1
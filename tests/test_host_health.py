@@ -0,0 +1,90 @@
+"""Per-host circuit breaker as used by the feed fetcher (scripts/host_health.py)."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("lxml")
+
+import get_xml_upload_s3  # noqa: E402
+import host_health  # noqa: E402
+from host_health import FAILURE_THRESHOLD, HostHealth  # noqa: E402
+from rss_feeds import make_feed  # noqa: E402
+
+RSS = (
+    b'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>t</title>'
+    b"<item><title>a</title><link>https://example.com/a</link></item></channel></rss>"
+)
+
+
+@pytest.fixture
+def publisher():
+    """A host serving /feed/1 broken (404 or 500, per `failing_status`) and every other feed fine."""
+    failing_status = {"status": 404}
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            status, body = (failing_status["status"], b"") if self.path == "/feed/1" else (200, RSS)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", failing_status, requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_tracker(monkeypatch):
+    monkeypatch.setattr(host_health, "_host_health", HostHealth(engine=None))
+    monkeypatch.setattr(host_health, "RATE_PER_SECOND", 0)
+    monkeypatch.setattr(get_xml_upload_s3, "FEED_RETRY_DELAY", 0)
+
+
+def fetch_all(base_url, count=23):
+    feeds = [make_feed(f"walla_{n}", "walla", f"cat {n}", f"{base_url}/feed/{n}") for n in range(1, count + 1)]
+    return [get_xml_upload_s3.fetch_with_retry(feed) for feed in feeds]
+
+
+def test_one_broken_feed_does_not_block_its_host(publisher):
+    base_url, _, requests_seen = publisher
+    results = fetch_all(base_url)
+
+    assert results[0] is None
+    assert all(results[1:])
+    # A 404 is not retried
+    assert requests_seen.count("/feed/1") == 1
+    assert not host_health.host_health().unhealthy_hosts()
+
+
+def test_one_failing_feed_counts_once(publisher):
+    base_url, failing_status, requests_seen = publisher
+    failing_status["status"] = 500
+    results = fetch_all(base_url)
+
+    # Retried, but recorded as a single host failure, below the threshold
+    assert requests_seen.count("/feed/1") == get_xml_upload_s3.FEED_RETRIES + 1
+    assert all(results[1:])
+    assert FAILURE_THRESHOLD > 1
+    assert not host_health.host_health().unhealthy_hosts()
+
+
+def test_unreachable_host_opens_the_circuit():
+    # A port nothing listens on: every feed fails with a connection error
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.server_close()
+
+    results = fetch_all(base_url, count=FAILURE_THRESHOLD + 5)
+
+    assert not any(results)
+    assert host_health.host_health().unhealthy_hosts() == {"127.0.0.1": host_health.OPEN}
@@ -0,0 +1,62 @@
+"""Queued logging with chunked log shipping (scripts/log_queue.py)."""
+import gzip
+import logging
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import log_queue  # noqa: E402
+import run_metrics  # noqa: E402
+from log_queue import attach_log_shipping, finish_logging, ship_log, start_queued_logging  # noqa: E402
+from run_metrics import start_run  # noqa: E402
+
+BUCKET = "rss-logs-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setattr(log_queue, "LOG_BUCKET", BUCKET)
+    monkeypatch.setattr(run_metrics, "LOG_BUCKET", BUCKET)
+    with moto.mock_aws():
+        yield boto3.client("s3", region_name="us-east-1")
+
+
+def shipped_log(s3, run_name):
+    objects = s3.list_objects_v2(Bucket=BUCKET, Prefix=f"run_reports/{run_name}/")["Contents"]
+    return b"".join(
+        s3.get_object(Bucket=BUCKET, Key=obj["Key"])["Body"].read()
+        for obj in sorted(objects, key=lambda obj: obj["Key"])
+    )
+
+
+def test_each_cycle_ships_under_its_own_run(s3):
+    logger = logging.getLogger("test_log_queue")
+    start_queued_logging()
+    try:
+        attach_log_shipping(s3)
+        # Two cycles of a long-running process, as in ingestion_service
+        start_run("cycle_one")
+        logger.warning("first cycle")
+        assert ship_log()
+        start_run("cycle_two")
+        logger.warning("second cycle")
+    finally:
+        assert finish_logging(s3)
+
+    first = gzip.decompress(shipped_log(s3, "cycle_one")).decode()
+    second = gzip.decompress(shipped_log(s3, "cycle_two")).decode()
+    assert "first cycle" in first and "second cycle" not in first
+    assert "second cycle" in second and "first cycle" not in second
+
+
+def test_ship_log_without_a_shipper_does_nothing(monkeypatch):
+    monkeypatch.setattr(log_queue, "LOG_BUCKET", "")
+    start_queued_logging()
+    try:
+        assert not ship_log()
+    finally:
+        assert not finish_logging()
@@ -0,0 +1,41 @@
+"""Feed registry sharding (scripts/rss_feeds.py)."""
+import pytest
+
+import host_health
+from host_health import HostHealth
+from rss_feeds import FEEDS, feed_shards, shard_feeds, shard_hosts
+
+
+@pytest.mark.parametrize("shard_size", [0, 1, 5, 8])
+def test_shards_cover_every_feed_once(shard_size):
+    shards = feed_shards(shard_size)
+    feed_ids = [feed_id for ids in shards.values() for feed_id in ids]
+    assert sorted(feed_ids) == sorted(FEEDS)
+    if shard_size:
+        assert max(len(ids) for ids in shards.values()) <= shard_size
+
+
+def test_large_host_is_split_and_shares_its_rate():
+    shards = feed_shards()
+    split = [name for name in shards if ":" in name]
+    assert split, "no host has more feeds than RSS_SHARD_SIZE"
+    host = split[0].split(":")[0]
+    parts = sum(1 for name in shards if name.startswith(f"{host}:"))
+
+    assert shard_hosts(split[0]) == {host: parts}
+    assert {feed.feed_id for feed in shard_feeds(split[0])} == set(shards[split[0]])
+
+
+def test_split_rate_slows_the_token_bucket(monkeypatch):
+    monkeypatch.setattr(host_health, "RATE_PER_SECOND", 1000.0)
+    monkeypatch.setattr(host_health, "RATE_BURST", 4)
+    monkeypatch.setattr(host_health.time, "sleep", lambda seconds: None)
+    whole, split = HostHealth(), HostHealth()
+    split.split_rate("example.com", 4)
+
+    waits_whole = [whole.acquire("example.com") for _ in range(8)]
+    waits_split = [split.acquire("example.com") for _ in range(8)]
+    # A quarter of the burst and of the rate
+    assert waits_whole[:4] == [0.0] * 4
+    assert waits_split[1] > 0
+    assert sum(waits_split) > 3 * sum(waits_whole)
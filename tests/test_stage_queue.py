@@ -0,0 +1,61 @@
+"""Threaded pipeline stages (scripts/stage_queue.py)."""
+import itertools
+import threading
+import time
+
+import pytest
+
+from stage_queue import StageChain, threaded_stage
+
+
+class Source:
+    """Endless source that records whether it was closed."""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            for number in itertools.count():
+                yield number
+        finally:
+            self.closed.set()
+
+
+def double(numbers):
+    for number in numbers:
+        yield number * 2
+
+
+def stage_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("stage-")]
+
+
+def test_items_arrive_in_order():
+    assert list(threaded_stage(iter(range(100)), "numbers", maxsize=4)) == list(range(100))
+
+
+def test_producer_error_is_raised_in_the_consumer():
+    def failing():
+        yield 1
+        raise ValueError("bad file")
+
+    with pytest.raises(ValueError, match="bad file"):
+        list(threaded_stage(failing(), "failing"))
+
+
+def test_consumer_failure_stops_every_stage():
+    source = Source()
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="upsert failed"):
+        with StageChain() as chain:
+            doubled = chain.stage(double(chain.stage(iter(source), "source", maxsize=2)), "double", maxsize=2)
+            for value in doubled:
+                if value == 20:
+                    raise RuntimeError("upsert failed")
+
+    # The producers were stopped and joined before the error propagated,
+    # without waiting for the producers to run out
+    assert time.monotonic() - started < 5
+    assert source.closed.is_set()
+    assert not stage_threads()